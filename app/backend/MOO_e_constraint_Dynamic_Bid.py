@@ -1,10 +1,71 @@
 from docplex.mp.model import Model
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import plotly.express as px
 import os
+import time
 from collections import defaultdict
+from optimizer_telemetry import OptimizerTelemetry, telemetry_run, active_telemetry, finished_telemetry
+from pareto_plots import render_pareto_plots, submit_pareto_plots
+from ranking_store import RankingStore
+
+
+def filter_pareto_front(df_pareto, tol=1e-6):
+    """
+    Collapse duplicate allocations and remove dominated points from an e-constraint sweep
+
+    Cost is minimised and score maximised. Points that are worse in both objectives than
+    another point are dropped; points that tie another point on one objective and are worse
+    on the other are kept but flagged as weakly dominated.
+
+    Args:
+        df_pareto: DataFrame from optimize_epsilon_constraint()
+        tol: Relative tolerance used when comparing objective values
+
+    Returns:
+        DataFrame: One row per distinct allocation, sorted by cost, with an 'epsilons' column
+                   listing every epsilon that produced it and a 'weakly_dominated' flag
+    """
+    columns = list(df_pareto.columns) + ['epsilons', 'weakly_dominated']
+    df_feasible = df_pareto[df_pareto['status'] == 'Optimal']
+    if len(df_feasible) == 0:
+        return pd.DataFrame(columns=columns)
+
+    # Collapse repeated allocations, remembering every epsilon that produced them
+    grouped = df_feasible.groupby('allocations', sort=False)
+    df_unique = grouped.first().reset_index()[df_pareto.columns]
+    df_unique['epsilons'] = [sorted(float(e) for e in eps) for eps in grouped['epsilon'].agg(list)]
+    df_unique['epsilon'] = df_unique['epsilons'].str[0]
+
+    cost = df_unique['cost'].to_numpy(dtype=float)
+    score = df_unique['score'].to_numpy(dtype=float)
+    tol_cost = tol * max(1.0, np.abs(cost).max())
+    tol_score = tol * max(1.0, np.abs(score).max())
+
+    # Sweep in order of increasing cost (ties broken by decreasing score)
+    order = np.lexsort((-score, cost))
+    keep = np.zeros(len(order), dtype=bool)
+    weakly_dominated = np.zeros(len(order), dtype=bool)
+    best_previous_score = -np.inf  # best score among strictly cheaper points
+    group_cost = None
+    group_best_score = -np.inf
+    for idx in order:
+        if group_cost is None or cost[idx] > group_cost + tol_cost:
+            best_previous_score = max(best_previous_score, group_best_score)
+            group_cost = cost[idx]
+            group_best_score = score[idx]
+
+        if score[idx] < best_previous_score - tol_score:
+            continue  # strictly dominated by a cheaper, better-scoring point
+        keep[idx] = True
+        if score[idx] < group_best_score - tol_score:
+            weakly_dominated[idx] = True  # same cost, lower score
+        elif abs(score[idx] - best_previous_score) <= tol_score:
+            weakly_dominated[idx] = True  # same score, higher cost
+
+    df_unique['weakly_dominated'] = weakly_dominated
+    df_front = df_unique.iloc[[i for i in order if keep[i]]]
+    return df_front.reset_index(drop=True)[columns]
+
 
 class SelectiveNAFlexibleEConstraintOptimizer:
     def __init__(self, file_path, sheet_names=None):
@@ -20,15 +81,32 @@ class SelectiveNAFlexibleEConstraintOptimizer:
         
         self.file_path = file_path
         self.sheet_names = sheet_names
+        self.load_telemetry = OptimizerTelemetry()
+        self.last_telemetry = None
+        self.last_plot_job = None
+        self.last_ranking_store = None
+        self.last_ranking_reports = None
         self.load_data()
     
+    @property
+    def telemetry(self):
+        """Telemetry of the run in progress in this thread/task (None outside a run)"""
+        return active_telemetry(self)
+    
+    def run_telemetry(self):
+        """Telemetry of the caller's last finished run (last_telemetry if it ran elsewhere)"""
+        return finished_telemetry(self) or self.last_telemetry
+    
     def load_data(self):
         """Load and parse data from Excel file with selective NA handling"""
         try:
             # Load data sheets
+            load_start = time.perf_counter()
             self.df_data = pd.read_excel(self.file_path, sheet_name=self.sheet_names['obj1'])
             self.df_scores = pd.read_excel(self.file_path, sheet_name=self.sheet_names['obj2'])
             self.df_volume = pd.read_excel(self.file_path, sheet_name=self.sheet_names['volumes'])
+            preprocessing_start = time.perf_counter()
+            self.load_telemetry.add_phase('load', preprocessing_start - load_start)
             
             print("Original data shape:", self.df_data.shape)
             print("Columns in df_data:", self.df_data.columns.tolist())
@@ -148,7 +226,9 @@ class SelectiveNAFlexibleEConstraintOptimizer:
                     if self.valid_delivery.get((depot, supplier), False):
                         operations.append("Delivery")
                     print(f"  Supplier {supplier}: {', '.join(operations) if operations else 'No valid operations'}")
-            
+
+            self.load_telemetry.add_phase('preprocessing', time.perf_counter() - preprocessing_start)
+
         except Exception as e:
             print(f"Error loading data: {e}")
             raise
@@ -247,13 +327,17 @@ class SelectiveNAFlexibleEConstraintOptimizer:
         
         return mdl, C, D, cost_obj, score_obj, primary_obj, constrained_obj
     
+    @telemetry_run()
     def solve_single_epsilon(self, epsilon, constraint_type="cost"):
         """Solve optimization for a single epsilon value"""
+        build_start = time.perf_counter()
         mdl, C, D, cost_obj, score_obj, primary_obj, constrained_obj = self.create_model(epsilon, constraint_type)
-        
+
         # Solve the model
+        solve_start = time.perf_counter()
         solution = mdl.solve()
-        
+        extraction_start = time.perf_counter()
+
         if solution:
             # Extract allocations - only show valid operations
             allocations = []
@@ -279,12 +363,20 @@ class SelectiveNAFlexibleEConstraintOptimizer:
                 "allocations": "No solution",
                 "status": "Infeasible"
             }
-        
+
+        self.telemetry.record_solve(
+            "epsilon", epsilon, constraint_type, mdl, solution,
+            build_seconds=solve_start - build_start,
+            solve_seconds=extraction_start - solve_start,
+            extraction_seconds=time.perf_counter() - extraction_start
+        )
+
         # Clean up model to free memory
         mdl.end()
-        
+
         return result
     
+    @telemetry_run()
     def optimize_epsilon_constraint(self, epsilon_range=None, n_points=21, constraint_type="cost"):
         """
         Run e-constraint optimization across epsilon range
@@ -308,9 +400,33 @@ class SelectiveNAFlexibleEConstraintOptimizer:
             print(f"Solving epsilon {i+1}/{n_points}: {eps:.2e}")
             result = self.solve_single_epsilon(eps, constraint_type)
             results.append(result)
-        
-        return pd.DataFrame(results)
-    
+
+        df_sweep = pd.DataFrame(results)
+
+        # Keep the raw sweep so small coefficient changes can be re-optimised incrementally
+        self.last_sweep = df_sweep
+        self.last_sweep_constraint_type = constraint_type
+
+        return df_sweep
+
+    def get_pareto_front(self, df_pareto, tol=1e-6):
+        """
+        Reduce raw e-constraint output to the distinct non-dominated allocations
+
+        Args:
+            df_pareto: DataFrame from optimize_epsilon_constraint()
+            tol: Relative tolerance used when comparing objective values
+
+        Returns:
+            DataFrame: Filtered Pareto front (see filter_pareto_front)
+        """
+        df_front = filter_pareto_front(df_pareto, tol)
+        n_feasible = int((df_pareto['status'] == 'Optimal').sum())
+        print(f"Pareto filter: {n_feasible} feasible rows -> {len(df_front)} distinct non-dominated allocations "
+              f"({int(df_front['weakly_dominated'].sum())} weakly dominated)")
+        return df_front
+
+    @telemetry_run()
     def detect_epsilon_range(self, constraint_type="cost"):
         """
         Detect reasonable epsilon range by solving extreme cases with selective NA handling
@@ -318,14 +434,28 @@ class SelectiveNAFlexibleEConstraintOptimizer:
         print("Detecting epsilon range with selective NA handling...")
         
         # Solve for minimum cost (ignore score)
+        build_start = time.perf_counter()
         mdl_min_cost, C, D, cost_obj, score_obj, _, _ = self.create_model(float('inf'), "cost")
         mdl_min_cost.minimize(cost_obj)
+        solve_start = time.perf_counter()
         sol_min_cost = mdl_min_cost.solve()
-        
-        # Solve for maximum score (ignore cost)  
+        self.telemetry.record_solve(
+            "range_min_cost", None, "cost", mdl_min_cost, sol_min_cost,
+            build_seconds=solve_start - build_start,
+            solve_seconds=time.perf_counter() - solve_start
+        )
+
+        # Solve for maximum score (ignore cost)
+        build_start = time.perf_counter()
         mdl_max_score, C2, D2, cost_obj2, score_obj2, _, _ = self.create_model(0, "score")
         mdl_max_score.maximize(score_obj2)
+        solve_start = time.perf_counter()
         sol_max_score = mdl_max_score.solve()
+        self.telemetry.record_solve(
+            "range_max_score", None, "score", mdl_max_score, sol_max_score,
+            build_seconds=solve_start - build_start,
+            solve_seconds=time.perf_counter() - solve_start
+        )
         
         if constraint_type == "cost":
             if sol_min_cost and sol_max_score:
@@ -352,10 +482,24 @@ class SelectiveNAFlexibleEConstraintOptimizer:
         
         return epsilon_range
     
-    def run_full_optimization(self, epsilon_range=None, n_points=21, constraint_type="cost", **kwargs):
+    @telemetry_run()
+    def run_full_optimization(self, epsilon_range=None, n_points=21, constraint_type="cost", plots=None,
+                              save_results=False, **kwargs):
+        """
+        Run complete e-constraint optimization with results export
 
+        Args:
+            epsilon_range: tuple (min, max) or None for auto-detection
+            n_points: number of epsilon points to test
+            constraint_type: "cost" or "score" - which objective to constrain
+            plots: None to skip plotting (default), "inline" to write PNG/HTML plots before
+                   returning, or "background" to render them on a worker thread
+                   (the Future is kept in self.last_plot_job)
+            save_results: Write the Pareto CSV and telemetry JSON to Output Data/
+        """
+        if plots not in (None, "inline", "background"):
+            raise ValueError(f"Unsupported plots mode: {plots}")
 
-        """Run complete e-constraint optimization with results export"""
         print("="*60)
         print("SELECTIVE NA HANDLING E-CONSTRAINT OPTIMIZATION")
         print("="*60)
@@ -388,11 +532,15 @@ class SelectiveNAFlexibleEConstraintOptimizer:
             print("No feasible solutions found!")
             return df_pareto
         
-        # Save results
+        # Save results (telemetry JSON is written next to the CSV when the run finishes)
         output_path = "Output Data/"
-        os.makedirs(output_path, exist_ok=True)
-        df_pareto.to_csv(f"{output_path}MOO_e-const_{constraint_type}_selective_na_pareto.csv", index=False)
-        
+        if save_results:
+            report_start = time.perf_counter()
+            os.makedirs(output_path, exist_ok=True)
+            df_pareto.to_csv(f"{output_path}MOO_e-const_{constraint_type}_selective_na_pareto.csv", index=False)
+            self.telemetry.report_path = f"{output_path}MOO_e-const_{constraint_type}_selective_na_telemetry.json"
+            self.telemetry.add_phase('report_writing', time.perf_counter() - report_start)
+
         # Print summary
         print(f"\nOptimization Results ({constraint_type} constraint with selective NA handling):")
         print(f"Total epsilon points tested: {len(df_pareto)}")
@@ -405,44 +553,23 @@ class SelectiveNAFlexibleEConstraintOptimizer:
         print(f"\nSample Pareto optimal solutions:")
         print(df_feasible.head())
         
-        # Create visualizations
-        self.create_plots(df_feasible, output_path, constraint_type)
+        # Create visualizations (off by default; the frontend renders its own charts)
+        if plots == "inline":
+            with self.telemetry.phase('report_writing'):
+                self.create_plots(df_feasible, output_path, constraint_type)
+        elif plots == "background":
+            self.last_plot_job = submit_pareto_plots(df_feasible, output_path, constraint_type)
         
         return df_pareto
     
     def create_plots(self, df_pareto, save_path, constraint_type):
-        """Create plots for e-constraint results"""
+        """Write PNG/HTML plots for e-constraint results (headless, see pareto_plots)"""
         if len(df_pareto) == 0:
             print("No data to plot")
             return
-            
-        # Matplotlib plot
-        plt.figure(figsize=(8, 6))
-        plt.plot(df_pareto["score"], df_pareto["cost"], marker='o', linestyle='-', alpha=0.7)
-        plt.xlabel("Supplier Score (↑)")
-        plt.ylabel("Total Cost (↓)")
-        plt.title(f"Pareto Front: Cost vs Supplier Score (E-Constraint: {constraint_type}, Selective NA)")
-        plt.grid(True)
-        plt.gca().invert_yaxis()  # Lower cost is better
-        plt.tight_layout()
-        plt.savefig(f"{save_path}MOO_e-const_{constraint_type}_selective_na_pareto_plot.png")
-        plt.show()
-        
-        # Interactive plotly plot
-        fig = px.scatter(
-            df_pareto,
-            x="cost",
-            y="score", 
-            color="epsilon",
-            hover_data=["epsilon", "allocations"],
-            title=f"Interactive Pareto Front: E-Constraint Selective NA ({constraint_type} constraint)"
-        )
-        fig.update_layout(
-            xaxis_title="Cost (Minimize)",
-            yaxis_title="Supplier Score (Maximize)"
-        )
-        fig.show()
-        
+
+        render_pareto_plots(df_pareto, save_path, constraint_type)
+
         # Print additional statistics
         unique_allocs = set(df_pareto["allocations"])
         print(f"\nUnique allocation patterns found: {len(unique_allocs)}")
@@ -696,24 +823,28 @@ class SelectiveNAFlexibleEConstraintOptimizer:
         
         return alternatives
     
+    @telemetry_run('alternatives_analysis')
     def analyze_supplier_alternatives(self, pareto_solutions_df, ranking_metric="cost_effectiveness"):
         """
         Analyze supplier alternatives for each Pareto solution
         
         Args:
-            pareto_solutions_df: DataFrame from optimize_epsilon_constraint()
+            pareto_solutions_df: DataFrame from optimize_epsilon_constraint() or get_pareto_front()
             ranking_metric: "cost_effectiveness", "cost_impact", "score_impact", "combined"
-            
+
         Returns:
             dict: Detailed ranking analysis for each solution
         """
         print(f"Starting supplier alternatives analysis with ranking metric: {ranking_metric}")
-        
+
         analysis_results = {}
-        
-        # Filter to only optimal solutions
-        df_feasible = pareto_solutions_df[pareto_solutions_df['status'] == 'Optimal'].copy()
-        
+
+        # Collapse duplicate and dominated solutions so each allocation is analysed once
+        if 'epsilons' in pareto_solutions_df.columns:
+            df_feasible = pareto_solutions_df
+        else:
+            df_feasible = self.get_pareto_front(pareto_solutions_df)
+
         if len(df_feasible) == 0:
             print("No feasible solutions found for analysis!")
             return analysis_results
@@ -736,6 +867,8 @@ class SelectiveNAFlexibleEConstraintOptimizer:
             solution_analysis = {
                 'solution_id': idx,
                 'epsilon': row['epsilon'],
+                'epsilons': row['epsilons'],
+                'weakly_dominated': bool(row['weakly_dominated']),
                 'current_cost': current_cost,
                 'current_score': current_score,
                 'current_allocation': current_allocation,
@@ -754,157 +887,97 @@ class SelectiveNAFlexibleEConstraintOptimizer:
         print(f"Analysis completed for {len(analysis_results)} solutions")
         return analysis_results
     
+    @telemetry_run('report_writing')
     def create_ranking_report(self, analysis_results, save_path="Output Data/"):
         """
         Generate comprehensive text report and CSV files
-        
+
+        Interactive runs do not call this; the API renders the same reports on demand from
+        the RankingStore via the export endpoint.
+
         Args:
-            analysis_results: Results from analyze_supplier_alternatives()
+            analysis_results: Results from analyze_supplier_alternatives() or a RankingStore
             save_path: Directory to save reports
+
+        Returns:
+            dict: File names keyed as 'detailed_csv', 'text_report' and 'summary_csv'
         """
         if not analysis_results:
             print("No analysis results to report!")
             return
-        
-        os.makedirs(save_path, exist_ok=True)
-        
-        # Create detailed CSV report
-        csv_data = []
-        for solution_id, analysis in analysis_results.items():
-            for depot, alternatives in analysis['depot_alternatives'].items():
-                for i, alt in enumerate(alternatives[:10]):  # Top 10 alternatives per depot
-                    csv_data.append({
-                        'solution_id': solution_id,
-                        'epsilon': analysis['epsilon'],
-                        'depot': depot,
-                        'rank': i + 1,
-                        'supplier': alt['supplier'],
-                        'operation': alt['operation'],
-                        'cost_impact': alt['cost_impact'],
-                        'score_impact': alt['score_impact'],
-                        'new_cost': alt['new_cost'],
-                        'new_score': alt['new_score'],
-                        'ranking_score': alt['ranking_score'],
-                        'is_current': alt['is_current']
-                    })
-        
-        # Save CSV
-        df_report = pd.DataFrame(csv_data)
-        csv_filename = f"{save_path}supplier_ranking_analysis.csv"
-        df_report.to_csv(csv_filename, index=False)
-        print(f"Detailed CSV report saved to: {csv_filename}")
-        
-        # Create text report
-        report_filename = f"{save_path}supplier_ranking_report.txt"
-        with open(report_filename, 'w') as f:
-            f.write("="*80 + "\n")
-            f.write("SUPPLIER RANKING ANALYSIS REPORT\n")
-            f.write("="*80 + "\n\n")
-            
-            f.write(f"Analysis Summary:\n")
-            f.write(f"- Total solutions analyzed: {len(analysis_results)}\n")
-            f.write(f"- Total depot-supplier alternatives evaluated: {len(csv_data)}\n\n")
-            
-            for solution_id, analysis in analysis_results.items():
-                f.write(f"SOLUTION {solution_id} (Epsilon: {analysis['epsilon']:.2e})\n")
-                f.write("-" * 50 + "\n")
-                f.write(f"Current Cost: {analysis['current_cost']:,.2f}\n")
-                f.write(f"Current Score: {analysis['current_score']:.2f}\n")
-                f.write(f"Current Allocation: {analysis['current_allocation']}\n\n")
-                
-                for depot, alternatives in analysis['depot_alternatives'].items():
-                    f.write(f"  DEPOT {depot} - Top 3 Alternatives:\n")
-                    for i, alt in enumerate(alternatives[:3]):
-                        status = " (CURRENT)" if alt['is_current'] else ""
-                        f.write(f"    {i+1}. Supplier {alt['supplier']} ({alt['operation']}){status}\n")
-                        f.write(f"       Cost Impact: {alt['cost_impact']:+,.2f}, Score Impact: {alt['score_impact']:+.2f}\n")
-                        f.write(f"       New Cost: {alt['new_cost']:,.2f}, New Score: {alt['new_score']:.2f}\n")
-                        f.write(f"       Ranking Score: {alt['ranking_score']:.4f}\n")
-                    f.write("\n")
-                
-                f.write("\n" + "="*80 + "\n\n")
-        
-        print(f"Text report saved to: {report_filename}")
-        
-        # Create summary statistics
-        summary_data = []
-        for solution_id, analysis in analysis_results.items():
-            for depot, alternatives in analysis['depot_alternatives'].items():
-                if alternatives:
-                    best_alternative = alternatives[0]
-                    summary_data.append({
-                        'solution_id': solution_id,
-                        'depot': depot,
-                        'best_supplier': best_alternative['supplier'],
-                        'best_operation': best_alternative['operation'],
-                        'best_cost_impact': best_alternative['cost_impact'],
-                        'best_score_impact': best_alternative['score_impact'],
-                        'best_ranking_score': best_alternative['ranking_score'],
-                        'num_alternatives': len(alternatives)
-                    })
-        
-        df_summary = pd.DataFrame(summary_data)
-        summary_filename = f"{save_path}supplier_ranking_summary.csv"
-        df_summary.to_csv(summary_filename, index=False)
-        print(f"Summary report saved to: {summary_filename}")
-        
-        return {
-            'detailed_csv': csv_filename,
-            'text_report': report_filename,
-            'summary_csv': summary_filename,
-            'analysis_results': analysis_results
-        }
-    
+
+        store = analysis_results if isinstance(analysis_results, RankingStore) else RankingStore.from_analysis(analysis_results)
+        report_files = store.write_reports(save_path)
+        print(f"Detailed CSV report saved to: {report_files['detailed_csv']}")
+        print(f"Text report saved to: {report_files['text_report']}")
+        print(f"Summary report saved to: {report_files['summary_csv']}")
+
+        return report_files
+
+    @telemetry_run()
     def run_full_optimization_with_ranking(self, epsilon_range=None, n_points=21, constraint_type="cost", 
-                                         ranking_metric="cost_effectiveness", **kwargs):
+                                         ranking_metric="cost_effectiveness", save_results=False, **kwargs):
         """
         Enhanced version of run_full_optimization with ranking analysis
-        
+
+        The analysis is kept in self.last_ranking_store; report files are only written
+        when save_results is set (the API renders them on demand instead).
+
         Args:
             epsilon_range: tuple (min, max) or None for auto-detection
             n_points: number of epsilon points to test
             constraint_type: "cost" or "score" - which objective to constrain
             ranking_metric: "cost_effectiveness", "cost_impact", "score_impact", "combined"
+            save_results: Write the Pareto CSV and ranking reports to Output Data/
             **kwargs: Additional arguments for run_full_optimization
+
+        Returns:
+            DataFrame: Filtered Pareto front (duplicates collapsed, dominated points removed)
         """
         print("="*80)
         print("ENHANCED E-CONSTRAINT OPTIMIZATION WITH SUPPLIER RANKING ANALYSIS")
         print("="*80)
-        
+
         # Run standard optimization
-        df_pareto = self.run_full_optimization(epsilon_range, n_points, constraint_type, **kwargs)
-        
+        df_pareto = self.run_full_optimization(epsilon_range, n_points, constraint_type,
+                                               save_results=save_results, **kwargs)
+        df_front = self.get_pareto_front(df_pareto)
+
         # Perform ranking analysis
         print("\n" + "="*60)
         print("PERFORMING SUPPLIER RANKING ANALYSIS")
         print("="*60)
-        
-        analysis_results = self.analyze_supplier_alternatives(df_pareto, ranking_metric)
-        
+
+        analysis_results = self.analyze_supplier_alternatives(df_front, ranking_metric)
+        self.last_ranking_store = None
+        self.last_ranking_reports = None
+
         if analysis_results:
-            # Create ranking reports
-            report_files = self.create_ranking_report(analysis_results)
-            
+            # Keep the analysis in columnar form for on-demand queries and exports
+            self.last_ranking_store = RankingStore.from_analysis(analysis_results, ranking_metric)
+
             print("\n" + "="*60)
             print("RANKING ANALYSIS COMPLETED")
             print("="*60)
-            print(f"Reports generated:")
-            print(f"- Detailed CSV: {report_files['detailed_csv']}")
-            print(f"- Text Report: {report_files['text_report']}")
-            print(f"- Summary CSV: {report_files['summary_csv']}")
-            
-            # Store analysis results for potential UI access
-            self.last_ranking_analysis = analysis_results
-            self.last_ranking_reports = report_files
-        
-        return df_pareto
+            print(f"Alternatives stored: {len(self.last_ranking_store)} across {len(analysis_results)} solutions")
+
+            if save_results:
+                report_files = self.create_ranking_report(self.last_ranking_store)
+                print(f"Reports generated:")
+                print(f"- Detailed CSV: {report_files['detailed_csv']}")
+                print(f"- Text Report: {report_files['text_report']}")
+                print(f"- Summary CSV: {report_files['summary_csv']}")
+                self.last_ranking_reports = report_files
 
+        return df_front
+
+    @telemetry_run()
     def get_feasible_allocations(self, n_points=10, constraint_type="cost"):
         """
         Run MOO and extract decoded allocation dicts (C, D) for each feasible solution.
         """
         df = self.optimize_epsilon_constraint(n_points=n_points, constraint_type=constraint_type)
-        df_feasible = df[df['status'] == 'Optimal'].copy()
+        df_feasible = self.get_pareto_front(df)
 
         allocations_list = []
         for row in df_feasible.itertuples():
@@ -919,9 +992,259 @@ class SelectiveNAFlexibleEConstraintOptimizer:
                     i, j = map(int, item[2:-1].split(','))
                     D[(i, j)] = 1
             allocations_list.append({"C": C, "D": D})
-        
+
         return allocations_list
 
+    def _objective_coefficients(self):
+        """
+        Decompose the objectives of create_model into per-operation coefficients
+
+        Returns:
+            tuple: (cost_constant, cost_terms, score_terms) where cost_terms and score_terms map
+                   ('C'|'D', depot, supplier) to the coefficient of that operation. The cost of an
+                   allocation is cost_constant plus the cost terms of its chosen operations.
+        """
+        cost_constant = 0.0
+        cost_terms = {}
+        score_terms = {}
+        for (i, j) in self.all_pairs:
+            volume = self.V.get(i, 0)
+            if i in self.V:
+                cost_constant += volume * (self.DP + self.ZD.get((i, j), 0))
+            score = self.S.get(f"Supplier {j}", 0)
+
+            # Same coefficient rules as create_model
+            if self.valid_collection.get((i, j), False):
+                coc_val = self.COC.get((i, j), 0)
+                cost_val = self.COST.get((i, j), 0)
+                benefit = 0
+                if isinstance(coc_val, (int, float)) and isinstance(cost_val, (int, float)):
+                    benefit = coc_val - cost_val
+                cost_terms[('C', i, j)] = -volume * benefit
+                score_terms[('C', i, j)] = score
+            if self.valid_delivery.get((i, j), False):
+                del_val = self.DEL.get((i, j), 0)
+                benefit = del_val if isinstance(del_val, (int, float)) else 0
+                cost_terms[('D', i, j)] = -volume * benefit
+                score_terms[('D', i, j)] = score
+
+        return cost_constant, cost_terms, score_terms
+
+    def apply_coefficient_changes(self, changes):
+        """
+        Update bid coefficients in place for a small set of depot-supplier pairs
+
+        All changes are validated before any is applied, so an invalid change leaves the
+        optimizer untouched.
+
+        Args:
+            changes: list of dicts with 'depot', 'supplier' and any of 'coc_rebate',
+                     'cost_of_collection', 'del_rebate', 'zone_differential'. Omitted fields keep
+                     their current value; None marks the field as NA. Unknown pairs are added and
+                     must include a numeric 'zone_differential' (it enters the fixed cost term).
+        """
+        field_map = {
+            'coc_rebate': self.COC,
+            'cost_of_collection': self.COST,
+            'del_rebate': self.DEL,
+            'zone_differential': self.ZD
+        }
+
+        # Stage the new values per pair; later changes to the same pair override earlier ones
+        staged = {}
+        for change in changes:
+            key = (int(change['depot']), int(change['supplier']))
+            if key[0] not in self.depots:
+                raise ValueError(f"Depot {key[0]} is not part of the loaded problem; re-initialize the optimizer")
+            if key not in self.all_pairs and key not in staged and 'zone_differential' not in change:
+                raise ValueError(f"New depot {key[0]} / supplier {key[1]} pair needs a zone_differential")
+            values = staged.setdefault(key, {})
+            for field in field_map:
+                if field in change:
+                    value = change[field]
+                    values[field] = np.nan if value is None else float(pd.to_numeric(value, errors='coerce'))
+            if 'zone_differential' in values and pd.isna(values['zone_differential']):
+                raise ValueError(f"Depot {key[0]} / supplier {key[1]}: zone_differential must be a number")
+
+        # Re-derive operation validity exactly like load_data, on copies of the affected depots
+        validity = {}
+        depot_suppliers = {key[0]: set(self.depot_suppliers.get(key[0], ())) for key in staged}
+        for key, values in staged.items():
+            current = {field: values.get(field, coefficients.get(key, np.nan))
+                       for field, coefficients in field_map.items()}
+            coc_valid = not (pd.isna(current['coc_rebate']) or current['coc_rebate'] == 'NA')
+            cost_valid = not (pd.isna(current['cost_of_collection']) or current['cost_of_collection'] == 'NA')
+            valid_collection = coc_valid and cost_valid
+            valid_delivery = not (pd.isna(current['del_rebate']) or current['del_rebate'] == 'NA')
+            validity[key] = (valid_collection, valid_delivery)
+            if valid_collection or valid_delivery:
+                depot_suppliers[key[0]].add(key[1])
+            else:
+                depot_suppliers[key[0]].discard(key[1])
+        for depot, suppliers in depot_suppliers.items():
+            if not suppliers:
+                raise ValueError(f"Depot {depot} has no feasible operations after applying changes")
+
+        for key, values in staged.items():
+            if key not in self.all_pairs:
+                self.all_pairs.append(key)
+                for coefficients in field_map.values():
+                    coefficients[key] = np.nan
+                if key[1] not in self.suppliers:
+                    self.suppliers = sorted(self.suppliers + [key[1]])
+                    self.n_suppliers = len(self.suppliers)
+            for field, value in values.items():
+                field_map[field][key] = value
+            self.valid_collection[key], self.valid_delivery[key] = validity[key]
+        for depot, suppliers in depot_suppliers.items():
+            self.depot_suppliers[depot] = suppliers
+
+    @telemetry_run()
+    def reoptimize_incremental(self, changes, df_sweep=None, constraint_type=None, tol=1e-9):
+        """
+        Refresh a previous e-constraint sweep after a small number of bid coefficients change
+
+        Every stored solution is re-scored with the new coefficients. A solution is kept without
+        re-solving when a bound check proves it is still optimal for its epsilon: any allocation
+        that could beat it under the new coefficients maps, by swapping out its changed operations,
+        to an old allocation whose objective values are bounded by the stored sweep. Only the
+        epsilon values where that proof fails are re-solved.
+
+        In cost-constrained sweeps the epsilon grid is shifted by the change in the model's
+        constant cost term, so each grid point keeps its meaning. The epsilon range itself is
+        not re-detected; run a full optimization for that.
+
+        Args:
+            changes: Coefficient changes (see apply_coefficient_changes)
+            df_sweep: Raw sweep from optimize_epsilon_constraint(); defaults to the last sweep
+            constraint_type: "cost" or "score"; defaults to the type of the last sweep
+            tol: Relative tolerance for the bound checks
+
+        Returns:
+            DataFrame: Updated sweep with a 'refresh' column ("reused" or "resolved")
+        """
+        if df_sweep is None:
+            if getattr(self, 'last_sweep', None) is None:
+                raise ValueError("No previous sweep available; run optimize_epsilon_constraint first")
+            df_sweep = self.last_sweep
+            constraint_type = self.last_sweep_constraint_type
+        constraint_type = constraint_type or "cost"
+
+        old_constant, old_costs, old_scores = self._objective_coefficients()
+        self.apply_coefficient_changes(changes)
+        new_constant, new_costs, new_scores = self._objective_coefficients()
+        delta_constant = new_constant - old_constant
+
+        # Per-depot bounds on how much an allocation can gain by using a changed operation.
+        # Existing operations are compared with their old coefficients; new operations with
+        # the best-scoring (then cheapest) operation the depot already had.
+        max_cost_drop = defaultdict(float)
+        max_score_gain = defaultdict(float)
+        for op in set(old_costs) | set(new_costs):
+            if op not in new_costs or old_costs.get(op) == new_costs[op]:
+                continue  # unchanged, or removed (which can only shrink the feasible set)
+            depot = op[1]
+            if op in old_costs:
+                reference = op
+            else:
+                reference = min(
+                    (o for o in old_costs if o[1] == depot),
+                    key=lambda o: (-old_scores[o], old_costs[o])
+                )
+            max_cost_drop[depot] = max(max_cost_drop[depot], old_costs[reference] - new_costs[op])
+            max_score_gain[depot] = max(max_score_gain[depot], new_scores[op] - old_scores[reference])
+        cost_slack = sum(max_cost_drop.values())
+        score_slack = sum(max_score_gain.values())
+
+        # Extreme objective values over all old allocations
+        depot_ops = defaultdict(list)
+        for op in old_costs:
+            depot_ops[op[1]].append(op)
+        old_max_score = sum(max(old_scores[o] for o in ops) for ops in depot_ops.values())
+        old_min_cost = old_constant + sum(min(old_costs[o] for o in ops) for ops in depot_ops.values())
+
+        df_old = df_sweep.sort_values('epsilon').reset_index(drop=True)
+        old_epsilons = df_old['epsilon'].to_numpy(dtype=float)
+        feasible = (df_old['status'] == 'Optimal').to_numpy()
+
+        def old_optimum_bound(t):
+            # Cost sweep: upper bound on the old best score with cost <= t.
+            # Score sweep: lower bound on the old least cost with score >= t.
+            if constraint_type == "cost":
+                j = np.searchsorted(old_epsilons, t - tol * abs(t), side='left')
+                if j >= len(old_epsilons):
+                    return old_max_score
+                return df_old['score'].iloc[j] if feasible[j] else -np.inf
+            j = np.searchsorted(old_epsilons, t + tol * abs(t), side='right') - 1
+            if j < 0:
+                return old_min_cost
+            return df_old['cost'].iloc[j] if feasible[j] else np.inf
+
+        print(f"Incremental re-optimization: {len(changes)} changed pairs, "
+              f"cost slack {cost_slack:.2e}, score slack {score_slack:.2f}")
+
+        results = []
+        n_resolved = 0
+        for k, row in df_old.iterrows():
+            epsilon = row['epsilon'] + (delta_constant if constraint_type == "cost" else 0)
+            proven = False
+            result = None
+
+            if feasible[k]:
+                ops = [(item[0], *map(int, item[2:-1].split(','))) for item in row['allocations'].split()]
+                if all(op in new_costs for op in ops):
+                    new_cost = new_constant + sum(new_costs[op] for op in ops)
+                    score = row['score']
+                    if constraint_type == "cost":
+                        bound = old_optimum_bound(row['epsilon'] + cost_slack) + score_slack
+                        proven = new_cost <= epsilon + tol * abs(epsilon) and score >= bound - tol * abs(bound)
+                    else:
+                        bound = old_optimum_bound(row['epsilon'] - score_slack) + delta_constant - cost_slack
+                        proven = new_cost <= bound + tol * abs(bound)
+                    if proven:
+                        result = {
+                            "epsilon": epsilon,
+                            "cost": new_cost,
+                            "score": score,
+                            "allocations": row['allocations'],
+                            "status": "Optimal"
+                        }
+            else:
+                # Stays infeasible when no allocation can have moved across the constraint
+                proven = (cost_slack <= 0) if constraint_type == "cost" else (score_slack <= 0)
+                if proven:
+                    result = {
+                        "epsilon": epsilon,
+                        "cost": None,
+                        "score": None,
+                        "allocations": "No solution",
+                        "status": "Infeasible"
+                    }
+
+            if proven:
+                result["refresh"] = "reused"
+            else:
+                print(f"Re-solving epsilon {epsilon:.2e}")
+                result = self.solve_single_epsilon(epsilon, constraint_type)
+                result["refresh"] = "resolved"
+                n_resolved += 1
+            results.append(result)
+
+        df_refreshed = pd.DataFrame(results)
+        print(f"Incremental re-optimization: re-used {len(results) - n_resolved}/{len(results)} "
+              f"solutions, re-solved {n_resolved}")
+
+        self.last_sweep = df_refreshed
+        self.last_sweep_constraint_type = constraint_type
+        self.last_incremental_stats = {
+            "changed_pairs": len(changes),
+            "epsilon_points": len(results),
+            "reused": len(results) - n_resolved,
+            "resolved": n_resolved
+        }
+
+        return df_refreshed
+
 
 # # Usage example
 # if __name__ == "__main__":
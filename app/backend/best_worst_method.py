@@ -6,10 +6,17 @@ with linear programming optimization.
 """
 
 import numpy as np
-from scipy.optimize import linprog
 from typing import Dict, List, Tuple, Optional
 import json
 
+from process_pool import pool_map
+
+# scipy is imported lazily: the analytic solver never needs it
+
+SOLVER_METHODS = ("lp", "analytic")
+BATCH_METHODS = ("sparse", "pool")
+AGGREGATION_METHODS = ("geometric", "arithmetic")
+
 class BestWorstMethod:
     """
     Best-Worst Method implementation for calculating criteria weights.
@@ -28,6 +35,7 @@ class BestWorstMethod:
         self.others_to_worst = {}
         self.weights = {}
         self.consistency_ratio = None
+        self.solver = None  # "analytic" or "highs" once weights are calculated
     
     def set_criteria(self, criteria: List[str]) -> None:
         """Set the list of criteria names."""
@@ -80,9 +88,14 @@ class BestWorstMethod:
         # Worst criterion compared to itself is always 1
         self.others_to_worst[self.worst_criterion] = 1.0
     
-    def calculate_weights(self) -> Tuple[Dict[str, float], float]:
+    def calculate_weights(self, method: str = "lp") -> Tuple[Dict[str, float], float]:
         """
-        Calculate the optimal weights using linear programming.
+        Calculate the optimal weights of the linear BWM model.
+        
+        Args:
+            method: "lp" solves the linear program with HiGHS; "analytic" uses the closed-form
+                    procedure (see _solve_analytic) and falls back to HiGHS only if it cannot
+                    certify a solution
         
         Returns:
             Tuple of (weights_dict, consistency_ratio)
@@ -93,6 +106,29 @@ class BestWorstMethod:
         if not self.best_to_others or not self.others_to_worst:
             raise ValueError("Must set comparison values before calculating weights")
         
+        if method not in SOLVER_METHODS:
+            raise ValueError(f"Unknown BWM method '{method}'. Use one of {list(SOLVER_METHODS)}")
+        
+        solution = self._solve_analytic() if method == "analytic" else None
+        if solution is None:
+            solution = self._solve_lp()
+            self.solver = "highs"
+        else:
+            self.solver = "analytic"
+        weights, consistency_ratio = solution
+        
+        # Update weights dictionary
+        for i, criterion in enumerate(self.criteria):
+            self.weights[criterion] = float(weights[i])
+        
+        self.consistency_ratio = float(consistency_ratio)
+        
+        return self.weights.copy(), self.consistency_ratio
+    
+    def _solve_lp(self) -> Tuple[np.ndarray, float]:
+        """Solve the linear BWM model with HiGHS; returns (weights in criteria order, xi)"""
+        from scipy.optimize import linprog
+        
         n = len(self.criteria)
         
         # Create variable mapping: w_1, w_2, ..., w_n, xi
@@ -186,16 +222,149 @@ class BestWorstMethod:
         
         # Extract results
         solution = result.x
-        weights = solution[:n]
-        consistency_ratio = solution[-1]
+        return solution[:n], solution[-1]
+    
+    def _solve_analytic(self, tolerance: float = 1e-9) -> Optional[Tuple[np.ndarray, float]]:
+        """
+        Closed-form solution of the linear BWM model, or None when HiGHS is needed.
         
-        # Update weights dictionary
-        for i, criterion in enumerate(self.criteria):
-            self.weights[criterion] = float(weights[i])
+        All constraints except sum(w) = 1 are homogeneous, so fix w_W = 1 and let r = w_B / w_W.
+        For a given r the smallest feasible (unnormalised) xi is
+            xi(r) = max(|r - a_BW|, |r - a_BW'|, max_j |r - a_Bj a_jW| / (a_Bj + 1))
+        (a_BW from best-to-others, a_BW' from others-to-worst; each other w_j needs
+        [(r - xi)/a_Bj, (r + xi)/a_Bj] and [a_jW - xi, a_jW + xi] to intersect). Normalising divides
+        xi by sum(w), which is largest with every w_j at the top of its interval, and a larger xi
+        never pays off. So the optimum minimises the 1-D function
+            g(r) = xi(r) / (1 + r + sum_j min((r + xi(r)) / a_Bj, a_jW + xi(r)))
+        which is linear-fractional between breakpoints, hence optimal at a breakpoint: r = 0, the
+        kinks of each term, pairwise crossings of term lines and the points where a min() switches.
+        The result is checked against every LP constraint before it is returned.
+        """
+        n = len(self.criteria)
+        best_idx = self.criteria.index(self.best_criterion)
+        worst_idx = self.criteria.index(self.worst_criterion)
+        others = [i for i in range(n) if i not in (best_idx, worst_idx)]
+        a_best = np.array([self.best_to_others[self.criteria[j]] for j in others], dtype=np.float64)
+        a_worst = np.array([self.others_to_worst[self.criteria[j]] for j in others], dtype=np.float64)
         
-        self.consistency_ratio = float(consistency_ratio)
+        # xi(r) = max_k |r - centre_k| / scale_k
+        centres = np.concatenate([[self.best_to_others[self.worst_criterion],
+                                   self.others_to_worst[self.best_criterion]], a_best * a_worst])
+        scales = np.concatenate([[1.0, 1.0], a_best + 1.0])
         
-        return self.weights.copy(), self.consistency_ratio
+        # Lines of every term: xi = slope * r + intercept
+        slopes = np.concatenate([1.0 / scales, -1.0 / scales])
+        intercepts = np.concatenate([-centres / scales, centres / scales])
+        
+        candidates = [np.zeros(1), centres]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Crossings of any two term lines
+            ds = slopes[:, None] - slopes[None, :]
+            candidates.append(((intercepts[None, :] - intercepts[:, None]) / ds).ravel())
+            # (r + xi) / a_j = a_jW + xi on each line
+            ds = 1.0 + slopes[:, None] * (1.0 - a_best[None, :])
+            candidates.append((((a_best * a_worst)[None, :] + intercepts[:, None] * (a_best[None, :] - 1.0)) / ds).ravel())
+        r = np.concatenate(candidates)
+        r = np.unique(r[np.isfinite(r) & (r >= 0)])
+        
+        def objective(r):
+            xi = np.max(np.abs(r[:, None] - centres[None, :]) / scales[None, :], axis=1)
+            tops = np.minimum((r[:, None] + xi[:, None]) / a_best[None, :], a_worst[None, :] + xi[:, None])
+            return xi, tops, xi / (1.0 + r + tops.sum(axis=1))
+        
+        xi, tops, g = objective(r)
+        k = int(np.argmin(g))
+        
+        # As r grows (w_W -> 0) g tends to 1 / (1 + sum_j min(2 / a_Bj, 1)); if that is no worse the
+        # optimum may sit at w_W = 0, which the parametrisation cannot represent
+        limit = 1.0 / (1.0 + np.minimum(2.0 / a_best, 1.0).sum())
+        if limit <= g[k] + tolerance:
+            return None
+        
+        total = 1.0 + r[k] + tops[k].sum()
+        weights = np.empty(n)
+        weights[best_idx] = r[k] / total
+        weights[worst_idx] = 1.0 / total
+        weights[others] = tops[k] / total
+        consistency_ratio = xi[k] / total
+        
+        if not self._satisfies_constraints(weights, consistency_ratio, tolerance):
+            return None
+        return weights, consistency_ratio
+    
+    def _satisfies_constraints(self, weights: np.ndarray, xi: float, tolerance: float) -> bool:
+        """Check weights against every constraint of the linear model"""
+        best_idx = self.criteria.index(self.best_criterion)
+        worst_idx = self.criteria.index(self.worst_criterion)
+        a_best = np.array([self.best_to_others[c] for c in self.criteria], dtype=np.float64)
+        a_worst = np.array([self.others_to_worst[c] for c in self.criteria], dtype=np.float64)
+        return bool(
+            np.all(weights >= -tolerance)
+            and abs(weights.sum() - 1.0) <= tolerance
+            and np.all(np.abs(weights[best_idx] - a_best * weights) <= xi + tolerance)
+            and np.all(np.abs(weights - a_worst * weights[worst_idx]) <= xi + tolerance)
+        )
+    
+    def calculate_weight_intervals(self, method: str = "analytic", tolerance: float = 1e-12) -> Dict:
+        """
+        Range of every weight over all optimal solutions of the linear model.
+        
+        The linear model often has many optimal weight vectors. With xi fixed at its optimum,
+        the 2n LPs minimising and maximising each weight are stacked as one block-diagonal
+        sparse LP (see build_batch_lp) and solved in a single HiGHS call. The centre solution is
+        the mean of those 2n optimal vertices; the optimal set is convex, so it is optimal too and
+        does not depend on which vertex a solver happens to return.
+        
+        Args:
+            method: How xi is found first ("analytic" or "lp", see calculate_weights)
+            tolerance: Relative slack allowed on xi in the min/max LPs
+        
+        Returns:
+            Dictionary with consistency_ratio, weight_intervals {criterion: [min, max]},
+            centre_weights, max_interval_width and unique_solution (all widths below 1e-9)
+        """
+        from scipy.optimize import linprog
+        
+        _, xi = self.calculate_weights(method)
+        n = len(self.criteria)
+        index = {criterion: i for i, criterion in enumerate(self.criteria)}
+        best = np.full(2 * n, index[self.best_criterion], dtype=np.int64)
+        worst = np.full(2 * n, index[self.worst_criterion], dtype=np.int64)
+        best_to_others = np.tile([self.best_to_others[c] for c in self.criteria], (2 * n, 1)).astype(np.float64)
+        others_to_worst = np.tile([self.others_to_worst[c] for c in self.criteria], (2 * n, 1)).astype(np.float64)
+        lp = build_batch_lp(best, worst, best_to_others, others_to_worst)
+        
+        # Block k minimises w_k (k < n) or maximises w_{k-n}; every xi is capped at the optimum
+        width = n + 1
+        c = np.zeros(2 * n * width)
+        blocks = np.arange(2 * n)
+        c[blocks * width + blocks % n] = np.where(blocks < n, 1.0, -1.0)
+        bounds = np.zeros((2 * n * width, 2))
+        bounds[:, 1] = np.inf
+        bounds[n::width, 1] = xi + tolerance * max(1.0, xi)
+        
+        result = linprog(c=c, A_ub=lp["A_ub"], b_ub=lp["b_ub"], A_eq=lp["A_eq"], b_eq=lp["b_eq"],
+                         bounds=bounds, method='highs')
+        if not result.success:
+            raise RuntimeError(f"Linear programming failed: {result.message}")
+        
+        vertices = result.x.reshape(2 * n, width)[:, :n]
+        lower = np.minimum(np.diag(vertices[:n]), self._weight_vector())
+        upper = np.maximum(np.diag(vertices[n:]), self._weight_vector())
+        unique = bool(np.max(upper - lower) <= 1e-9)
+        # With a unique optimum the vertices only differ by solver noise; keep the exact solution
+        centre = self._weight_vector() if unique else vertices.mean(axis=0)
+        centre = centre / centre.sum()
+        return {
+            "consistency_ratio": float(xi),
+            "weight_intervals": {c: [float(lower[i]), float(upper[i])] for i, c in enumerate(self.criteria)},
+            "centre_weights": {c: float(centre[i]) for i, c in enumerate(self.criteria)},
+            "max_interval_width": float(np.max(upper - lower)),
+            "unique_solution": unique
+        }
+    
+    def _weight_vector(self) -> np.ndarray:
+        return np.array([self.weights[c] for c in self.criteria], dtype=np.float64)
     
     def get_consistency_interpretation(self) -> str:
         """
@@ -226,7 +395,8 @@ class BestWorstMethod:
             "others_to_worst": self.others_to_worst,
             "weights": self.weights,
             "consistency_ratio": self.consistency_ratio,
-            "consistency_interpretation": self.get_consistency_interpretation()
+            "consistency_interpretation": self.get_consistency_interpretation(),
+            "solver": self.solver
         }
     
     @classmethod
@@ -245,7 +415,8 @@ class BestWorstMethod:
 
 def calculate_bwm_weights(criteria: List[str], best: str, worst: str, 
                          best_to_others: Dict[str, float], 
-                         others_to_worst: Dict[str, float]) -> Dict:
+                         others_to_worst: Dict[str, float],
+                         method: str = "lp") -> Dict:
     """
     Convenience function to calculate BWM weights.
     
@@ -255,6 +426,7 @@ def calculate_bwm_weights(criteria: List[str], best: str, worst: str,
         worst: Name of the worst (least important) criterion
         best_to_others: Comparison values from best to all others (1-9 scale)
         others_to_worst: Comparison values from all others to worst (1-9 scale)
+        method: "lp" (HiGHS) or "analytic" (closed form, HiGHS fallback)
     
     Returns:
         Dictionary containing weights and consistency information
@@ -265,11 +437,231 @@ def calculate_bwm_weights(criteria: List[str], best: str, worst: str,
     bwm.set_best_to_others(best_to_others)
     bwm.set_others_to_worst(others_to_worst)
     
-    weights, consistency_ratio = bwm.calculate_weights()
+    weights, consistency_ratio = bwm.calculate_weights(method)
     
     return bwm.to_dict()
 
 
+def _respondent_arrays(criteria: List[str], respondents: List[Dict]) -> Tuple[List['BestWorstMethod'], np.ndarray,
+                                                                             np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Validate every respondent and stack their comparisons into arrays.
+    
+    Returns:
+        Tuple of (BWM instances, best indices (m,), worst indices (m,),
+                  best-to-others (m, n), others-to-worst (m, n)) in criteria order
+    """
+    instances = []
+    for r, respondent in enumerate(respondents):
+        try:
+            bwm = BestWorstMethod()
+            bwm.set_criteria(list(criteria))
+            bwm.set_best_worst(respondent["best_criterion"], respondent["worst_criterion"])
+            bwm.set_best_to_others(respondent["best_to_others"])
+            bwm.set_others_to_worst(respondent["others_to_worst"])
+            missing = [c for c in criteria if c not in bwm.best_to_others or c not in bwm.others_to_worst]
+            if missing:
+                raise ValueError(f"Missing comparisons for: {', '.join(missing)}")
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Respondent {r}: {e}")
+        instances.append(bwm)
+    
+    index = {criterion: i for i, criterion in enumerate(criteria)}
+    best = np.array([index[bwm.best_criterion] for bwm in instances], dtype=np.int64)
+    worst = np.array([index[bwm.worst_criterion] for bwm in instances], dtype=np.int64)
+    best_to_others = np.array([[bwm.best_to_others[c] for c in criteria] for bwm in instances], dtype=np.float64)
+    others_to_worst = np.array([[bwm.others_to_worst[c] for c in criteria] for bwm in instances], dtype=np.float64)
+    return instances, best, worst, best_to_others, others_to_worst
+
+
+def build_batch_lp(best: np.ndarray, worst: np.ndarray, best_to_others: np.ndarray,
+                   others_to_worst: np.ndarray) -> Dict:
+    """
+    Block-diagonal LP for m independent BWM problems over n criteria.
+    
+    Respondent r owns variables [w_0 .. w_{n-1}, xi] at offset r * (n + 1); its rows are the
+    same 4(n - 1) inequalities and one equality calculate_weights() builds, assembled for all
+    respondents at once. Minimising the sum of the xi minimises each xi, since blocks are independent.
+    
+    Returns:
+        Dictionary with c, A_ub, b_ub, A_eq, b_eq (sparse CSR matrices) ready for linprog
+    """
+    from scipy import sparse
+    
+    m, n = best_to_others.shape
+    width = n + 1
+    offsets = np.arange(m)[:, None] * width
+    respondents = np.arange(m)[:, None]
+    
+    # Columns j != best (best-to-others rows) and i != worst (others-to-worst rows), per respondent
+    others_b = np.broadcast_to(np.arange(n), (m, n))[np.arange(n)[None, :] != best[:, None]].reshape(m, n - 1)
+    others_w = np.broadcast_to(np.arange(n), (m, n))[np.arange(n)[None, :] != worst[:, None]].reshape(m, n - 1)
+    k_bo = best_to_others[respondents, others_b]
+    k_ow = others_to_worst[respondents, others_w]
+    best_col = np.broadcast_to(best[:, None], (m, n - 1))
+    worst_col = np.broadcast_to(worst[:, None], (m, n - 1))
+    
+    # Four row families, each (m, n - 1) rows with three coefficients:
+    #   w_B - k_BO(j) w_j - xi <= 0,  k_BO(j) w_j - w_B - xi <= 0
+    #   w_i - k_OW(i) w_W - xi <= 0,  k_OW(i) w_W - w_i - xi <= 0
+    ones = np.ones((m, n - 1))
+    families = [
+        (best_col, ones, others_b, -k_bo),
+        (others_b, k_bo, best_col, -ones),
+        (others_w, ones, worst_col, -k_ow),
+        (worst_col, k_ow, others_w, -ones),
+    ]
+    rows_per_respondent = 4 * (n - 1)
+    row_base = np.arange(m)[:, None] * rows_per_respondent
+    rows, cols, vals = [], [], []
+    for f, (col_a, val_a, col_b, val_b) in enumerate(families):
+        row = row_base + f * (n - 1) + np.arange(n - 1)[None, :]
+        rows.extend([row, row, row])
+        cols.extend([offsets + col_a, offsets + col_b, offsets + n + np.zeros((m, n - 1), dtype=np.int64)])
+        vals.extend([val_a, val_b, -ones])
+    A_ub = sparse.coo_matrix(
+        (np.concatenate([v.ravel() for v in vals]),
+         (np.concatenate([r.ravel() for r in rows]), np.concatenate([c.ravel() for c in cols]))),
+        shape=(m * rows_per_respondent, m * width)
+    ).tocsr()
+    
+    # One sum-to-one equality per respondent over its weight columns
+    eq_cols = (offsets + np.arange(n)[None, :]).ravel()
+    A_eq = sparse.csr_matrix(
+        (np.ones(m * n), (np.repeat(np.arange(m), n), eq_cols)), shape=(m, m * width)
+    )
+    
+    c = np.zeros(m * width)
+    c[n::width] = 1.0  # Minimise every xi
+    return {
+        "c": c,
+        "A_ub": A_ub,
+        "b_ub": np.zeros(m * rows_per_respondent),
+        "A_eq": A_eq,
+        "b_eq": np.ones(m)
+    }
+
+
+def calculate_bwm_weight_intervals(criteria: List[str], best: str, worst: str,
+                                   best_to_others: Dict[str, float],
+                                   others_to_worst: Dict[str, float],
+                                   method: str = "analytic") -> Dict:
+    """
+    Convenience function for BWM weight intervals.
+    
+    Returns:
+        calculate_bwm_weights() dictionary whose weights are the centre solution, plus
+        weight_intervals, max_interval_width, unique_solution and the solver's own vertex as
+        solver_weights
+    """
+    bwm = BestWorstMethod()
+    bwm.set_criteria(criteria)
+    bwm.set_best_worst(best, worst)
+    bwm.set_best_to_others(best_to_others)
+    bwm.set_others_to_worst(others_to_worst)
+    
+    intervals = bwm.calculate_weight_intervals(method)
+    result = bwm.to_dict()
+    result["solver_weights"] = result["weights"]
+    result["weights"] = intervals["centre_weights"]
+    result["weight_intervals"] = intervals["weight_intervals"]
+    result["max_interval_width"] = intervals["max_interval_width"]
+    result["unique_solution"] = intervals["unique_solution"]
+    return result
+
+
+def _solve_respondent(args):
+    # Module-level so it can be pickled for the shared process pool
+    criteria, respondent = args
+    return calculate_bwm_weights(criteria, respondent["best_criterion"], respondent["worst_criterion"],
+                                 respondent["best_to_others"], respondent["others_to_worst"])
+
+
+def aggregate_weights(weight_matrix: np.ndarray, method: str = "geometric") -> np.ndarray:
+    """
+    Aggregate respondent weight vectors (m, n) into one normalised group weight vector.
+    
+    Args:
+        weight_matrix: One row of weights per respondent
+        method: "geometric" (normalised geometric mean, the usual group-BWM choice) or "arithmetic"
+    """
+    if method == "geometric":
+        # A zero weight from any respondent zeroes the criterion, as the geometric mean implies
+        with np.errstate(divide="ignore"):
+            group = np.exp(np.mean(np.log(weight_matrix), axis=0))
+    elif method == "arithmetic":
+        group = np.mean(weight_matrix, axis=0)
+    else:
+        raise ValueError(f"Unknown aggregation '{method}'. Use one of {list(AGGREGATION_METHODS)}")
+    total = group.sum()
+    return group / total if total > 0 else np.full(weight_matrix.shape[1], 1.0 / weight_matrix.shape[1])
+
+
+def calculate_bwm_weights_batch(criteria: List[str], respondents: List[Dict], aggregation: str = "geometric",
+                                method: str = "sparse", workers: Optional[int] = None) -> Dict:
+    """
+    Calculate BWM weights for many respondents in one call.
+    
+    Args:
+        criteria: List of criterion names shared by all respondents
+        respondents: One dictionary per respondent with best_criterion, worst_criterion,
+                     best_to_others, others_to_worst and an optional respondent label
+        aggregation: How to combine respondent weights into group weights (see aggregate_weights)
+        method: "sparse" solves all respondents as one block-diagonal HiGHS LP;
+                "pool" solves them one by one on the shared process pool
+        workers: Respondents solved at once for method="pool" (default: the pool size)
+    
+    Returns:
+        Dictionary with per-respondent results (as calculate_bwm_weights), group weights and
+        consistency summary
+    """
+    if not respondents:
+        raise ValueError("At least one respondent is required")
+    if len(criteria) < 2:
+        raise ValueError("At least two criteria are required")
+    if method not in BATCH_METHODS:
+        raise ValueError(f"Unknown batch method '{method}'. Use one of {list(BATCH_METHODS)}")
+    
+    instances, best, worst, best_to_others, others_to_worst = _respondent_arrays(criteria, respondents)
+    n = len(criteria)
+    
+    if method == "sparse":
+        from scipy.optimize import linprog
+        
+        lp = build_batch_lp(best, worst, best_to_others, others_to_worst)
+        result = linprog(c=lp["c"], A_ub=lp["A_ub"], b_ub=lp["b_ub"], A_eq=lp["A_eq"], b_eq=lp["b_eq"],
+                         bounds=(0, None), method='highs')
+        if not result.success:
+            raise RuntimeError(f"Linear programming failed: {result.message}")
+        solution = result.x.reshape(len(respondents), n + 1)
+        for bwm, row in zip(instances, solution):
+            bwm.weights = {criterion: float(row[i]) for i, criterion in enumerate(criteria)}
+            bwm.consistency_ratio = float(row[-1])
+            bwm.solver = "highs"
+        results = [bwm.to_dict() for bwm in instances]
+    else:
+        results = pool_map(_solve_respondent, [(list(criteria), r) for r in respondents], workers)
+    
+    for r, (respondent, result_dict) in enumerate(zip(respondents, results)):
+        result_dict["respondent"] = respondent.get("respondent") or f"Respondent {r + 1}"
+    
+    weight_matrix = np.array([[res["weights"][c] for c in criteria] for res in results])
+    consistency = np.array([res["consistency_ratio"] for res in results])
+    group = aggregate_weights(weight_matrix, aggregation)
+    return {
+        "criteria": list(criteria),
+        "respondents": results,
+        "group_weights": {criterion: float(group[i]) for i, criterion in enumerate(criteria)},
+        "aggregation": aggregation,
+        "method": method,
+        "consistency_summary": {
+            "mean": float(consistency.mean()),
+            "max": float(consistency.max()),
+            "acceptable": int(np.sum(consistency <= 0.3))  # "Acceptable consistency" or better
+        }
+    }
+
+
 # Example usage and testing
 if __name__ == "__main__":
     # Example: Price, Quality, Delivery, Sustainability
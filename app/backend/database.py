@@ -4,125 +4,329 @@ from datetime import datetime
 from typing import List, Dict, Any, Optional
 import os
 import json
+import hashlib
 import time
 import random
 import threading
+import queue
 from contextlib import contextmanager
 
+from refresh_worker import UnifiedScoresRefreshWorker
+from db_writer import (DatabaseWriter, WriterConnection, write_operation, on_writer_thread, after_commit,
+                       after_rollback)
+from reference_cache import ReferenceDataCache
+
+# Connections kept per database file; more concurrent threads than this wait for a free one
+DEFAULT_POOL_SIZE = 8
+
+
+class ConnectionPool:
+    """
+    Bounded pool of configured sqlite3 connections to one database file.
+    
+    Connections are opened lazily (PRAGMAs applied once, when opened) up to max_size and reused
+    afterwards. A thread keeps the connection it checked out for nested connection() calls, so
+    helpers calling other helpers share one connection; the outermost exit returns it to the pool.
+    """
+    
+    def __init__(self, db_path: str, connect, max_size: int = DEFAULT_POOL_SIZE):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.closed = False
+        self._connect = connect  # (timeout, retries) -> configured connection
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    
+    @contextmanager
+    def connection(self, timeout: float = 30.0, retries: int = 3):
+        held = getattr(self._local, 'connection', None)
+        if held is not None:
+            yield held
+            return
+        connection = self._acquire(timeout, retries)
+        self._local.connection = connection
+        try:
+            yield connection
+        finally:
+            self._local.connection = None
+            self._release(connection)
+    
+    def bind(self, connection: sqlite3.Connection):
+        """Make connection the calling thread's connection for good (the writer thread's own)"""
+        self._local.connection = connection
+    
+    def _acquire(self, timeout: float, retries: int) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_open = self._opened < self.max_size
+            if can_open:
+                self._opened += 1
+        if can_open:
+            try:
+                return self._connect(timeout, retries)
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            # Same message as SQLite's own so callers map it to "busy" (503)
+            raise sqlite3.OperationalError(f"database is locked: no pooled connection free after {timeout}s")
+    
+    def _release(self, connection: sqlite3.Connection):
+        try:
+            if connection.in_transaction:
+                # A caller failed between BEGIN and COMMIT; never hand an open transaction on
+                connection.rollback()
+            if not self.closed:
+                self._idle.put(connection)
+                return
+        except sqlite3.Error:
+            pass
+        self._discard(connection)
+    
+    def _discard(self, connection: sqlite3.Connection):
+        with self._lock:
+            self._opened -= 1
+        try:
+            connection.close()
+        except sqlite3.Error:
+            pass
+    
+    def stats(self) -> Dict[str, int]:
+        return {'opened': self._opened, 'idle': self._idle.qsize(), 'max_size': self.max_size}
+    
+    def close(self):
+        """Close idle connections; connections still checked out are closed when returned"""
+        self.closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
 class SupplierDatabase:
-    def __init__(self, db_path: str = None):
+    # Tables whose writes bump a counter in data_versions (see get_data_versions)
+    VERSIONED_TABLES = ('suppliers', 'supplier_criteria_scores', 'bwm_weights', 'profile_scoring_config')
+    
+    # Profile-based BWM criteria: (profile_scoring_config.criteria_name, suppliers column)
+    PROFILE_CRITERIA = {
+        'Product/Service Type': ('product_service_type', 'product_service_type'),
+        'Geographical Network': ('geographical_network', 'geographical_network'),
+        'Method of Sourcing': ('method_of_sourcing', 'method_of_sourcing'),
+        'Investment in Equipment': ('invest_in_refuelling_equipment', 'invest_in_refuelling_equipment'),
+        'Reciprocal Business': ('reciprocal_business', 'reciprocal_business'),
+        'B-BBEE Level': ('B-BBEE Level', '"B-BBEE_level"')
+    }
+    
+    # One pool per database file for the whole process, so every SupplierDatabase shares it
+    _pools: Dict[str, ConnectionPool] = {}
+    _pool_files: Dict[str, tuple] = {}
+    _refresh_workers: Dict[str, UnifiedScoresRefreshWorker] = {}
+    _writers: Dict[str, DatabaseWriter] = {}
+    _reference_caches: Dict[str, ReferenceDataCache] = {}
+    _pools_lock = threading.Lock()
+    
+    def __init__(self, db_path: str = None, pool_size: int = DEFAULT_POOL_SIZE):
         if db_path is None:
             # Default to the Ubuntu database location
             db_path = "/tmp/supplier_data_fresh.db"
         self.db_path = db_path
         self._lock = threading.RLock()
-        self.init_database()
+        stale_writer = None
+        with SupplierDatabase._pools_lock:
+            pool = self._pools.get(db_path)
+            if pool is None or pool.closed or self._pool_files.get(db_path) != self._file_identity(db_path):
+                # First use of this file in the process (or it was replaced): open a pool and migrate once
+                if pool is not None:
+                    pool.close()
+                stale_worker = self._refresh_workers.pop(db_path, None)
+                if stale_worker is not None:
+                    stale_worker.stop(flush=False)
+                stale_writer = self._writers.pop(db_path, None)
+                pool = ConnectionPool(db_path, self._open_connection, pool_size)
+                self._pool = pool
+                self.init_database()
+                self._pools[db_path] = pool
+                self._pool_files[db_path] = self._file_identity(db_path)
+                self._reference_caches[db_path] = ReferenceDataCache()
+            self._pool = pool
+            self._reference_cache = self._reference_caches[db_path]
+        if stale_writer is not None:
+            stale_writer.stop()  # outside the lock: its queued writes may still look up workers
     
-    @contextmanager
-    def get_connection(self, timeout: float = 30.0, retries: int = 3):
+    @staticmethod
+    def _file_identity(db_path: str) -> Optional[tuple]:
+        try:
+            stat = os.stat(db_path)
+        except OSError:
+            return None
+        return (stat.st_dev, stat.st_ino)
+    
+    @property
+    def refresh_worker(self) -> UnifiedScoresRefreshWorker:
+        """Background unified-scores refresh worker shared by every instance for this database file"""
+        with SupplierDatabase._pools_lock:
+            worker = self._refresh_workers.get(self.db_path)
+            if worker is None:
+                worker = UnifiedScoresRefreshWorker(self)
+                self._refresh_workers[self.db_path] = worker
+            return worker
+    
+    @property
+    def writer(self) -> DatabaseWriter:
+        """
+        Writer thread shared by every instance for this database file. Methods decorated with
+        @write_operation run there, so only its connection ever writes.
+        """
+        with SupplierDatabase._pools_lock:
+            writer = self._writers.get(self.db_path)
+            if writer is None:
+                writer = DatabaseWriter(lambda: self._open_connection(factory=WriterConnection), self._pool.bind)
+                self._writers[self.db_path] = writer
+            return writer
+    
+    def close(self):
+        """Close this database file's pooled connections (e.g. at application shutdown)"""
+        with SupplierDatabase._pools_lock:
+            worker = self._refresh_workers.pop(self.db_path, None)
+            writer = self._writers.get(self.db_path)
+        if worker is not None:
+            worker.stop()  # refreshes what is still queued while the writer and pool are open
+        if writer is not None:
+            # Commits what is still queued. It stays registered until the end, so writes made
+            # meanwhile fail with "writer is stopped" instead of starting another writer.
+            writer.stop()
+        with SupplierDatabase._pools_lock:
+            late_worker = self._refresh_workers.pop(self.db_path, None)
+        if late_worker is not None:
+            late_worker.stop(flush=False)  # refreshes enqueued by the drained writes; no writer left
+        with SupplierDatabase._pools_lock:
+            if self._writers.get(self.db_path) is writer:
+                self._writers.pop(self.db_path, None)
+            self._pool.close()
+            if self._pools.get(self.db_path) is self._pool:
+                del self._pools[self.db_path]
+                self._pool_files.pop(self.db_path, None)
+    
+    def pool_stats(self) -> Dict[str, int]:
+        """Opened/idle connection counts of the pool"""
+        return self._pool.stats()
+    
+    def _open_connection(self, timeout: float = 30.0, retries: int = 3,
+                         factory: type = sqlite3.Connection) -> sqlite3.Connection:
         """
-        Get a database connection with proper timeout and retry handling.
+        Open a connection and apply the PRAGMAs, with retry handling.
         Uses safe database connection settings to avoid disk I/O errors.
+        Only called by the pool when it needs a new connection, and once by the writer.
         """
         connection = None
-        try:
-            for attempt in range(retries):
+        for attempt in range(retries):
+            try:
+                connection = sqlite3.connect(
+                    self.db_path, 
+                    timeout=timeout,
+                    isolation_level=None,  # Autocommit mode for better concurrency
+                    check_same_thread=False,  # Pooled: handed to one thread at a time
+                    factory=factory
+                )
+                
+                # Safe PRAGMA settings - avoid WAL mode due to WSL2 file system issues
                 try:
-                    connection = sqlite3.connect(
-                        self.db_path, 
-                        timeout=timeout,
-                        isolation_level=None  # Autocommit mode for better concurrency
-                    )
-                    
-                    # Safe PRAGMA settings - avoid WAL mode due to WSL2 file system issues
-                    try:
-                        # Try WAL mode first, fall back to DELETE if it fails
-                        result = connection.execute("PRAGMA journal_mode=WAL")
-                        journal_mode = result.fetchone()[0] if result else None
-                        if journal_mode != 'wal':
-                            print(f"Warning: WAL mode not enabled (got {journal_mode}), using DELETE mode instead")
+                    # Try WAL mode first, fall back to DELETE if it fails
+                    result = connection.execute("PRAGMA journal_mode=WAL")
+                    journal_mode = result.fetchone()[0] if result else None
+                    if journal_mode != 'wal':
+                        print(f"Warning: WAL mode not enabled (got {journal_mode}), using DELETE mode instead")
+                        connection.execute("PRAGMA journal_mode=DELETE")
+                except (sqlite3.OperationalError, sqlite3.DatabaseError) as pragma_error:
+                    if any(phrase in str(pragma_error).lower() for phrase in ["disk i/o error", "database is locked", "unable to open"]):
+                        print(f"Warning: WAL mode failed ({pragma_error}), using DELETE mode instead")
+                        try:
                             connection.execute("PRAGMA journal_mode=DELETE")
-                    except (sqlite3.OperationalError, sqlite3.DatabaseError) as pragma_error:
-                        if any(phrase in str(pragma_error).lower() for phrase in ["disk i/o error", "database is locked", "unable to open"]):
-                            print(f"Warning: WAL mode failed ({pragma_error}), using DELETE mode instead")
-                            try:
-                                connection.execute("PRAGMA journal_mode=DELETE")
-                            except sqlite3.OperationalError:
-                                # If DELETE mode also fails, continue without setting journal mode
-                                print("Warning: Could not set any journal mode, continuing with default")
-                        else:
-                            raise
-                    
-                    # Apply other PRAGMA settings with error handling
+                        except sqlite3.OperationalError:
+                            # If DELETE mode also fails, continue without setting journal mode
+                            print("Warning: Could not set any journal mode, continuing with default")
+                    else:
+                        raise
+                
+                # Apply other PRAGMA settings with error handling
+                try:
+                    connection.execute("PRAGMA synchronous=NORMAL")
+                except sqlite3.OperationalError as e:
+                    if "disk i/o error" in str(e).lower():
+                        print(f"Warning: Could not set synchronous mode, using default")
+                    else:
+                        raise
+                
+                # Set other non-critical PRAGMA settings with individual error handling
+                for pragma_cmd, description in [
+                    ("PRAGMA cache_size=10000", "cache size"),
+                    ("PRAGMA temp_store=MEMORY", "temp store"),
+                    ("PRAGMA busy_timeout=30000", "busy timeout")
+                ]:
                     try:
-                        connection.execute("PRAGMA synchronous=NORMAL")
+                        connection.execute(pragma_cmd)
                     except sqlite3.OperationalError as e:
                         if "disk i/o error" in str(e).lower():
-                            print(f"Warning: Could not set synchronous mode, using default")
+                            print(f"Warning: Could not set {description}, using default")
                         else:
                             raise
-                    
-                    # Set other non-critical PRAGMA settings with individual error handling
-                    for pragma_cmd, description in [
-                        ("PRAGMA cache_size=10000", "cache size"),
-                        ("PRAGMA temp_store=MEMORY", "temp store"),
-                        ("PRAGMA busy_timeout=30000", "busy timeout")
-                    ]:
-                        try:
-                            connection.execute(pragma_cmd)
-                        except sqlite3.OperationalError as e:
-                            if "disk i/o error" in str(e).lower():
-                                print(f"Warning: Could not set {description}, using default")
-                            else:
-                                raise
-                    
-                    # Connection successfully created and configured
-                    break
-                    
-                except sqlite3.OperationalError as e:
-                    if "database is locked" in str(e).lower() and attempt < retries - 1:
-                        # Exponential backoff with jitter
+                
+                # Connection successfully created and configured
+                break
+                
+            except sqlite3.OperationalError as e:
+                if "database is locked" in str(e).lower() and attempt < retries - 1:
+                    # Exponential backoff with jitter
+                    delay = (2 ** attempt) + random.uniform(0, 1)
+                    print(f"Database locked, retrying in {delay:.2f}s (attempt {attempt + 1}/{retries})")
+                    if connection:
+                        connection.close()
+                        connection = None
+                    time.sleep(delay)
+                    continue
+                elif "disk I/O error" in str(e).lower():
+                    # Handle disk I/O errors specifically
+                    print(f"Database disk I/O error on attempt {attempt + 1}: {e}")
+                    if connection:
+                        connection.close()
+                        connection = None
+                    if attempt < retries - 1:
                         delay = (2 ** attempt) + random.uniform(0, 1)
-                        print(f"Database locked, retrying in {delay:.2f}s (attempt {attempt + 1}/{retries})")
-                        if connection:
-                            connection.close()
-                            connection = None
+                        print(f"Retrying in {delay:.2f}s...")
                         time.sleep(delay)
                         continue
-                    elif "disk I/O error" in str(e).lower():
-                        # Handle disk I/O errors specifically
-                        print(f"Database disk I/O error on attempt {attempt + 1}: {e}")
-                        if connection:
-                            connection.close()
-                            connection = None
-                        if attempt < retries - 1:
-                            delay = (2 ** attempt) + random.uniform(0, 1)
-                            print(f"Retrying in {delay:.2f}s...")
-                            time.sleep(delay)
-                            continue
-                        else:
-                            raise sqlite3.OperationalError(f"Persistent disk I/O error after {retries} attempts. This may be due to WSL2 file system limitations. Try moving the database to a native Linux path or use a different journal mode.")
                     else:
-                        if connection:
-                            connection.close()
-                            connection = None
-                        raise
-                except Exception as e:
+                        raise sqlite3.OperationalError(f"Persistent disk I/O error after {retries} attempts. This may be due to WSL2 file system limitations. Try moving the database to a native Linux path or use a different journal mode.")
+                else:
                     if connection:
                         connection.close()
                         connection = None
                     raise
-            
-            # Yield the connection for use
-            yield connection
-            
-        finally:
-            # Only close the connection here after the with block is done
-            if connection:
-                try:
+            except Exception as e:
+                if connection:
                     connection.close()
-                except:
-                    pass
+                    connection = None
+                raise
+        
+        return connection
+    
+    @contextmanager
+    def get_connection(self, timeout: float = 30.0, retries: int = 3):
+        """
+        Borrow a pooled connection for the duration of the with block.
+        Nested calls on the same thread reuse the connection already borrowed.
+        """
+        with self._pool.connection(timeout, retries) as connection:
+            yield connection
     
     def execute_with_retry(self, query: str, params: tuple = (), timeout: float = 30.0, retries: int = 3):
         """Execute a query with retry logic for database locks"""
@@ -135,170 +339,397 @@ class SupplierDatabase:
                 conn.commit()
                 return cursor.rowcount
     
+    # Schema version recorded in PRAGMA user_version once every migration up to it has run
+    SCHEMA_VERSION = 7
+    
     def init_database(self):
-        """Initialize the database with required tables"""
+        """
+        Bring the schema up to SCHEMA_VERSION, running only the migrations the file has not had yet.
+        
+        Called once per database file per process (when its connection pool is created). Each
+        migration is idempotent, so databases created before user_version was tracked are adopted.
+        """
+        migrations = [self._migrate_base_tables, self._migrate_promethee_runs, self._migrate_data_versions,
+                      self._migrate_query_indexes, self._migrate_evaluation_scores, self._migrate_config_versions,
+                      self._migrate_audit_supplier_ids]
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            
-            # Create suppliers table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS suppliers (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL UNIQUE,
-                    email TEXT,
-                    company_profile TEXT,
-                    annual_revenue REAL,
-                    number_of_employees INTEGER,
-                    "B-BBEE_level" INTEGER,
-                    black_ownership_percent REAL,
-                    black_female_ownership_percent REAL,
-                    bbee_compliant BOOLEAN,
-                    cipc_cor_documents TEXT,
-                    tax_certificate TEXT,
-                    fuel_products_offered TEXT,
-                    product_service_type TEXT,
-                    geographical_network TEXT,
-                    delivery_types_offered TEXT,
-                    method_of_sourcing TEXT,
-                    invest_in_refuelling_equipment TEXT,
-                    reciprocal_business TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Create depots table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS depots (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL UNIQUE,
-                    annual_volume REAL,
-                    country TEXT,
-                    town TEXT,
-                    lats REAL,
-                    longs REAL,
-                    fuel_zone TEXT,
-                    tankage_size REAL,
-                    number_of_pumps INTEGER,
-                    equipment_value REAL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Create supplier_submissions table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS supplier_submissions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    supplier_id INTEGER NOT NULL,
-                    depot_id INTEGER NOT NULL,
-                    coc_rebate REAL,
-                    cost_of_collection REAL,
-                    del_rebate REAL,
-                    zone_differential REAL NOT NULL,
-                    distance_km REAL,
-                    status TEXT DEFAULT 'pending',
-                    submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    approved_at TIMESTAMP,
-                    approved_by TEXT,
-                    FOREIGN KEY (supplier_id) REFERENCES suppliers (id),
-                    FOREIGN KEY (depot_id) REFERENCES depots (id),
-                    UNIQUE(supplier_id, depot_id)
-                )
-            """)
-            
-            
-            
-            # Create supplier_evaluations table for PROMETHEE II data (JSON format like depot_evaluations)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS supplier_evaluations (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    supplier_id INTEGER NOT NULL,
-                    participant_name TEXT,
-                    participant_email TEXT,
-                    criteria_scores TEXT NOT NULL,
-                    submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (supplier_id) REFERENCES suppliers (id),
-                    UNIQUE(supplier_id, participant_name)
-                )
-            """)
-            
-            # Create promethee_results table for storing PROMETHEE II results
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS promethee_results (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    supplier_id INTEGER NOT NULL,
-                    positive_flow REAL NOT NULL,
-                    negative_flow REAL NOT NULL,
-                    net_flow REAL NOT NULL,
-                    ranking INTEGER NOT NULL,
-                    confidence_level REAL,
-                    criteria_weights TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (supplier_id) REFERENCES suppliers (id)
-                )
-            """)
-            
-            # Create bwm_weights table for storing BWM weight configurations
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS bwm_weights (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    criteria_names TEXT NOT NULL,
-                    weights TEXT NOT NULL,
-                    best_criterion TEXT NOT NULL,
-                    worst_criterion TEXT NOT NULL,
-                    best_to_others TEXT NOT NULL,
-                    others_to_worst TEXT NOT NULL,
-                    consistency_ratio REAL,
-                    consistency_interpretation TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    created_by TEXT
-                )
-            """)
-            
-            # Create profile scoring configuration table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS profile_scoring_config (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    criteria_name TEXT NOT NULL,
-                    option_value TEXT NOT NULL,
-                    score REAL NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(criteria_name, option_value)
-                )
-            """)
-            
-            # Create unified supplier criteria scores table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS supplier_criteria_scores (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    supplier_id INTEGER NOT NULL,
-                    criterion_name TEXT NOT NULL,
-                    score REAL NOT NULL,
-                    data_source TEXT NOT NULL DEFAULT 'unknown',
-                    score_count INTEGER DEFAULT 1,
-                    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (supplier_id) REFERENCES suppliers (id),
-                    UNIQUE(supplier_id, criterion_name)
-                )
-            """)
-            
-            # Create audit log table for tracking refresh operations
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS unified_scores_audit_log (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    operation_type TEXT NOT NULL,
-                    supplier_id INTEGER,
-                    criteria_affected TEXT,
-                    trigger_source TEXT NOT NULL,
-                    records_affected INTEGER DEFAULT 0,
-                    success BOOLEAN DEFAULT TRUE,
-                    error_message TEXT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            if version >= self.SCHEMA_VERSION:
+                return
+            # One write transaction, re-reading the version inside it in case another process migrated first
+            cursor.execute("BEGIN IMMEDIATE")
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            for target, migration in enumerate(migrations[version:], start=version + 1):
+                migration(cursor)
+                print(f"Database schema migrated to version {target}")
+            cursor.execute(f"PRAGMA user_version = {max(version, self.SCHEMA_VERSION)}")
+            cursor.execute("COMMIT")
+    
+    def _migrate_base_tables(self, cursor):
+        """Version 1: the original tables"""
+        # Create suppliers table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS suppliers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                email TEXT,
+                company_profile TEXT,
+                annual_revenue REAL,
+                number_of_employees INTEGER,
+                "B-BBEE_level" INTEGER,
+                black_ownership_percent REAL,
+                black_female_ownership_percent REAL,
+                bbee_compliant BOOLEAN,
+                cipc_cor_documents TEXT,
+                tax_certificate TEXT,
+                fuel_products_offered TEXT,
+                product_service_type TEXT,
+                geographical_network TEXT,
+                delivery_types_offered TEXT,
+                method_of_sourcing TEXT,
+                invest_in_refuelling_equipment TEXT,
+                reciprocal_business TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # Create depots table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS depots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                annual_volume REAL,
+                country TEXT,
+                town TEXT,
+                lats REAL,
+                longs REAL,
+                fuel_zone TEXT,
+                tankage_size REAL,
+                number_of_pumps INTEGER,
+                equipment_value REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # Create supplier_submissions table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS supplier_submissions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                supplier_id INTEGER NOT NULL,
+                depot_id INTEGER NOT NULL,
+                coc_rebate REAL,
+                cost_of_collection REAL,
+                del_rebate REAL,
+                zone_differential REAL NOT NULL,
+                distance_km REAL,
+                status TEXT DEFAULT 'pending',
+                submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                approved_at TIMESTAMP,
+                approved_by TEXT,
+                FOREIGN KEY (supplier_id) REFERENCES suppliers (id),
+                FOREIGN KEY (depot_id) REFERENCES depots (id),
+                UNIQUE(supplier_id, depot_id)
+            )
+        """)
+        
+        
+        
+        # Create supplier_evaluations table for PROMETHEE II data (JSON format like depot_evaluations)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS supplier_evaluations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                supplier_id INTEGER NOT NULL,
+                participant_name TEXT,
+                participant_email TEXT,
+                criteria_scores TEXT NOT NULL,
+                submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (supplier_id) REFERENCES suppliers (id),
+                UNIQUE(supplier_id, participant_name)
+            )
+        """)
+        
+        # Create promethee_results table for storing PROMETHEE II results
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS promethee_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                supplier_id INTEGER NOT NULL,
+                positive_flow REAL NOT NULL,
+                negative_flow REAL NOT NULL,
+                net_flow REAL NOT NULL,
+                ranking INTEGER NOT NULL,
+                confidence_level REAL,
+                criteria_weights TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (supplier_id) REFERENCES suppliers (id)
+            )
+        """)
+        
+        # Create bwm_weights table for storing BWM weight configurations
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS bwm_weights (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                criteria_names TEXT NOT NULL,
+                weights TEXT NOT NULL,
+                best_criterion TEXT NOT NULL,
+                worst_criterion TEXT NOT NULL,
+                best_to_others TEXT NOT NULL,
+                others_to_worst TEXT NOT NULL,
+                consistency_ratio REAL,
+                consistency_interpretation TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                created_by TEXT
+            )
+        """)
+        
+        # Create profile scoring configuration table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS profile_scoring_config (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                criteria_name TEXT NOT NULL,
+                option_value TEXT NOT NULL,
+                score REAL NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(criteria_name, option_value)
+            )
+        """)
+        
+        # Create unified supplier criteria scores table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS supplier_criteria_scores (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                supplier_id INTEGER NOT NULL,
+                criterion_name TEXT NOT NULL,
+                score REAL NOT NULL,
+                data_source TEXT NOT NULL DEFAULT 'unknown',
+                score_count INTEGER DEFAULT 1,
+                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (supplier_id) REFERENCES suppliers (id),
+                UNIQUE(supplier_id, criterion_name)
+            )
+        """)
+        
+        # Create audit log table for tracking refresh operations
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS unified_scores_audit_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                operation_type TEXT NOT NULL,
+                supplier_id INTEGER,
+                criteria_affected TEXT,
+                trigger_source TEXT NOT NULL,
+                records_affected INTEGER DEFAULT 0,
+                success BOOLEAN DEFAULT TRUE,
+                error_message TEXT,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+    
+    def _migrate_promethee_runs(self, cursor):
+        """Version 2: PROMETHEE run headers and the run_id link from result rows"""
+        # One header row per PROMETHEE II calculation; result rows point at it through run_id
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS promethee_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                params_hash TEXT NOT NULL,
+                criteria_weights TEXT,
+                parameters TEXT,
+                supplier_count INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # Databases created before runs existed lack the run_id column
+        cursor.execute("PRAGMA table_info(promethee_results)")
+        if 'run_id' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE promethee_results ADD COLUMN run_id INTEGER REFERENCES promethee_runs (id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_promethee_results_run ON promethee_results (run_id, ranking)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_promethee_runs_params ON promethee_runs (params_hash, id)")
+    
+    def _migrate_data_versions(self, cursor):
+        """Version 3: data_versions counters and the triggers maintaining them"""
+        # Version counters bumped by triggers on every write to the tables PROMETHEE inputs come from,
+        # whichever code path (or process) writes them; caches key on these versions
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS data_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        for table in self.VERSIONED_TABLES:
+            self._migrate_version_counter(cursor, table)
+    
+    @staticmethod
+    def _migrate_version_counter(cursor, table: str):
+        cursor.execute("INSERT OR IGNORE INTO data_versions (name, version) VALUES (?, 0)", (table,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_version
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE data_versions SET version = version + 1 WHERE name = '{table}';
+                END
             """)
-            
-            conn.commit()
     
+    def _migrate_query_indexes(self, cursor):
+        """Version 4: secondary indexes for the submission, unified score and audit log reads"""
+        # Status listings (admin screens) ordered by submission time, without a sort step
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_submissions_status ON supplier_submissions (status, submitted_at)")
+        # Per-supplier status filters and bulk approve/reject
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_submissions_supplier_status
+            ON supplier_submissions (supplier_id, status, submitted_at)
+        """)
+        # Covers the optimizer export: approved rows in depot/supplier order with every exported column
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_submissions_export
+            ON supplier_submissions (status, depot_id, supplier_id, coc_rebate, cost_of_collection,
+                                     del_rebate, zone_differential, distance_km)
+        """)
+        # Covers get_unified_supplier_scores (criterion_name IN (...)); the UNIQUE index leads with supplier_id
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_criteria_scores_criterion
+            ON supplier_criteria_scores (criterion_name, supplier_id, score, data_source, score_count)
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_log_timestamp ON unified_scores_audit_log (timestamp)")
+    
+    def _migrate_evaluation_scores(self, cursor):
+        """Version 5: one row per evaluated criterion, kept in sync with supplier_evaluations.criteria_scores"""
+        # The JSON column stays the record of what was submitted; this long form is what gets aggregated
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS supplier_evaluation_scores (
+                evaluation_id INTEGER NOT NULL,
+                supplier_id INTEGER NOT NULL,
+                criterion_name TEXT NOT NULL,
+                score REAL NOT NULL,
+                FOREIGN KEY (evaluation_id) REFERENCES supplier_evaluations (id),
+                FOREIGN KEY (supplier_id) REFERENCES suppliers (id)
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_evaluation_scores_criterion
+            ON supplier_evaluation_scores (criterion_name, supplier_id, score)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_evaluation_scores_supplier
+            ON supplier_evaluation_scores (supplier_id, criterion_name, score)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_evaluation_scores_evaluation
+            ON supplier_evaluation_scores (evaluation_id)
+        """)
+        
+        # Numeric JSON entries of an evaluation, criterion names trimmed as the survey matching did
+        explode = """
+            INSERT INTO supplier_evaluation_scores (evaluation_id, supplier_id, criterion_name, score)
+            SELECT {row}.id, {row}.supplier_id, trim(scores.key), scores.value
+            FROM json_each(CASE WHEN json_valid({row}.criteria_scores) THEN {row}.criteria_scores ELSE '{{}}' END) AS scores
+            WHERE scores.type IN ('integer', 'real')
+        """
+        # Triggers keep the long form in step whichever code path writes the JSON. INSERT OR REPLACE
+        # deletes the replaced row without firing DELETE triggers, so inserts also drop the supplier's
+        # rows whose evaluation no longer exists.
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_supplier_evaluations_insert_scores
+            AFTER INSERT ON supplier_evaluations
+            BEGIN
+                DELETE FROM supplier_evaluation_scores
+                WHERE supplier_id = NEW.supplier_id
+                  AND evaluation_id NOT IN (SELECT id FROM supplier_evaluations WHERE supplier_id = NEW.supplier_id);
+                {explode.format(row='NEW')};
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_supplier_evaluations_update_scores
+            AFTER UPDATE OF criteria_scores, supplier_id ON supplier_evaluations
+            BEGIN
+                DELETE FROM supplier_evaluation_scores WHERE evaluation_id = OLD.id;
+                {explode.format(row='NEW')};
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_supplier_evaluations_delete_scores
+            AFTER DELETE ON supplier_evaluations
+            BEGIN
+                DELETE FROM supplier_evaluation_scores WHERE evaluation_id = OLD.id;
+            END
+        """)
+        
+        # Backfill evaluations submitted before this table existed
+        cursor.execute("DELETE FROM supplier_evaluation_scores")
+        cursor.execute(explode.format(row='supplier_evaluations').replace(
+            "FROM json_each", "FROM supplier_evaluations, json_each"))
+    
+    def _migrate_config_versions(self, cursor):
+        """Version 6: data_versions counter for profile_scoring_config (keys the reference data cache)"""
+        self._migrate_version_counter(cursor, 'profile_scoring_config')
+    
+    def _migrate_audit_supplier_ids(self, cursor):
+        """Version 7: suppliers covered by a batch refresh audit entry (JSON list)"""
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(unified_scores_audit_log)")}
+        if 'supplier_ids' not in columns:
+            cursor.execute("ALTER TABLE unified_scores_audit_log ADD COLUMN supplier_ids TEXT")
+    
+    def explain_query_plan(self, query: str, params: tuple = ()) -> List[str]:
+        """SQLite's EXPLAIN QUERY PLAN steps for a query (e.g. 'SEARCH s USING INDEX ...')"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("EXPLAIN QUERY PLAN " + query, params)
+            return [row[3] for row in cursor.fetchall()]
+
+    def get_data_versions(self) -> Dict[str, int]:
+        """Current write counters of the versioned tables ({table: version})"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name, version FROM data_versions")
+            return dict(cursor.fetchall())
+    
+    def _cached_reference_data(self, table: str, load):
+        """
+        load(conn)'s result for a rarely written table, from the reference data cache while the
+        table's data version is unchanged.
+        
+        Args:
+            table: Versioned table the data is read from
+            load: Reads the data from a connection
+        
+        Returns:
+            A copy of the cached value, or the freshly loaded one
+        """
+        version_query = "SELECT version FROM data_versions WHERE name = ?"
+        with self.get_connection() as conn:
+            row = conn.execute(version_query, (table,)).fetchone()
+            if row is None:
+                return load(conn)
+            version = row[0]
+            found, value = self._reference_cache.get(table, version)
+            if found:
+                return value
+            cache = self._reference_cache
+            if on_writer_thread():
+                # Possibly this transaction's own, uncommitted write: only cache it once committed
+                value = load(conn)
+                after_commit(lambda: cache.put(table, version, value))
+                return value
+            if conn.in_transaction:
+                return load(conn)
+            # Version and data from one read transaction: as separate autocommit statements a write
+            # committed in between would file its data under the version before it
+            conn.execute("BEGIN")
+            try:
+                row = conn.execute(version_query, (table,)).fetchone()
+                value = load(conn)
+            finally:
+                conn.execute("COMMIT")
+            if row is not None:
+                cache.put(table, row[0], value)
+            return value
+    
+    def reference_cache_stats(self) -> Dict[str, Any]:
+        """Hits/misses of the profile scoring config and BWM weights cache, and the cached versions"""
+        return self._reference_cache.stats()
+    
+    @write_operation
     def add_supplier(self, name: str, email: str = None) -> int:
         """Add a new supplier and return the ID"""
         with self.get_connection() as conn:
@@ -309,29 +740,12 @@ class SupplierDatabase:
             )
             supplier_id = cursor.lastrowid
             
-            # Create initial unified scores for new supplier (non-blocking)
-            try:
-                bwm_data = self.get_latest_bwm_weights()
-                if bwm_data:
-                    # Use threading to make this non-blocking
-                    import threading
-                    def refresh_in_background():
-                        try:
-                            self.refresh_unified_scores_for_supplier(supplier_id, bwm_data['criteria_names'], "supplier_creation")
-                            print(f"Event-driven refresh: New supplier {supplier_id} created, initial unified scores added")
-                        except Exception as e:
-                            print(f"Background refresh warning: Failed to create initial unified scores for new supplier {supplier_id}: {e}")
-                    
-                    thread = threading.Thread(target=refresh_in_background, daemon=True)
-                    thread.start()
-                else:
-                    print(f"Warning: No BWM weights found for initial unified scores creation for supplier {supplier_id}")
-            except Exception as e:
-                # Don't fail the supplier creation if unified scores creation fails
-                print(f"Warning: Failed to create initial unified scores for new supplier {supplier_id}: {e}")
+            # Create initial unified scores for new supplier (background worker, non-blocking)
+            self.refresh_worker.enqueue([supplier_id], "supplier_creation")
             
             return supplier_id
     
+    @write_operation
     def update_supplier_profile(self, supplier_id: int, profile_data: Dict) -> bool:
         """Update supplier profile information"""
         with self.get_connection() as conn:
@@ -379,29 +793,11 @@ class SupplierDatabase:
             
             # Trigger unified table refresh for this supplier after successful profile update (non-blocking)
             if success:
-                try:
-                    # Get current BWM criteria names to refresh properly
-                    bwm_data = self.get_latest_bwm_weights()
-                    if bwm_data:
-                        # Use threading to make this non-blocking
-                        import threading
-                        def refresh_in_background():
-                            try:
-                                self.refresh_unified_scores_for_supplier(supplier_id, bwm_data['criteria_names'], "profile_update")
-                                print(f"Event-driven refresh: Supplier {supplier_id} profile updated, unified scores refreshed")
-                            except Exception as e:
-                                print(f"Background refresh warning: Failed to refresh unified scores for supplier {supplier_id} after profile update: {e}")
-                        
-                        thread = threading.Thread(target=refresh_in_background, daemon=True)
-                        thread.start()
-                    else:
-                        print(f"Warning: No BWM weights found for unified scores refresh after supplier {supplier_id} profile update")
-                except Exception as e:
-                    # Don't fail the profile update if refresh fails, but log the issue
-                    print(f"Warning: Failed to refresh unified scores for supplier {supplier_id} after profile update: {e}")
+                self.refresh_worker.enqueue([supplier_id], "profile_update")
             
             return success
     
+    @write_operation
     def add_depot(self, name: str, annual_volume: float = None, country: str = None, 
                   town: str = None, lats: float = None, longs: float = None, 
                   fuel_zone: str = None, tankage_size: float = None, 
@@ -473,6 +869,7 @@ class SupplierDatabase:
                       "fuel_zone", "tankage_size", "number_of_pumps", "equipment_value"]
             return [dict(zip(columns, row)) for row in cursor.fetchall()]
     
+    @write_operation
     def submit_supplier_data(self, supplier_id: int, depot_id: int, data: Dict) -> int:
         """Submit supplier data for a specific depot"""
         with self.get_connection() as conn:
@@ -526,6 +923,7 @@ class SupplierDatabase:
             columns = [desc[0] for desc in cursor.description]
             return [dict(zip(columns, row)) for row in cursor.fetchall()]
     
+    @write_operation
     def approve_submission(self, submission_id: int, approved_by: str) -> bool:
         """Approve a supplier submission"""
         with self.get_connection() as conn:
@@ -560,6 +958,7 @@ class SupplierDatabase:
             """, (approved_by, submission_id))
             return cursor.rowcount > 0
     
+    @write_operation
     def reject_submission(self, submission_id: int, rejected_by: str) -> bool:
         """Reject a supplier submission"""
         with self.get_connection() as conn:
@@ -571,6 +970,7 @@ class SupplierDatabase:
             """, (rejected_by, submission_id))
             return cursor.rowcount > 0
     
+    @write_operation
     def bulk_approve_supplier_submissions(self, supplier_id: int, approved_by: str) -> bool:
         """Approve all pending submissions for a supplier"""
         with self.get_connection() as conn:
@@ -582,6 +982,7 @@ class SupplierDatabase:
             """, (approved_by, supplier_id))
             return cursor.rowcount > 0
     
+    @write_operation
     def bulk_reject_supplier_submissions(self, supplier_id: int, rejected_by: str) -> bool:
         """Reject all pending submissions for a supplier"""
         with self.get_connection() as conn:
@@ -596,7 +997,23 @@ class SupplierDatabase:
     def get_submissions_by_status(self, status: str) -> List[Dict]:
         """Get submissions by status"""
         return self.get_supplier_submissions(status=status)
-    
+
+    def get_submissions_by_ids(self, submission_ids: List[int]) -> List[Dict]:
+        """Get specific submissions by ID"""
+        if not submission_ids:
+            return []
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            placeholders = ','.join(['?' for _ in submission_ids])
+            cursor.execute(f"""
+                SELECT id, supplier_id, depot_id, coc_rebate, cost_of_collection,
+                       del_rebate, zone_differential, distance_km, status
+                FROM supplier_submissions
+                WHERE id IN ({placeholders})
+            """, list(submission_ids))
+            columns = [desc[0] for desc in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
     
     
     def export_to_optimizer_format(self) -> Dict[str, pd.DataFrame]:
@@ -614,7 +1031,7 @@ class SupplierDatabase:
                 JOIN suppliers s ON ss.supplier_id = s.id
                 JOIN depots d ON ss.depot_id = d.id
                 WHERE ss.status = 'approved'
-                ORDER BY d.id, ss.supplier_id
+                ORDER BY ss.depot_id, ss.supplier_id
             """
             obj1_df = pd.read_sql_query(obj1_query, conn)
             
@@ -701,6 +1118,7 @@ class SupplierDatabase:
     
     
     
+    @write_operation
     def submit_single_supplier_evaluation(self, supplier_id: int, criterion_name: str, score: float,
                                          participant_name: str = None, participant_email: str = None) -> int:
         """Submit a single criterion evaluation for a supplier"""
@@ -726,6 +1144,7 @@ class SupplierDatabase:
             
             return evaluation_id
 
+    @write_operation
     def submit_supplier_evaluation(self, supplier_id: int, criteria_scores: Dict[str, float], 
                                    participant_name: str = None, participant_email: str = None) -> int:
         """Submit a supplier evaluation with all criteria scores as JSON"""
@@ -759,6 +1178,7 @@ class SupplierDatabase:
         
         return evaluation_id
     
+    @write_operation
     def submit_supplier_evaluations_batch(self, evaluations: List[Dict], participant_name: str, participant_email: str) -> List[int]:
         """Submit multiple supplier evaluations at once with proper transaction isolation"""
         
@@ -810,31 +1230,8 @@ class SupplierDatabase:
         return evaluation_ids
     
     def _refresh_unified_scores_batch_async(self, supplier_ids: List[int]):
-        """Refresh unified scores for multiple suppliers asynchronously to prevent blocking"""
-        def refresh_batch_in_background():
-            try:
-                bwm_data = self.get_latest_bwm_weights()
-                if not bwm_data:
-                    print("Warning: No BWM weights found for unified scores refresh")
-                    return
-                
-                for supplier_id in supplier_ids:
-                    try:
-                        # Each refresh gets its own independent transaction
-                        self.refresh_unified_scores_for_supplier(supplier_id, bwm_data['criteria_names'], "batch_evaluation_submission")
-                    except Exception as e:
-                        # Log but don't fail other refreshes
-                        print(f"Warning: Failed to refresh unified scores for supplier {supplier_id}: {e}")
-                        
-                print(f"Background batch refresh completed for {len(supplier_ids)} suppliers")
-                
-            except Exception as e:
-                print(f"Error in background batch refresh: {e}")
-        
-        # Run refresh in background thread to avoid blocking the main response
-        import threading
-        thread = threading.Thread(target=refresh_batch_in_background, daemon=True)
-        thread.start()
+        """Queue unified scores refreshes for multiple suppliers on the background worker"""
+        self.refresh_worker.enqueue(supplier_ids, "batch_evaluation_submission")
     
     def get_supplier_evaluations(self, supplier_id: int = None) -> List[Dict]:
         """Get supplier evaluations with optional filtering"""
@@ -1003,61 +1400,52 @@ class SupplierDatabase:
         
         return result
     
-    def _get_survey_scores(self, criteria_names: List[str]) -> Dict[int, Dict[str, Dict]]:
-        """Get aggregated survey scores from supplier evaluations"""
+    def _survey_score_aggregates(self, criteria_names: List[str], supplier_ids: List[int] = None) -> List[tuple]:
+        """
+        Average survey score and evaluation count per supplier and criterion, in one GROUP BY
+        
+        Args:
+            criteria_names: Criteria to include; matched ignoring surrounding spaces
+            supplier_ids: Restrict to these suppliers (all suppliers if None)
+        
+        Returns:
+            list: (supplier_id, criterion name as given in criteria_names, average, count) tuples
+        """
+        # Stored names are trimmed; map them back to the caller's spelling (first match wins)
+        requested = {}
+        for criteria_name in criteria_names:
+            requested.setdefault(criteria_name.strip(), criteria_name)
+        if not requested:
+            return []
+        
+        placeholders = ','.join('?' for _ in requested)
+        query = f"""
+            SELECT supplier_id, criterion_name, AVG(score), COUNT(*)
+            FROM supplier_evaluation_scores
+            WHERE criterion_name IN ({placeholders})
+        """
+        params = list(requested)
+        if supplier_ids is not None:
+            query += f" AND supplier_id IN ({','.join('?' for _ in supplier_ids)})"
+            params += list(supplier_ids)
+        query += " GROUP BY supplier_id, criterion_name"
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            
-            # Get all evaluations with JSON criteria scores
-            cursor.execute("""
-                SELECT supplier_id, criteria_scores
-                FROM supplier_evaluations
-            """)
-            
-            # Initialize result structure
-            result = {}
-            
-            for row in cursor.fetchall():
-                supplier_id, criteria_scores_json = row
-                criteria_scores = json.loads(criteria_scores_json)
-                
-                if supplier_id not in result:
-                    result[supplier_id] = {}
-                
-                # Process each criterion from the JSON
-                for criterion_name, score in criteria_scores.items():
-                    # Find matching criterion name in the criteria_names list (may have spaces)
-                    matched_criterion = None
-                    for criteria_name in criteria_names:
-                        if criteria_name.strip() == criterion_name.strip():
-                            matched_criterion = criteria_name
-                            break
-                    
-                    if matched_criterion:
-                        if matched_criterion not in result[supplier_id]:
-                            result[supplier_id][matched_criterion] = {
-                                'scores': [],
-                                'evaluations_count': 0
-                            }
-                        
-                        result[supplier_id][matched_criterion]['scores'].append(score)
-                        result[supplier_id][matched_criterion]['evaluations_count'] += 1
-            
-            # Calculate averages and confidence for survey scores
-            for supplier_id in result:
-                for criterion_name in result[supplier_id]:
-                    scores = result[supplier_id][criterion_name]['scores']
-                    avg_score = sum(scores) / len(scores)
-                    count = len(scores)
-                    
-                    result[supplier_id][criterion_name] = {
-                        'score': avg_score,
-                        'evaluations_count': count,
-                        'confidence': count,  # Show number of evaluations
-                        'source': 'survey'
-                    }
-            
-            return result
+            cursor.execute(query, params)
+            return [(row[0], requested[row[1]], row[2], row[3]) for row in cursor.fetchall()]
+    
+    def _get_survey_scores(self, criteria_names: List[str]) -> Dict[int, Dict[str, Dict]]:
+        """Get aggregated survey scores from supplier evaluations"""
+        result = {}
+        for supplier_id, criterion_name, avg_score, count in self._survey_score_aggregates(criteria_names):
+            result.setdefault(supplier_id, {})[criterion_name] = {
+                'score': avg_score,
+                'evaluations_count': count,
+                'confidence': count,  # Show number of evaluations
+                'source': 'survey'
+            }
+        return result
     
     def calculate_threshold_recommendations(self, criteria_names: List[str]) -> Dict[str, Dict]:
         """Calculate intelligent threshold recommendations for PROMETHEE II based on actual data"""
@@ -1245,6 +1633,7 @@ class SupplierDatabase:
             
             return result
     
+    @write_operation
     def clear_supplier_evaluations(self) -> Dict:
         """Clear all supplier evaluations and return count of cleared records"""
         with self.get_connection() as conn:
@@ -1277,6 +1666,7 @@ class SupplierDatabase:
                 "cleared_count": count_before
             }
     
+    @write_operation
     def clear_bwm_weights(self) -> Dict:
         """Clear all BWM weights and return count of cleared records"""
         with self.get_connection() as conn:
@@ -1307,6 +1697,7 @@ class SupplierDatabase:
                 "cleared_count": count_before
             }
     
+    @write_operation
     def clear_unified_criteria_scores(self) -> Dict:
         """Clear all supplier criteria scores from unified table and return count of cleared records"""
         with self.get_connection() as conn:
@@ -1337,6 +1728,7 @@ class SupplierDatabase:
                 "cleared_count": count_before
             }
     
+    @write_operation
     def delete_supplier_evaluation(self, evaluation_id: int) -> Dict[str, Any]:
         """Delete a specific supplier evaluation"""
         with self.get_connection() as conn:
@@ -1371,6 +1763,7 @@ class SupplierDatabase:
                 "message": "Supplier evaluation deleted successfully"
             }
     
+    @write_operation
     def save_profile_scoring_config(self, config_data: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
         """Save profile scoring configuration to database"""
         with self.get_connection() as conn:
@@ -1389,6 +1782,8 @@ class SupplierDatabase:
                     """, (criteria_name, option_value, float(score)))
             
             conn.commit()
+            # Write-through: readers get the new configuration from the cache once this commits
+            self.get_profile_scoring_config()
             
             # Trigger full re-migration after scoring configuration changes
             # All existing suppliers need to be re-evaluated with the new scoring rules
@@ -1410,23 +1805,26 @@ class SupplierDatabase:
             }
     
     def get_profile_scoring_config(self) -> Dict[str, Dict[str, float]]:
-        """Get profile scoring configuration from database"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT criteria_name, option_value, score 
-                FROM profile_scoring_config 
-                ORDER BY criteria_name, option_value
-            """)
-            
-            config = {}
-            for row in cursor.fetchall():
-                criteria_name, option_value, score = row
-                if criteria_name not in config:
-                    config[criteria_name] = {}
-                config[criteria_name][option_value] = float(score)
-            
-            return config
+        """Get profile scoring configuration (cached until profile_scoring_config is written)"""
+        return self._cached_reference_data('profile_scoring_config', self._load_profile_scoring_config)
+    
+    @staticmethod
+    def _load_profile_scoring_config(conn: sqlite3.Connection) -> Dict[str, Dict[str, float]]:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT criteria_name, option_value, score 
+            FROM profile_scoring_config 
+            ORDER BY criteria_name, option_value
+        """)
+        
+        config = {}
+        for row in cursor.fetchall():
+            criteria_name, option_value, score = row
+            if criteria_name not in config:
+                config[criteria_name] = {}
+            config[criteria_name][option_value] = float(score)
+        
+        return config
     
     def get_supplier_profile_scores(self, supplier_id: int) -> Dict[str, float]:
         """Calculate numerical scores for a supplier's profile based on configuration"""
@@ -1466,6 +1864,7 @@ class SupplierDatabase:
             
             return profile_scores
     
+    @write_operation
     def save_promethee_results(self, supplier_id: int, positive_flow: float, negative_flow: float,
                               net_flow: float, ranking: int, confidence_level: float,
                               criteria_weights: str) -> int:
@@ -1479,22 +1878,118 @@ class SupplierDatabase:
             """, (supplier_id, positive_flow, negative_flow, net_flow, ranking, confidence_level, criteria_weights))
             return cursor.lastrowid
     
-    def get_promethee_results(self) -> List[Dict]:
-        """Get PROMETHEE II results"""
+    @staticmethod
+    def promethee_params_hash(criteria_weights: Dict[str, float], parameters: Dict[str, Any] = None) -> str:
+        """Stable hash of the weights and preference parameters of a PROMETHEE II run"""
+        payload = json.dumps({'criteria_weights': criteria_weights, 'parameters': parameters or {}},
+                             sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()
+    
+    @write_operation
+    def save_promethee_run(self, suppliers: List[int], positive_flows: List[float], negative_flows: List[float],
+                           net_flows: List[float], ranking: List[int], confidence_levels: List[float],
+                           criteria_weights: Dict[str, float], parameters: Dict[str, Any] = None) -> int:
+        """
+        Save a complete PROMETHEE II run: one header row plus all supplier rows in one transaction
+        
+        Args:
+            suppliers: Supplier ids, in the order of the flow lists
+            ranking: Supplier indices, best first (as returned by calculate_promethee_ii)
+            confidence_levels: Average confidence per supplier, in supplier order
+            criteria_weights: {criterion: weight}
+            parameters: Preference functions and thresholds (stored and hashed with the weights)
+        
+        Returns:
+            int: The new run id
+        """
+        # 1-based rank of every supplier index in one pass
+        ranks = [0] * len(suppliers)
+        for position, index in enumerate(ranking):
+            ranks[index] = position + 1
+        weights_json = json.dumps(criteria_weights)
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            # Connections are in autocommit mode; group header and rows explicitly (the writer
+            # thread already runs every write inside a transaction)
+            own_transaction = not conn.in_transaction
+            if own_transaction:
+                cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("""
+                INSERT INTO promethee_runs (params_hash, criteria_weights, parameters, supplier_count)
+                VALUES (?, ?, ?, ?)
+            """, (self.promethee_params_hash(criteria_weights, parameters), weights_json,
+                  json.dumps(parameters or {}), len(suppliers)))
+            run_id = cursor.lastrowid
+            
+            cursor.executemany("""
+                INSERT INTO promethee_results 
+                (run_id, supplier_id, positive_flow, negative_flow, net_flow, ranking, confidence_level, criteria_weights)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (run_id, supplier_id, float(positive_flows[i]), float(negative_flows[i]), float(net_flows[i]),
+                 ranks[i], float(confidence_levels[i]), weights_json)
+                for i, supplier_id in enumerate(suppliers)
+            ])
+            if own_transaction:
+                cursor.execute("COMMIT")
+            return run_id
+    
+    def get_promethee_runs(self, limit: int = 20) -> List[Dict]:
+        """Most recent PROMETHEE II run headers, newest first"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT pr.supplier_id, s.name as supplier_name,
-                       pr.positive_flow, pr.negative_flow, pr.net_flow,
-                       pr.ranking, pr.confidence_level, pr.criteria_weights,
-                       pr.created_at
-                FROM promethee_results pr
-                JOIN suppliers s ON pr.supplier_id = s.id
-                ORDER BY pr.ranking
-            """)
+                SELECT id as run_id, params_hash, criteria_weights, parameters, supplier_count, created_at
+                FROM promethee_runs
+                ORDER BY id DESC
+                LIMIT ?
+            """, (limit,))
+            columns = [desc[0] for desc in cursor.description]
+            runs = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            for run in runs:
+                run['criteria_weights'] = json.loads(run['criteria_weights']) if run['criteria_weights'] else {}
+                run['parameters'] = json.loads(run['parameters']) if run['parameters'] else {}
+            return runs
+    
+    def get_promethee_results(self, run_id: int = None) -> List[Dict]:
+        """
+        Get PROMETHEE II results of one run (the latest when run_id is None)
+        
+        Databases without any run fall back to the rows saved before runs existed.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if run_id is None:
+                cursor.execute("SELECT MAX(id) FROM promethee_runs")
+                run_id = cursor.fetchone()[0]
+            
+            if run_id is None:
+                cursor.execute("""
+                    SELECT pr.supplier_id, s.name as supplier_name,
+                           pr.positive_flow, pr.negative_flow, pr.net_flow,
+                           pr.ranking, pr.confidence_level, pr.criteria_weights,
+                           pr.created_at, pr.run_id
+                    FROM promethee_results pr
+                    JOIN suppliers s ON pr.supplier_id = s.id
+                    WHERE pr.run_id IS NULL
+                    ORDER BY pr.ranking
+                """)
+            else:
+                cursor.execute("""
+                    SELECT pr.supplier_id, s.name as supplier_name,
+                           pr.positive_flow, pr.negative_flow, pr.net_flow,
+                           pr.ranking, pr.confidence_level, pr.criteria_weights,
+                           pr.created_at, pr.run_id
+                    FROM promethee_results pr
+                    JOIN suppliers s ON pr.supplier_id = s.id
+                    WHERE pr.run_id = ?
+                    ORDER BY pr.ranking
+                """, (run_id,))
             columns = [desc[0] for desc in cursor.description]
             return [dict(zip(columns, row)) for row in cursor.fetchall()]
     
+    @write_operation
     def cleanup_duplicate_submissions(self) -> Dict:
         """Remove duplicate supplier-depot pairs, keeping the most recent approved submission"""
         with self.get_connection() as conn:
@@ -1569,6 +2064,7 @@ class SupplierDatabase:
                 "participants_participated": participants_participated
             }
     
+    @write_operation
     def save_bwm_weights(self, criteria_names: List[str], weights: Dict[str, float], 
                         best_criterion: str, worst_criterion: str, 
                         best_to_others: Dict[str, float], others_to_worst: Dict[str, float],
@@ -1595,6 +2091,8 @@ class SupplierDatabase:
                 created_by
             ))
             bwm_id = cursor.lastrowid
+            # Write-through: readers get the new weights from the cache once this commits
+            self.get_latest_bwm_weights()
             
             # Trigger full re-migration after BWM weights change
             # Criteria names or weights have changed, need to refresh entire unified table
@@ -1610,95 +2108,167 @@ class SupplierDatabase:
             return bwm_id
     
     def get_latest_bwm_weights(self) -> Optional[Dict]:
-        """Get the most recent BWM weights configuration"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT criteria_names, weights, best_criterion, worst_criterion,
-                       best_to_others, others_to_worst, consistency_ratio,
-                       consistency_interpretation, created_at, created_by
-                FROM bwm_weights
-                ORDER BY created_at DESC
-                LIMIT 1
-            """)
-            row = cursor.fetchone()
-            if row:
-                return {
-                    'criteria_names': json.loads(row[0]),
-                    'weights': json.loads(row[1]),
-                    'best_criterion': row[2],
-                    'worst_criterion': row[3],
-                    'best_to_others': json.loads(row[4]),
-                    'others_to_worst': json.loads(row[5]),
-                    'consistency_ratio': row[6],
-                    'consistency_interpretation': row[7],
-                    'created_at': row[8],
-                    'created_by': row[9]
-                }
-            return None
+        """Get the most recent BWM weights configuration (cached until bwm_weights is written)"""
+        return self._cached_reference_data('bwm_weights', self._load_latest_bwm_weights)
+    
+    @staticmethod
+    def _load_latest_bwm_weights(conn: sqlite3.Connection) -> Optional[Dict]:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT criteria_names, weights, best_criterion, worst_criterion,
+                   best_to_others, others_to_worst, consistency_ratio,
+                   consistency_interpretation, created_at, created_by
+            FROM bwm_weights
+            ORDER BY created_at DESC
+            LIMIT 1
+        """)
+        row = cursor.fetchone()
+        if row:
+            return {
+                'criteria_names': json.loads(row[0]),
+                'weights': json.loads(row[1]),
+                'best_criterion': row[2],
+                'worst_criterion': row[3],
+                'best_to_others': json.loads(row[4]),
+                'others_to_worst': json.loads(row[5]),
+                'consistency_ratio': row[6],
+                'consistency_interpretation': row[7],
+                'created_at': row[8],
+                'created_by': row[9]
+            }
+        return None
     
+    @write_operation
     def migrate_to_unified_criteria_scores(self, criteria_names: List[str]) -> Dict[str, Any]:
         """Migrate existing data to unified supplier_criteria_scores table"""
+        migration_stats = self._rebuild_unified_scores(criteria_names)
+        print(f"Unified scores rebuilt for {migration_stats['suppliers_processed']} suppliers "
+              f"in {migration_stats['timings_ms']['total']:.1f} ms")
+        return {
+            "success": True,
+            "message": "Migration completed successfully",
+            "stats": migration_stats
+        }
+    
+    @write_operation
+    def _rebuild_unified_scores(self, criteria_names: List[str], supplier_ids: List[int] = None) -> Dict[str, Any]:
+        """
+        Recompute supplier_criteria_scores with a few set-based statements in one transaction
+        
+        Profile scores come from one INSERT ... SELECT joining suppliers with profile_scoring_config,
+        survey averages from one GROUP BY (written with executemany, overriding profile scores) and
+        a mid-range default fills every criterion still missing.
+        
+        Args:
+            criteria_names: BWM criteria to populate
+            supplier_ids: Only rebuild these suppliers' rows (all suppliers if None)
+        
+        Returns:
+            dict: suppliers processed, rows added per source and timings in milliseconds
+        """
+        criteria_names = list(dict.fromkeys(criteria_names))
+        supplier_params = [] if supplier_ids is None else list(dict.fromkeys(supplier_ids))
+        supplier_in = f"IN ({','.join('?' for _ in supplier_params)})"
+        supplier_filter = "" if supplier_ids is None else f" WHERE s.id {supplier_in}"
+        timings = {}
+        started = time.perf_counter()
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            
-            # Clear existing unified scores
-            cursor.execute("DELETE FROM supplier_criteria_scores")
-            
-            # Get all suppliers
-            cursor.execute("SELECT id FROM suppliers")
-            supplier_ids = [row[0] for row in cursor.fetchall()]
-            
-            migration_stats = {
-                "suppliers_processed": 0,
-                "profile_scores_added": 0,
-                "survey_scores_added": 0,
-                "default_scores_added": 0
-            }
-            
-            for supplier_id in supplier_ids:
-                migration_stats["suppliers_processed"] += 1
+            # Inside a running write (the writer's transaction) a savepoint: callers that log a failed
+            # refresh and carry on must not commit its DELETE without the rows that replace it
+            own_transaction = not conn.in_transaction
+            cursor.execute("BEGIN IMMEDIATE" if own_transaction else "SAVEPOINT rebuild_unified_scores")
+            try:
+                if supplier_ids is None:
+                    cursor.execute("DELETE FROM supplier_criteria_scores")
+                else:
+                    cursor.execute(f"DELETE FROM supplier_criteria_scores WHERE supplier_id {supplier_in}",
+                                   supplier_params)
+                cursor.execute("SELECT COUNT(*) FROM suppliers s" + supplier_filter, supplier_params)
+                suppliers_processed = cursor.fetchone()[0]
+                timings['clear'] = (time.perf_counter() - started) * 1000
                 
-                # Populate profile scores
-                profile_scores = self._get_profile_scores_for_supplier(supplier_id, criteria_names)
-                for criterion_name, score_data in profile_scores.items():
+                # Profile criteria: one SELECT per mapped column, matched against the scoring configuration
+                step = time.perf_counter()
+                selects, params = [], []
+                for criterion_name in criteria_names:
+                    if criterion_name not in self.PROFILE_CRITERIA:
+                        continue
+                    config_name, column = self.PROFILE_CRITERIA[criterion_name]
+                    value = f"s.{column}"
+                    if config_name == 'B-BBEE Level':
+                        # Integer levels are configured as "Level 1" .. "Level 4" and "Level 5+"
+                        value = f"""CASE WHEN typeof(s.{column}) IN ('integer', 'real')
+                                         THEN CASE WHEN s.{column} >= 5 THEN 'Level 5+'
+                                                   ELSE 'Level ' || CAST(s.{column} AS INTEGER) END
+                                         ELSE s.{column} END"""
+                    selects.append(f"""
+                        SELECT s.id, ?, c.score, 'profile', 1, CURRENT_TIMESTAMP
+                        FROM suppliers s
+                        JOIN profile_scoring_config c ON c.criteria_name = ? AND c.option_value = {value}
+                    """ + supplier_filter)
+                    params += [criterion_name, config_name] + supplier_params
+                profile_added = 0
+                if selects:
                     cursor.execute("""
-                        INSERT OR REPLACE INTO supplier_criteria_scores 
+                        INSERT OR REPLACE INTO supplier_criteria_scores
                         (supplier_id, criterion_name, score, data_source, score_count, last_updated)
-                        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                    """, (supplier_id, criterion_name, score_data['score'], 'profile', 1))
-                    migration_stats["profile_scores_added"] += 1
+                    """ + " UNION ALL ".join(selects), params)
+                    profile_added = cursor.rowcount
+                timings['profile'] = (time.perf_counter() - step) * 1000
                 
-                # Populate survey scores (aggregated)
-                survey_scores = self._get_survey_scores_for_supplier(supplier_id, criteria_names)
-                for criterion_name, score_data in survey_scores.items():
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO supplier_criteria_scores 
+                # Survey averages from the evaluation-score GROUP BY; they override profile scores
+                step = time.perf_counter()
+                cursor.execute("SELECT s.id FROM suppliers s" + supplier_filter, supplier_params)
+                existing = {row[0] for row in cursor.fetchall()}
+                survey_rows = [(sid, criterion_name, round(avg_score, 2), count)
+                               for sid, criterion_name, avg_score, count
+                               in self._survey_score_aggregates(criteria_names, supplier_ids)
+                               if sid in existing]
+                cursor.executemany("""
+                    INSERT OR REPLACE INTO supplier_criteria_scores 
+                    (supplier_id, criterion_name, score, data_source, score_count, last_updated)
+                    VALUES (?, ?, ?, 'survey', ?, CURRENT_TIMESTAMP)
+                """, survey_rows)
+                timings['survey'] = (time.perf_counter() - step) * 1000
+                
+                # Mid-range default (1-10 scale) for every supplier/criterion pair still without a score
+                step = time.perf_counter()
+                default_added = 0
+                if criteria_names:
+                    criteria_values = ", ".join("(?)" for _ in criteria_names)
+                    cursor.execute(f"""
+                        INSERT INTO supplier_criteria_scores
                         (supplier_id, criterion_name, score, data_source, score_count, last_updated)
-                        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                    """, (supplier_id, criterion_name, score_data['score'], 'survey', score_data['count']))
-                    migration_stats["survey_scores_added"] += 1
+                        SELECT s.id, criteria.name, 5.0, 'default', 0, CURRENT_TIMESTAMP
+                        FROM suppliers s
+                        CROSS JOIN (SELECT column1 AS name FROM (VALUES {criteria_values})) AS criteria
+                        {"WHERE" if supplier_ids is None else f"WHERE s.id {supplier_in} AND"} NOT EXISTS (
+                            SELECT 1 FROM supplier_criteria_scores x
+                            WHERE x.supplier_id = s.id AND x.criterion_name = criteria.name
+                        )
+                    """, criteria_names + supplier_params)
+                    default_added = cursor.rowcount
+                timings['default'] = (time.perf_counter() - step) * 1000
                 
-                # Add default scores for missing criteria
-                existing_criteria = set(profile_scores.keys()) | set(survey_scores.keys())
-                for criterion_name in criteria_names:
-                    if criterion_name not in existing_criteria:
-                        # Use a mid-range default score
-                        default_score = 5.0  # Assuming 1-10 scale
-                        cursor.execute("""
-                            INSERT OR REPLACE INTO supplier_criteria_scores 
-                            (supplier_id, criterion_name, score, data_source, score_count, last_updated)
-                            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                        """, (supplier_id, criterion_name, default_score, 'default', 0))
-                        migration_stats["default_scores_added"] += 1
-            
-            conn.commit()
-            
-            return {
-                "success": True,
-                "message": "Migration completed successfully",
-                "stats": migration_stats
-            }
+                cursor.execute("COMMIT" if own_transaction else "RELEASE rebuild_unified_scores")
+            except Exception:
+                if own_transaction and conn.in_transaction:
+                    cursor.execute("ROLLBACK")
+                elif conn.in_transaction:
+                    cursor.execute("ROLLBACK TO rebuild_unified_scores")
+                    cursor.execute("RELEASE rebuild_unified_scores")
+                raise
+        
+        timings['total'] = (time.perf_counter() - started) * 1000
+        return {
+            "suppliers_processed": suppliers_processed,
+            "profile_scores_added": profile_added,
+            "survey_scores_added": len(survey_rows),
+            "default_scores_added": default_added,
+            "timings_ms": {name: round(ms, 3) for name, ms in timings.items()}
+        }
     
     def _get_profile_scores_for_supplier(self, supplier_id: int, criteria_names: List[str]) -> Dict[str, Dict]:
         """Get profile scores for a single supplier"""
@@ -1769,46 +2339,14 @@ class SupplierDatabase:
     
     def _get_survey_scores_for_supplier(self, supplier_id: int, criteria_names: List[str]) -> Dict[str, Dict]:
         """Get aggregated survey scores for a single supplier"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Get all evaluations for this supplier
-            cursor.execute("""
-                SELECT criteria_scores
-                FROM supplier_evaluations
-                WHERE supplier_id = ?
-            """, (supplier_id,))
-            
-            # Aggregate scores
-            aggregated_scores = {}
-            for row in cursor.fetchall():
-                criteria_scores = json.loads(row[0])
-                
-                for criterion_name, score in criteria_scores.items():
-                    # Find matching criterion name in the criteria_names list (may have spaces)
-                    matched_criterion = None
-                    for criteria_name in criteria_names:
-                        if criteria_name.strip() == criterion_name.strip():
-                            matched_criterion = criteria_name
-                            break
-                    
-                    if matched_criterion:
-                        if matched_criterion not in aggregated_scores:
-                            aggregated_scores[matched_criterion] = []
-                        aggregated_scores[matched_criterion].append(float(score))
-            
-            # Calculate averages
-            result = {}
-            for criterion_name, scores in aggregated_scores.items():
-                if scores:  # Only include if there are actual scores
-                    avg_score = sum(scores) / len(scores)
-                    result[criterion_name] = {
-                        'score': round(avg_score, 2),
-                        'count': len(scores),
-                        'source': 'survey'
-                    }
-            
-            return result
+        result = {}
+        for _, criterion_name, avg_score, count in self._survey_score_aggregates(criteria_names, [supplier_id]):
+            result[criterion_name] = {
+                'score': round(avg_score, 2),
+                'count': count,
+                'source': 'survey'
+            }
+        return result
     
     def get_unified_supplier_scores(self, criteria_names: List[str]) -> Dict[int, Dict[str, Dict]]:
         """Get all supplier scores from unified table"""
@@ -1840,6 +2378,7 @@ class SupplierDatabase:
             
             return result
     
+    @write_operation
     def update_supplier_criteria_score(self, supplier_id: int, criterion_name: str, 
                                      score: float, data_source: str = 'manual') -> bool:
         """Update a single supplier criteria score"""
@@ -1867,78 +2406,62 @@ class SupplierDatabase:
             
             return success
     
+    @write_operation
     def refresh_unified_scores_for_supplier(self, supplier_id: int, criteria_names: List[str], 
                                            trigger_source: str = "manual") -> bool:
         """Refresh unified scores for a specific supplier when their data changes"""
         try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Remove existing scores for this supplier
-                cursor.execute("DELETE FROM supplier_criteria_scores WHERE supplier_id = ?", (supplier_id,))
-                
-                # Get fresh profile and survey scores
-                profile_scores = self._get_profile_scores_for_supplier(supplier_id, criteria_names)
-                survey_scores = self._get_survey_scores_for_supplier(supplier_id, criteria_names)
-                
-                records_added = 0
-                
-                # Insert profile scores
-                for criterion_name, score_data in profile_scores.items():
-                    cursor.execute("""
-                        INSERT INTO supplier_criteria_scores 
-                        (supplier_id, criterion_name, score, data_source, score_count, last_updated)
-                        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                    """, (supplier_id, criterion_name, score_data['score'], 'profile', 1))
-                    records_added += 1
-                
-                # Insert survey scores (these override profile scores for the same criteria)
-                for criterion_name, score_data in survey_scores.items():
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO supplier_criteria_scores 
-                        (supplier_id, criterion_name, score, data_source, score_count, last_updated)
-                        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                    """, (supplier_id, criterion_name, score_data['score'], 'survey', score_data['count']))
-                    records_added += 1
-                
-                # Add default scores for missing criteria
-                existing_criteria = set(profile_scores.keys()) | set(survey_scores.keys())
-                for criterion_name in criteria_names:
-                    if criterion_name not in existing_criteria:
-                        cursor.execute("""
-                            INSERT INTO supplier_criteria_scores 
-                            (supplier_id, criterion_name, score, data_source, score_count, last_updated)
-                            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                        """, (supplier_id, criterion_name, 5.0, 'default', 0))
-                        records_added += 1
-                
-                conn.commit()
-                
-                # Log successful operation
-                self._log_unified_scores_operation(
-                    operation_type="supplier_refresh",
-                    trigger_source=trigger_source,
-                    supplier_id=supplier_id,
-                    criteria_affected=criteria_names,
-                    records_affected=records_added,
-                    success=True
-                )
-                
-                return True
-                
+            stats = self._rebuild_unified_scores(criteria_names, [supplier_id])
+            records_added = stats["profile_scores_added"] + stats["survey_scores_added"] + stats["default_scores_added"]
+            
+            # Log successful operation
+            self._log_unified_scores_operation(
+                operation_type="supplier_refresh",
+                trigger_source=trigger_source,
+                supplier_id=supplier_id,
+                criteria_affected=criteria_names,
+                records_affected=records_added,
+                success=True
+            )
+            
+            return True
+            
         except Exception as e:
             # Log failed operation
-            self._log_unified_scores_operation(
+            self._log_unified_scores_failure(
                 operation_type="supplier_refresh",
                 trigger_source=trigger_source,
                 supplier_id=supplier_id,
                 criteria_affected=criteria_names,
-                records_affected=0,
-                success=False,
                 error_message=str(e)
             )
             raise
     
+    @write_operation
+    def refresh_unified_scores_for_suppliers(self, supplier_ids: List[int], criteria_names: List[str],
+                                             trigger_source: str = "manual") -> Dict[str, Any]:
+        """Refresh unified scores for several suppliers in one transaction (one audit log entry)"""
+        try:
+            stats = self._rebuild_unified_scores(criteria_names, supplier_ids)
+        except Exception as e:
+            self._log_unified_scores_failure(
+                operation_type="batch_refresh",
+                trigger_source=trigger_source,
+                criteria_affected=criteria_names,
+                error_message=str(e),
+                supplier_ids=supplier_ids
+            )
+            raise
+        self._log_unified_scores_operation(
+            operation_type="batch_refresh",
+            trigger_source=trigger_source,
+            criteria_affected=criteria_names,
+            records_affected=stats["profile_scores_added"] + stats["survey_scores_added"] + stats["default_scores_added"],
+            success=True,
+            supplier_ids=supplier_ids
+        )
+        return stats
+    
     def ensure_unified_scores_populated(self, criteria_names: List[str]) -> Dict[str, Any]:
         """Ensure unified scores table is populated, migrate if empty"""
         with self.get_connection() as conn:
@@ -1970,23 +2493,36 @@ class SupplierDatabase:
                         "existing_records": count
                     }
     
+    def _log_unified_scores_failure(self, **entry):
+        """
+        Audit a failed refresh so that exactly one row survives: the one written now if the caller
+        handles the error and its write commits, or a copy written by the writer right after the
+        error rolled the whole write back (and the first row with it)
+        """
+        def log():
+            self._log_unified_scores_operation(records_affected=0, success=False, **entry)
+        log()
+        after_rollback(log)
+    
+    @write_operation
     def _log_unified_scores_operation(self, operation_type: str, trigger_source: str, 
                                     supplier_id: int = None, criteria_affected: List[str] = None,
                                     records_affected: int = 0, success: bool = True, 
-                                    error_message: str = None):
-        """Log unified scores refresh operations for audit trail"""
+                                    error_message: str = None, supplier_ids: List[int] = None):
+        """Log unified scores refresh operations for audit trail (supplier_ids: suppliers of a batch)"""
         try:
             with self.get_connection(timeout=10.0, retries=2) as conn:  # Shorter timeout for logging
                 
                 cursor = conn.cursor()
                 cursor.execute("""
                     INSERT INTO unified_scores_audit_log 
-                    (operation_type, supplier_id, criteria_affected, trigger_source, 
+                    (operation_type, supplier_id, supplier_ids, criteria_affected, trigger_source, 
                      records_affected, success, error_message)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
                     operation_type,
                     supplier_id,
+                    json.dumps(list(supplier_ids)) if supplier_ids is not None else None,
                     json.dumps(criteria_affected) if criteria_affected else None,
                     trigger_source,
                     records_affected,
@@ -2009,7 +2545,7 @@ class SupplierDatabase:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT operation_type, supplier_id, criteria_affected, trigger_source,
+                SELECT operation_type, supplier_id, supplier_ids, criteria_affected, trigger_source,
                        records_affected, success, error_message, timestamp
                 FROM unified_scores_audit_log
                 ORDER BY timestamp DESC
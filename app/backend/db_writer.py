@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Single-writer queue for a SQLite database file.
+
+SQLite allows one writer at a time; with every request thread writing on its own connection, the
+losers wait on the file lock and eventually fail with "database is locked". Here all writes run on
+one dedicated thread that owns one connection. Callers submit a write and get a Future; the thread
+takes everything queued, runs it in one transaction (group commit) and resolves the futures once
+that transaction has committed. Readers keep using their own pooled connections.
+"""
+
+import functools
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+
+# Writes committed together in one transaction at most
+DEFAULT_MAX_BATCH = 64
+
+# Writes that may wait in the queue before submit() rejects new ones
+DEFAULT_MAX_QUEUE = 1000
+
+_thread_state = threading.local()
+
+
+def on_writer_thread() -> bool:
+    """True inside a write operation being executed by a writer thread"""
+    return getattr(_thread_state, 'writer', None) is not None
+
+
+def after_commit(callback: Callable[[], None]):
+    """
+    Run callback once the write operation being executed has committed; it is dropped if the
+    operation is rolled back. Outside a writer thread the callback runs right away.
+    """
+    callbacks = getattr(_thread_state, 'after_commit', None)
+    if callbacks is None:
+        callback()
+    else:
+        callbacks.append(callback)
+
+
+def after_rollback(callback: Callable[[], None]):
+    """
+    Run callback right after the write operation being executed (the outermost one queued to the
+    writer) raised and was rolled back; it is dropped if the operation commits. The callback runs
+    on the writer thread in the same batch transaction, in a savepoint of its own, so what it
+    writes survives the rollback (e.g. an audit row of the failure). Outside a writer thread the
+    callback is dropped.
+    """
+    callbacks = getattr(_thread_state, 'after_rollback', None)
+    if callbacks is not None:
+        callbacks.append(callback)
+
+
+class WriterConnection(sqlite3.Connection):
+    """
+    Connection owned by the writer thread. The writer decides when a transaction commits, so
+    commit() calls made by the write operations themselves are no-ops on it.
+    """
+
+    def commit(self):
+        pass
+
+
+class DatabaseWriter:
+    """
+    Queue plus one daemon thread executing write operations against one database file
+
+    Every queued call runs inside its own SAVEPOINT within the batch transaction: a call that raises
+    is rolled back on its own (then its after_rollback callbacks run) and its future gets the
+    exception, the rest of the batch still commits. If SQLite aborts the whole transaction, every
+    write made in it fails; if the COMMIT itself fails every future of the batch gets that error.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], bind: Callable[[sqlite3.Connection], None] = None,
+                 max_batch: int = DEFAULT_MAX_BATCH, max_queue: int = DEFAULT_MAX_QUEUE):
+        """
+        Args:
+            connect: Opens the writer's connection (expected to use WriterConnection as factory)
+            bind: Called on the writer thread with the connection, e.g. to make it the thread's
+                connection for code that asks a pool for one
+            max_batch: Writes per transaction
+            max_queue: Queue length at which submit() raises instead of queueing
+        """
+        self.connection = connect()
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self._bind = bind
+        self._queue = queue.Queue()
+        self._stopping = False
+        self._lock = threading.Lock()
+        self._metrics = {
+            'submitted': 0,
+            'committed': 0,
+            'failed': 0,
+            'rejected': 0,
+            'transactions': 0,
+            'lost_transactions': 0,
+            'max_batch_size': 0,
+            'last_batch_size': 0,
+            'last_batch_ms': 0.0
+        }
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def owns_current_thread(self) -> bool:
+        """True when called from the writer thread itself (nested writes run inline there)"""
+        return threading.current_thread() is self._thread
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        Queue func(*args, **kwargs) for the writer thread
+
+        Returns:
+            Future: Resolved with the call's result after its transaction committed
+        """
+        future = Future()
+        with self._lock:
+            if self._stopping:
+                raise RuntimeError("Database writer is stopped")
+            if self._queue.qsize() >= self.max_queue:
+                self._metrics['rejected'] += 1
+                # Same message as SQLite's own so callers map it to "busy" (503)
+                raise sqlite3.OperationalError(f"database is locked: write queue full ({self.max_queue} pending)")
+            self._metrics['submitted'] += 1
+            self._queue.put((func, args, kwargs, future))
+        return future
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """Run func on the writer and wait for it; inline when already on a writer thread"""
+        if on_writer_thread():
+            return func(*args, **kwargs)
+        return self.submit(func, *args, **kwargs).result()
+
+    def _run(self):
+        _thread_state.writer = self
+        if self._bind is not None:
+            self._bind(self.connection)
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            batch = [job]
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stop = True
+                    break
+                batch.append(job)
+            self._execute(batch)
+            if stop:
+                break
+        self.connection.close()
+
+    def _execute(self, batch):
+        started = time.perf_counter()
+        conn = self.connection
+        outcomes = []
+        committed_callbacks = []
+        try:
+            for func, args, kwargs, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if not conn.in_transaction:
+                    conn.execute("BEGIN IMMEDIATE")
+                    transaction_start = (len(outcomes), len(committed_callbacks))
+                _thread_state.after_rollback = rollback_callbacks = []
+                try:
+                    succeeded, value = self._run_in_savepoint(func, args, kwargs, committed_callbacks)
+                finally:
+                    _thread_state.after_rollback = None
+                outcomes.append((future, value, None) if succeeded else (future, None, value))
+                if not conn.in_transaction:
+                    self._transaction_lost(outcomes, committed_callbacks, transaction_start,
+                                           None if succeeded else value)
+                if succeeded:
+                    continue
+                for callback in rollback_callbacks:
+                    if not conn.in_transaction:
+                        conn.execute("BEGIN IMMEDIATE")
+                        transaction_start = (len(outcomes), len(committed_callbacks))
+                    succeeded, error = self._run_in_savepoint(callback, (), {}, committed_callbacks)
+                    if not succeeded:
+                        print(f"Database writer: after-rollback callback failed: {error}")
+                    if not conn.in_transaction:
+                        self._transaction_lost(outcomes, committed_callbacks, transaction_start,
+                                               None if succeeded else error)
+            if conn.in_transaction:
+                conn.execute("COMMIT")
+        except BaseException as e:
+            # BEGIN or COMMIT failed: nothing of this batch is durable
+            if conn.in_transaction:
+                try:
+                    conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+            print(f"Database writer: batch of {len(batch)} writes failed: {e}")
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            self._record(len(batch), 0, len(batch), started)
+            return
+
+        for callback in committed_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Database writer: after-commit callback failed: {e}")
+        failed = 0
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                failed += 1
+                future.set_exception(error)
+        self._record(len(batch), len(outcomes) - failed, failed, started)
+
+    def _transaction_lost(self, outcomes, committed_callbacks, transaction_start, cause):
+        """
+        SQLite ended the batch transaction by itself: on SQLITE_FULL, SQLITE_IOERR, SQLITE_NOMEM and
+        the like it rolls the whole transaction back, not just the failing statement. Every write run
+        in it since BEGIN fails with the cause, and their after-commit callbacks are dropped; the
+        next write begins a new transaction.
+        """
+        first_outcome, first_callback = transaction_start
+        error = sqlite3.OperationalError(f"Transaction rolled back by SQLite: {cause or 'ended by a write operation'}")
+        error.__cause__ = cause
+        for index in range(first_outcome, len(outcomes)):
+            future, _, outcome_error = outcomes[index]
+            outcomes[index] = (future, None, outcome_error or error)
+        del committed_callbacks[first_callback:]
+        print(f"Database writer: {error}; failing the {len(outcomes) - first_outcome} writes made in it")
+        with self._lock:
+            self._metrics['lost_transactions'] += 1
+
+    def _run_in_savepoint(self, func, args, kwargs, committed_callbacks):
+        """
+        Returns:
+            tuple: (True, result) with func's savepoint released, or (False, exception) with it rolled back
+        """
+        conn = self.connection
+        conn.execute("SAVEPOINT write_operation")
+        _thread_state.after_commit = callbacks = []
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK TO write_operation")
+                conn.execute("RELEASE write_operation")
+            return False, e
+        else:
+            if conn.in_transaction:
+                conn.execute("RELEASE write_operation")
+            committed_callbacks.extend(callbacks)
+            return True, result
+        finally:
+            _thread_state.after_commit = None
+
+    def _record(self, size: int, committed: int, failed: int, started: float):
+        with self._lock:
+            self._metrics['transactions'] += 1
+            self._metrics['committed'] += committed
+            self._metrics['failed'] += failed
+            self._metrics['last_batch_size'] = size
+            self._metrics['max_batch_size'] = max(self._metrics['max_batch_size'], size)
+            self._metrics['last_batch_ms'] = round((time.perf_counter() - started) * 1000, 3)
+
+    def stop(self, timeout: float = 10.0):
+        """Finish the writes already queued, then stop the thread and close the connection"""
+        with self._lock:
+            if self._stopping:
+                return
+            self._stopping = True
+            self._queue.put(None)
+        if not self.owns_current_thread():
+            self._thread.join(timeout)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth plus write/transaction counters (writes per transaction = committed / transactions)"""
+        with self._lock:
+            return dict(self._metrics,
+                        queue_depth=self._queue.qsize(),
+                        running=self._thread.is_alive())
+
+
+def write_operation(method):
+    """
+    Mark a SupplierDatabase method as a write: calls are executed by the database's writer thread
+    and the caller blocks until the write committed. Async callers can submit the method to
+    db.writer themselves and await the future (see run_db_operation in unified_api).
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if on_writer_thread():
+            # Nested write (or a write queued by its bound method): part of the running operation
+            return method(self, *args, **kwargs)
+        return self.writer.call(method, self, *args, **kwargs)
+
+    wrapper.write_operation = True
+    return wrapper
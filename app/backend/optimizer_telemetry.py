@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Run telemetry for the e-constraint optimizer.
+
+Collects wall-clock timings per optimizer phase and solver statistics per epsilon so
+slow instances can be spotted and regression thresholds set on real runs.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+class OptimizerTelemetry:
+    """
+    Per-run telemetry: phase timers plus one record per solver call.
+
+    Phases used by the optimizer: load, preprocessing, model_build, solve, extraction,
+    alternatives_analysis and report_writing.
+    """
+
+    def __init__(self, phase_seconds: Optional[Dict[str, float]] = None,
+                 phase_calls: Optional[Dict[str, int]] = None):
+        self.started_at = datetime.now().isoformat()
+        self._start = time.perf_counter()
+        self.phase_seconds = defaultdict(float, phase_seconds or {})
+        self.phase_calls = defaultdict(int, phase_calls or {})
+        self.solves = []
+        self.report_path = None  # JSON written here when the run finishes, if set
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block of work and add it to the named phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def add_phase(self, name: str, seconds: float):
+        """Add an externally measured duration to the named phase"""
+        self.phase_seconds[name] += seconds
+        self.phase_calls[name] += 1
+
+    def record_solve(self, label: str, epsilon: Optional[float], constraint_type: str,
+                     model, solution, build_seconds: float, solve_seconds: float,
+                     extraction_seconds: float = 0.0) -> Dict[str, Any]:
+        """Record timings and solver statistics for one docplex model solve"""
+        self.add_phase("model_build", build_seconds)
+        self.add_phase("solve", solve_seconds)
+        if extraction_seconds:
+            self.add_phase("extraction", extraction_seconds)
+        details = model.solve_details
+        record = {
+            "label": label,
+            "epsilon": None if epsilon is None else float(epsilon),
+            "constraint_type": constraint_type,
+            "status": details.status if details is not None else ("Optimal" if solution else "Infeasible"),
+            "feasible": bool(solution),
+            "objective": float(solution.objective_value) if solution else None,
+            "build_seconds": build_seconds,
+            "solve_seconds": solve_seconds,
+            "extraction_seconds": extraction_seconds,
+            "solver_seconds": _finite(details.time) if details is not None else None,
+            "nodes": _finite(details.nb_nodes_processed) if details is not None else None,
+            "iterations": _finite(details.nb_iterations) if details is not None else None,
+            "gap": _finite(details.mip_relative_gap) if details is not None else None,
+            "best_bound": _finite(details.best_bound) if details is not None else None,
+            "n_variables": model.number_of_variables,
+            "n_constraints": model.number_of_constraints
+        }
+        self.solves.append(record)
+        return record
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate statistics suitable for regression thresholds"""
+        solve_times = [s["solve_seconds"] for s in self.solves]
+        slowest = max(self.solves, key=lambda s: s["solve_seconds"]) if self.solves else None
+        return {
+            "total_seconds": time.perf_counter() - self._start,
+            "n_solves": len(self.solves),
+            "n_feasible": sum(1 for s in self.solves if s["feasible"]),
+            "mean_solve_seconds": sum(solve_times) / len(solve_times) if solve_times else 0.0,
+            "max_solve_seconds": max(solve_times) if solve_times else 0.0,
+            "slowest_epsilon": slowest["epsilon"] if slowest else None,
+            "total_nodes": sum(s["nodes"] or 0 for s in self.solves),
+            "total_iterations": sum(s["iterations"] or 0 for s in self.solves)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the telemetry to a dictionary for JSON serialization"""
+        return {
+            "started_at": self.started_at,
+            "summary": self.summary(),
+            "phases": {
+                name: {"seconds": seconds, "calls": self.phase_calls[name]}
+                for name, seconds in self.phase_seconds.items()
+            },
+            "solves": self.solves
+        }
+
+    def write_json(self, path: Optional[str] = None) -> Optional[str]:
+        """Write the telemetry as JSON to path (or report_path) and return the file name"""
+        path = path or self.report_path
+        if not path:
+            return None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+
+# (optimizer, telemetry) of the decorated call in progress. Context variables are per thread and per
+# asyncio task, so concurrent runs on one shared optimizer each record into their own telemetry.
+_active_run = contextvars.ContextVar('optimizer_active_run', default=None)
+
+# (optimizer, telemetry) of the last outermost decorated call that finished in this thread/task
+_finished_run = contextvars.ContextVar('optimizer_finished_run', default=None)
+
+
+def telemetry_run(phase=None):
+    """
+    Decorator that collects telemetry for an optimizer call
+
+    The outermost decorated call starts a fresh OptimizerTelemetry (seeded with the optimizer's
+    load_telemetry) and publishes it as last_telemetry when it returns; nested calls on the same
+    optimizer record into the same object. If phase is given, the call's wall time is added to it.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            active = _active_run.get()
+            token = None
+            if active is not None and active[0] is self:
+                telemetry = active[1]
+            else:
+                load_telemetry = getattr(self, 'load_telemetry', None) or OptimizerTelemetry()
+                telemetry = OptimizerTelemetry(load_telemetry.phase_seconds, load_telemetry.phase_calls)
+                token = _active_run.set((self, telemetry))
+            try:
+                if phase is None:
+                    return method(self, *args, **kwargs)
+                with telemetry.phase(phase):
+                    return method(self, *args, **kwargs)
+            finally:
+                if token is not None:
+                    _active_run.reset(token)
+                    _finished_run.set((self, telemetry))
+                    self.last_telemetry = telemetry
+                    report_file = telemetry.write_json()
+                    if report_file:
+                        print(f"Telemetry saved to: {report_file}")
+        return wrapper
+    return decorator
+
+
+def active_telemetry(owner) -> Optional[OptimizerTelemetry]:
+    """Telemetry of owner's decorated call running in this thread/task, or None"""
+    active = _active_run.get()
+    return active[1] if active is not None and active[0] is owner else None
+
+
+def finished_telemetry(owner) -> Optional[OptimizerTelemetry]:
+    """Telemetry of owner's last decorated call that finished in this thread/task, or None"""
+    finished = _finished_run.get()
+    return finished[1] if finished is not None and finished[0] is owner else None
+
+
+def _finite(value):
+    """Convert solver statistics to plain numbers, mapping NaN/unavailable to None"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value == value and abs(value) != float('inf') else None
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Optional Pareto front plot renderer for the e-constraint optimizer.
+
+matplotlib and plotly are imported only when a plot is actually rendered, and figures are
+written to disk (PNG/HTML) instead of being shown, so this is safe to call from a server
+process. The frontend renders its own charts; these files are for offline reports.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+PLOT_FORMATS = ("png", "html")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def render_pareto_plots(df_pareto, save_path, constraint_type, formats=PLOT_FORMATS):
+    """
+    Write Pareto front plots for an e-constraint sweep
+
+    Args:
+        df_pareto: DataFrame with 'cost', 'score', 'epsilon' and 'allocations' columns
+        save_path: Output directory (or prefix ending in a path separator)
+        constraint_type: "cost" or "score", used in titles and file names
+        formats: Any of "png" (static matplotlib plot) and "html" (interactive plotly plot)
+
+    Returns:
+        dict: Format -> written file path
+    """
+    unknown = set(formats) - set(PLOT_FORMATS)
+    if unknown:
+        raise ValueError(f"Unsupported plot formats: {sorted(unknown)}")
+    if len(df_pareto) == 0:
+        print("No data to plot")
+        return {}
+
+    os.makedirs(save_path or ".", exist_ok=True)
+    prefix = os.path.join(save_path, f"MOO_e-const_{constraint_type}_selective_na_pareto")
+    written = {}
+
+    if "png" in formats:
+        # Figure objects bypass pyplot's global state and GUI backends entirely
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=(8, 6))
+        ax = fig.subplots()
+        ax.plot(df_pareto["score"], df_pareto["cost"], marker='o', linestyle='-', alpha=0.7)
+        ax.set_xlabel("Supplier Score (↑)")
+        ax.set_ylabel("Total Cost (↓)")
+        ax.set_title(f"Pareto Front: Cost vs Supplier Score (E-Constraint: {constraint_type}, Selective NA)")
+        ax.grid(True)
+        ax.invert_yaxis()  # Lower cost is better
+        fig.tight_layout()
+        written["png"] = f"{prefix}_plot.png"
+        fig.savefig(written["png"])
+
+    if "html" in formats:
+        import plotly.express as px
+
+        fig = px.scatter(
+            df_pareto,
+            x="cost",
+            y="score",
+            color="epsilon",
+            hover_data=["epsilon", "allocations"],
+            title=f"Interactive Pareto Front: E-Constraint Selective NA ({constraint_type} constraint)"
+        )
+        fig.update_layout(
+            xaxis_title="Cost (Minimize)",
+            yaxis_title="Supplier Score (Maximize)"
+        )
+        written["html"] = f"{prefix}_plot.html"
+        fig.write_html(written["html"], include_plotlyjs="cdn")
+
+    for fmt, path in written.items():
+        print(f"Pareto {fmt.upper()} plot saved to: {path}")
+    return written
+
+
+def submit_pareto_plots(df_pareto, save_path, constraint_type, formats=PLOT_FORMATS):
+    """
+    Render plots on a single background worker thread
+
+    Returns:
+        Future: Resolves to the dict returned by render_pareto_plots()
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pareto-plots")
+    # Copy so later changes to the caller's frame cannot race with rendering
+    return _executor.submit(render_pareto_plots, df_pareto.copy(), save_path, constraint_type, tuple(formats))
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Process pool shared by the CPU-bound batch calculations (PROMETHEE scenarios, BWM batches).
+
+One pool lives as long as the process and is shut down by the API's lifespan handler. Its workers
+are started with forkserver (spawn where that is unavailable), never fork: forking the threaded
+API server would copy locks held by its other threads (database pools, writer, executors) into the
+children in whatever state they happen to be.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def start_method() -> str:
+    return "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """The shared pool, created on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PROCESS_POOL_WORKERS,
+                                        mp_context=multiprocessing.get_context(start_method()))
+        return _pool
+
+
+def shutdown_process_pool():
+    """Wait for running tasks and stop the worker processes"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def process_pool_stats() -> Dict[str, Any]:
+    return {"workers": PROCESS_POOL_WORKERS, "start_method": start_method(), "running": _pool is not None}
+
+
+def pool_map(func: Callable, items: Iterable, workers: Optional[int] = None) -> List[Any]:
+    """
+    [func(item) for item in items] evaluated on the shared pool
+
+    Args:
+        func: Module-level function (it is pickled by reference)
+        items: Arguments, one call each
+        workers: Calls of this map running at once (default: the pool size), so one request
+            cannot occupy every worker
+
+    Returns:
+        list: Results in the order of items
+    """
+    pool = get_process_pool()
+    queued = enumerate(items)
+    results = {}
+    pending = {}
+
+    def submit_next():
+        for index, item in queued:
+            pending[pool.submit(func, item)] = index
+            return
+
+    for _ in range(max(1, min(workers or PROCESS_POOL_WORKERS, PROCESS_POOL_WORKERS))):
+        submit_next()
+    try:
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[pending.pop(future)] = future.result()
+                submit_next()
+    finally:
+        for future in pending:
+            future.cancel()
+    return [results[index] for index in range(len(results))]
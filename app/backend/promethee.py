@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""
+Vectorized PROMETHEE II engine.
+
+Each preference function is evaluated over a whole n x n difference matrix per criterion, so
+the only Python-level loop is over criteria. Results match the original pairwise
+implementation: missing scores count as 0, a supplier is never compared with itself and
+flows are averaged over all n columns (diagonal included).
+"""
+
+import base64
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+import numpy as np
+
+PREFERENCE_FUNCTIONS = ('usual', 'u_shape', 'v_shape', 'level', 'linear', 'gaussian')
+
+DEFAULT_PREFERENCE_FUNCTION = 'linear'
+DEFAULT_PREFERENCE_THRESHOLD = 2.0
+DEFAULT_INDIFFERENCE_THRESHOLD = 0.5
+
+# Upper bound on cells per working buffer (two buffers of block_rows x n float64 each)
+MAX_BLOCK_ELEMENTS = 4_000_000
+
+MATRIX_DTYPES = ('float64', 'float32')
+MATRIX_ENCODINGS = ('list', 'base64')
+
+
+# Each function writes P(diff) into out, which may be diff itself (in-place evaluation)
+
+def _clip_unit(out):
+    # Two in-place passes; measurably faster than np.clip on large matrices
+    np.maximum(out, 0.0, out=out)
+    np.minimum(out, 1.0, out=out)
+    return out
+
+
+def _usual(diff, q, p, out):
+    np.greater(diff, 0, out=out)
+    return out
+
+
+def _u_shape(diff, q, p, out):
+    np.greater(diff, q, out=out)
+    return out
+
+
+def _v_shape(diff, q, p, out):
+    if p > 0:
+        # diff / p is <= 0 for diff <= 0 and >= 1 for diff >= p, so clipping reproduces both branches
+        np.divide(diff, p, out=out)
+        return _clip_unit(out)
+    np.greater(diff, 0, out=out)
+    return out
+
+
+def _level(diff, q, p, out):
+    if q < p:
+        at_least_p = diff >= p
+        np.greater(diff, q, out=out)
+        np.add(out, at_least_p, out=out)
+        out *= 0.5  # 0, 0.5 (plateau) or 1
+        return out
+    np.greater(diff, q, out=out)
+    return out
+
+
+def _linear(diff, q, p, out):
+    if q < p:
+        # Rounding is monotonic, so (diff - q) / (p - q) stays <= 0 below q and >= 1 above p
+        np.subtract(diff, q, out=out)
+        out /= (p - q)
+        return _clip_unit(out)
+    np.greater(diff, q, out=out)
+    return out
+
+
+def _gaussian(diff, q, p, out):
+    sigma = p / 2
+    not_preferred = diff <= 0
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        np.square(diff, out=out)
+        np.negative(out, out=out)
+        out /= (2 * sigma ** 2)
+        np.exp(out, out=out)
+        np.subtract(1, out, out=out)
+    out[not_preferred] = 0.0
+    return out
+
+
+_PREFERENCE_UFUNCS = {
+    'usual': _usual,
+    'u_shape': _u_shape,
+    'v_shape': _v_shape,
+    'level': _level,
+    'linear': _linear,
+    'gaussian': _gaussian
+}
+
+
+def preference_degrees(diff: np.ndarray, function_type: str, indiff_threshold: float,
+                       pref_threshold: float, out: np.ndarray = None) -> np.ndarray:
+    """
+    Apply a PROMETHEE preference function elementwise to an array of score differences
+
+    Unknown function types fall back to linear, as in the original implementation. Pass
+    out=diff to evaluate in place.
+    """
+    if out is None:
+        out = np.empty(np.shape(diff), dtype=np.float64)
+    function = _PREFERENCE_UFUNCS.get(function_type, _linear)
+    return function(diff, float(indiff_threshold), float(pref_threshold), out)
+
+
+def resolve_parameters(criteria: List[str], preference_functions: Dict[str, str] = None,
+                       preference_thresholds: Dict[str, float] = None,
+                       indifference_thresholds: Dict[str, float] = None):
+    """
+    Per-criterion (function, q, p) lists with the engine defaults applied
+
+    Thresholds must cover every criterion when given (KeyError otherwise).
+    """
+    if preference_functions is None:
+        preference_functions = {criterion: DEFAULT_PREFERENCE_FUNCTION for criterion in criteria}
+    if preference_thresholds is None:
+        preference_thresholds = {criterion: DEFAULT_PREFERENCE_THRESHOLD for criterion in criteria}
+    if indifference_thresholds is None:
+        indifference_thresholds = {criterion: DEFAULT_INDIFFERENCE_THRESHOLD for criterion in criteria}
+
+    functions = [preference_functions.get(criterion, DEFAULT_PREFERENCE_FUNCTION) for criterion in criteria]
+    q = [indifference_thresholds[criterion] for criterion in criteria]
+    p = [preference_thresholds[criterion] for criterion in criteria]
+    return functions, q, p
+
+
+def score_matrix(supplier_scores: Dict[int, Dict[str, float]], criteria: List[str]) -> np.ndarray:
+    """n_suppliers x n_criteria score matrix; missing scores count as 0"""
+    return np.array(
+        [[scores.get(criterion, 0) for criterion in criteria] for scores in supplier_scores.values()],
+        dtype=np.float64
+    ).reshape(len(supplier_scores), len(criteria))
+
+
+def preference_block(column: np.ndarray, start: int, stop: int, function_type: str,
+                     indiff_threshold: float, pref_threshold: float, out: np.ndarray = None) -> np.ndarray:
+    """
+    Rows start..stop of the unweighted preference matrix P(a, b) for one criterion
+
+    The diagonal (a supplier against itself) is zero. Written into out when given.
+    """
+    rows = stop - start
+    if out is None:
+        out = np.empty((rows, len(column)))
+    # diff[a, b] = column[a] - column[b]; filling the rows first avoids the slow outer() loop
+    out[:] = column
+    diff = np.subtract(column[start:stop, None], out, out=out)
+    preference = preference_degrees(diff, function_type, indiff_threshold, pref_threshold, out=diff)
+    preference[np.arange(rows), np.arange(start, stop)] = 0.0
+    return preference
+
+
+def default_block_rows(n_suppliers: int) -> int:
+    """Rows per block so each n-wide working buffer stays under MAX_BLOCK_ELEMENTS cells"""
+    return max(1, min(n_suppliers, MAX_BLOCK_ELEMENTS // max(n_suppliers, 1)))
+
+
+def promethee_flows(scores: np.ndarray, weights, functions: List[str], q, p,
+                    block_rows: int = None, matrix_dtype=None) -> Dict[str, np.ndarray]:
+    """
+    Positive/negative flows, overall and per criterion, computed block by block
+
+    Only block_rows x n cells are held at a time. When everything fits in one block the results
+    are bitwise identical to averaging the full matrices; with several blocks the column sums are
+    accumulated per block and may differ in the last bits.
+
+    Args:
+        scores: n_suppliers x n_criteria score matrix
+        weights, functions, q, p: Per-criterion weight, preference function and thresholds;
+            weights=None computes only the per-criterion flows
+        block_rows: Rows per block (default_block_rows() if None)
+        matrix_dtype: Also assemble the weighted preference matrix in this dtype (None to skip)
+
+    Returns:
+        dict: positive, negative (n,), criteria_positive, criteria_negative (k x n) and
+              matrix (n x n or None); positive/negative are None without weights
+    """
+    n_suppliers, n_criteria = scores.shape
+    block_rows = default_block_rows(n_suppliers) if block_rows is None else max(1, min(block_rows, n_suppliers))
+
+    positive = np.zeros(n_suppliers)
+    column_sums = np.zeros(n_suppliers)
+    criteria_positive = np.zeros((n_criteria, n_suppliers))
+    criteria_column_sums = np.zeros((n_criteria, n_suppliers))
+    matrix = np.empty((n_suppliers, n_suppliers), dtype=matrix_dtype) if matrix_dtype is not None else None
+
+    block_buffer = np.empty((block_rows, n_suppliers))
+    aggregated_buffer = np.empty((block_rows, n_suppliers))
+    for start in range(0, n_suppliers, block_rows):
+        stop = min(start + block_rows, n_suppliers)
+        aggregated = aggregated_buffer[:stop - start]
+        aggregated[:] = 0.0
+        for k in range(n_criteria):
+            block = preference_block(scores[:, k], start, stop, functions[k], q[k], p[k],
+                                     out=block_buffer[:stop - start])
+            criteria_positive[k, start:stop] = np.mean(block, axis=1)
+            criteria_column_sums[k] += np.sum(block, axis=0)
+
+            if weights is not None:
+                # Accumulate in criteria order so sums match the pairwise implementation exactly
+                block *= weights[k]
+                aggregated += block
+
+        if weights is None:
+            continue
+        positive[start:stop] = np.mean(aggregated, axis=1)  # How much each supplier dominates others
+        column_sums += np.sum(aggregated, axis=0)
+        if matrix is not None:
+            matrix[start:stop] = aggregated
+
+    # Mean over the rows of each column: how much each supplier is dominated
+    negative = column_sums / n_suppliers if n_suppliers else column_sums
+    criteria_negative = criteria_column_sums / n_suppliers if n_suppliers else criteria_column_sums
+    return {
+        'positive': positive if weights is not None else None,
+        'negative': negative if weights is not None else None,
+        'criteria_positive': criteria_positive,
+        'criteria_negative': criteria_negative,
+        'matrix': matrix
+    }
+
+
+class CriterionFlows:
+    """
+    Per-criterion flows for one set of scores and preference parameters
+
+    Flows are linear in the criteria weights, so the ranking for any weight vector is a single
+    product with the k x n unicriterion flow matrices; no pairwise work is repeated.
+    """
+
+    def __init__(self, suppliers: List[Any], criteria: List[str], criteria_positive: np.ndarray,
+                 criteria_negative: np.ndarray):
+        self.suppliers = suppliers
+        self.criteria = criteria
+        self.criteria_positive = criteria_positive
+        self.criteria_negative = criteria_negative
+        self.criteria_net = criteria_positive - criteria_negative
+
+    @classmethod
+    def compute(cls, supplier_scores: Dict[int, Dict[str, float]], criteria: List[str],
+                preference_functions: Dict[str, str] = None, preference_thresholds: Dict[str, float] = None,
+                indifference_thresholds: Dict[str, float] = None, block_rows: int = None) -> 'CriterionFlows':
+        """Run the pairwise pass once, without weights"""
+        functions, q, p = resolve_parameters(criteria, preference_functions, preference_thresholds,
+                                             indifference_thresholds)
+        flows = promethee_flows(score_matrix(supplier_scores, criteria), None, functions, q, p,
+                                block_rows=block_rows)
+        return cls(list(supplier_scores), list(criteria), flows['criteria_positive'], flows['criteria_negative'])
+
+    @classmethod
+    def from_results(cls, results: Dict[str, Any]) -> 'CriterionFlows':
+        """Reuse the per-criterion flows already returned by calculate_promethee_ii()"""
+        criteria = list(results['criteria_flows'])
+        n_suppliers = len(results['suppliers'])
+        positive = np.array([results['criteria_flows'][c]['positive_flows'] for c in criteria]).reshape(-1, n_suppliers)
+        negative = np.array([results['criteria_flows'][c]['negative_flows'] for c in criteria]).reshape(-1, n_suppliers)
+        return cls(list(results['suppliers']), criteria, positive, negative)
+
+    def weighted_flows(self, weight_vectors) -> Dict[str, np.ndarray]:
+        """
+        Flows and rankings for many weight vectors at once
+
+        Args:
+            weight_vectors: m x k array-like, one row per weight vector (criteria order)
+
+        Returns:
+            dict: positive, negative, net (m x n) and ranking (m x n supplier indices, best first)
+        """
+        weights = np.asarray(weight_vectors, dtype=np.float64)
+        if weights.ndim == 1:
+            weights = weights[None, :]
+        if weights.shape[1] != len(self.criteria):
+            raise ValueError(f"Each weight vector needs {len(self.criteria)} values, got {weights.shape[1]}")
+
+        net = weights @ self.criteria_net
+        return {
+            'positive': weights @ self.criteria_positive,
+            'negative': weights @ self.criteria_negative,
+            'net': net,
+            'ranking': np.argsort(-net, axis=1, kind='stable')
+        }
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU map with hit/miss counters; values are treated as immutable
+    """
+
+    def __init__(self, maxsize: int = 16):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+
+class CriterionFlowCache(LRUCache):
+    """
+    LRU cache of CriterionFlows keyed by a fingerprint of the scores and preference parameters
+    """
+
+    @staticmethod
+    def fingerprint(supplier_scores: Dict[int, Dict[str, float]], criteria: List[str],
+                    preference_functions: Dict[str, str] = None, preference_thresholds: Dict[str, float] = None,
+                    indifference_thresholds: Dict[str, float] = None) -> str:
+        """Stable hash of everything the per-criterion flows depend on (not the weights)"""
+        functions, q, p = resolve_parameters(criteria, preference_functions, preference_thresholds,
+                                             indifference_thresholds)
+        digest = hashlib.sha1()
+        digest.update(repr((list(supplier_scores), list(criteria), functions,
+                            [float(v) for v in q], [float(v) for v in p])).encode())
+        digest.update(score_matrix(supplier_scores, criteria).tobytes())
+        return digest.hexdigest()
+
+    def get_or_compute(self, supplier_scores: Dict[int, Dict[str, float]], criteria: List[str],
+                       preference_functions: Dict[str, str] = None, preference_thresholds: Dict[str, float] = None,
+                       indifference_thresholds: Dict[str, float] = None):
+        """
+        Returns:
+            tuple: (CriterionFlows, True if served from the cache)
+        """
+        key = self.fingerprint(supplier_scores, criteria, preference_functions, preference_thresholds,
+                               indifference_thresholds)
+        flows = self.get(key)
+        if flows is not None:
+            return flows, True
+        flows = CriterionFlows.compute(supplier_scores, criteria, preference_functions, preference_thresholds,
+                                       indifference_thresholds)
+        self.put(key, flows)
+        return flows, False
+
+    @staticmethod
+    def version_key(data_versions: Dict[str, int], parameters: Dict[str, Any]) -> str:
+        """
+        Key for flows of the scores at the given data versions, so a lookup needs no score load
+
+        Only store flows under it when the versions were unchanged across the load.
+        """
+        return 'versions:' + ResultCache.key(data_versions, parameters)
+
+
+class ResultCache(LRUCache):
+    """
+    LRU cache of finished PROMETHEE II responses keyed by input data versions and request parameters
+
+    The data versions (see SupplierDatabase.get_data_versions) change on every write to the input
+    tables, so entries of older versions can never hit again and are dropped as soon as a newer
+    version is seen.
+    """
+
+    def __init__(self, maxsize: int = 32):
+        super().__init__(maxsize)
+        self.data_versions = None
+
+    @staticmethod
+    def key(data_versions: Dict[str, int], parameters: Dict[str, Any]) -> str:
+        payload = json.dumps({'data_versions': data_versions, 'parameters': parameters}, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def observe(self, data_versions: Dict[str, int]):
+        """Invalidate everything when the input tables were written since the last call"""
+        with self._lock:
+            if self.data_versions is not None and self.data_versions != data_versions:
+                self._entries.clear()
+            self.data_versions = dict(data_versions)
+
+
+# Shared by the API so weight changes re-rank without recomputing pairwise preferences
+criterion_flow_cache = CriterionFlowCache()
+
+# Shared by the API so repeated identical calculations skip loading, computing and saving
+result_cache = ResultCache()
+
+
+def flow_results(suppliers: List[Any], criteria: List[str], positive: np.ndarray, negative: np.ndarray,
+                 criteria_positive: np.ndarray, criteria_negative: np.ndarray) -> Dict[str, Any]:
+    """Result dict in the shape returned by calculate_promethee_ii() (without the preference matrix)"""
+    criteria_flows = {}
+    for k, criterion in enumerate(criteria):
+        criteria_flows[criterion] = {
+            'positive_flows': criteria_positive[k].tolist(),
+            'negative_flows': criteria_negative[k].tolist(),
+            'net_flows': (criteria_positive[k] - criteria_negative[k]).tolist()
+        }
+
+    net_flows = positive - negative
+    # Sort by net flow (descending); ties keep supplier order, as in CriterionFlows.weighted_flows
+    ranking_indices = np.argsort(-net_flows, kind='stable')
+
+    return {
+        'suppliers': suppliers,
+        'positive_flows': positive.tolist(),
+        'negative_flows': negative.tolist(),
+        'net_flows': net_flows.tolist(),
+        'ranking': ranking_indices.tolist(),
+        'criteria_flows': criteria_flows
+    }
+
+
+def encode_matrix(matrix: np.ndarray, encoding: str = 'list'):
+    """
+    Serialise a preference matrix: 'list' (nested lists) or 'base64' (raw little-endian bytes)
+    """
+    if encoding == 'list':
+        return matrix.tolist()
+    if encoding == 'base64':
+        data = np.ascontiguousarray(matrix, dtype=matrix.dtype.newbyteorder('<'))
+        return {
+            'encoding': 'base64',
+            'dtype': data.dtype.name,
+            'shape': list(data.shape),
+            'data': base64.b64encode(data.tobytes()).decode('ascii')
+        }
+    raise ValueError(f"Unsupported matrix encoding '{encoding}'. Use one of {list(MATRIX_ENCODINGS)}")
+
+
+def calculate_promethee_ii(supplier_scores: Dict[int, Dict[str, float]],
+                           criteria_weights: Dict[str, float],
+                           preference_functions: Dict[str, str] = None,
+                           preference_thresholds: Dict[str, float] = None,
+                           indifference_thresholds: Dict[str, float] = None,
+                           include_preference_matrix: bool = True,
+                           matrix_dtype: str = 'float64',
+                           matrix_encoding: str = 'list',
+                           block_rows: int = None) -> Dict[str, Any]:
+    """
+    Calculate PROMETHEE II ranking for suppliers
+
+    Args:
+        supplier_scores: {supplier_id: {criterion: score}} (higher is better)
+        criteria_weights: {criterion: weight}
+        preference_functions: {criterion: function type}, default linear
+        preference_thresholds: {criterion: p}, default 2.0
+        indifference_thresholds: {criterion: q}, default 0.5
+        include_preference_matrix: Return the n x n aggregated preference matrix (O(n^2) memory)
+        matrix_dtype: 'float64' or 'float32' for the returned matrix
+        matrix_encoding: 'list' (nested lists) or 'base64' (see encode_matrix())
+        block_rows: Rows per block for the flow computation (see promethee_flows())
+
+    Returns:
+        dict: suppliers, positive/negative/net flows, ranking (supplier indices, best first),
+              per-criterion flows and, if requested, the preference_matrix
+    """
+    if include_preference_matrix and (matrix_dtype not in MATRIX_DTYPES or matrix_encoding not in MATRIX_ENCODINGS):
+        raise ValueError(f"Preference matrix dtype must be one of {list(MATRIX_DTYPES)} "
+                         f"and encoding one of {list(MATRIX_ENCODINGS)}")
+
+    suppliers = list(supplier_scores.keys())
+    criteria = list(criteria_weights.keys())
+    functions, q, p = resolve_parameters(criteria, preference_functions, preference_thresholds,
+                                         indifference_thresholds)
+    scores = score_matrix(supplier_scores, criteria)
+    weights = [criteria_weights[criterion] for criterion in criteria]
+
+    flows = promethee_flows(scores, weights, functions, q, p, block_rows=block_rows,
+                            matrix_dtype=matrix_dtype if include_preference_matrix else None)
+
+    results = flow_results(suppliers, criteria, flows['positive'], flows['negative'],
+                           flows['criteria_positive'], flows['criteria_negative'])
+    if include_preference_matrix:
+        results['preference_matrix'] = encode_matrix(flows['matrix'], matrix_encoding)
+        results['criteria_flows'] = results.pop('criteria_flows')  # keep per-criterion flows last
+    return results
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Incremental PROMETHEE II state.
+
+Keeps, per criterion, the row sums (sum_b P(a, b)) and column sums (sum_b P(b, a)) of the
+unweighted preference matrix. When one supplier is added, removed or re-scored only its row and
+column of each matrix change, so the sums are patched in O(n * k) instead of recomputing all
+n^2 pairs. Weights are applied at read time (flows are linear in the weights).
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+import numpy as np
+
+from promethee import (CriterionFlows, default_block_rows, flow_results, preference_block, preference_degrees,
+                       resolve_parameters, score_matrix)
+
+# Above this share of changed suppliers a full rebuild is cheaper than patching one by one
+REBUILD_FRACTION = 0.25
+
+# Patched sums accumulate rounding; rebuild from scratch after this many incremental updates
+DEFAULT_REBUILD_AFTER = 5000
+
+
+class IncrementalPROMETHEE:
+    """
+    Per-criterion preference sums for one set of criteria and preference parameters
+
+    Thread-safe: all mutations and reads hold the instance lock.
+    """
+
+    def __init__(self, criteria: List[str], preference_functions: Dict[str, str] = None,
+                 preference_thresholds: Dict[str, float] = None, indifference_thresholds: Dict[str, float] = None,
+                 rebuild_after: int = DEFAULT_REBUILD_AFTER):
+        self.criteria = list(criteria)
+        self.functions, self.q, self.p = resolve_parameters(self.criteria, preference_functions,
+                                                            preference_thresholds, indifference_thresholds)
+        self.rebuild_after = rebuild_after
+        self.suppliers = []
+        self._index = {}
+        self.scores = np.zeros((0, len(self.criteria)))
+        self.row_sums = np.zeros((len(self.criteria), 0))
+        self.column_sums = np.zeros((len(self.criteria), 0))
+        self.updates_since_rebuild = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.suppliers)
+
+    def _score_row(self, scores: Dict[str, float]) -> np.ndarray:
+        return np.array([scores.get(criterion, 0) for criterion in self.criteria], dtype=np.float64)
+
+    def rebuild(self, supplier_scores: Dict[Any, Dict[str, float]]):
+        """Recompute all sums from scratch, block by block"""
+        with self._lock:
+            self.suppliers = list(supplier_scores)
+            self._index = {supplier: i for i, supplier in enumerate(self.suppliers)}
+            self.scores = score_matrix(supplier_scores, self.criteria)
+            n, k = self.scores.shape
+            self.row_sums = np.zeros((k, n))
+            self.column_sums = np.zeros((k, n))
+
+            block_rows = default_block_rows(n)
+            buffer = np.empty((block_rows, n))
+            for start in range(0, n, block_rows):
+                stop = min(start + block_rows, n)
+                for c in range(k):
+                    block = preference_block(self.scores[:, c], start, stop, self.functions[c], self.q[c],
+                                             self.p[c], out=buffer[:stop - start])
+                    self.row_sums[c, start:stop] = block.sum(axis=1)
+                    self.column_sums[c] += block.sum(axis=0)
+            self.updates_since_rebuild = 0
+
+    def _pair_preferences(self, row: np.ndarray, i: int = None):
+        """
+        P(a, b) of a supplier with score row against every current supplier, and P(b, a)
+
+        Returns:
+            tuple: (outgoing, incoming), each k x n; the supplier's own column i is zero
+        """
+        diff = row[:, None] - self.scores.T  # k x n
+        outgoing = np.empty_like(diff)
+        incoming = np.empty_like(diff)
+        for c in range(len(self.criteria)):
+            preference_degrees(diff[c], self.functions[c], self.q[c], self.p[c], out=outgoing[c])
+            preference_degrees(-diff[c], self.functions[c], self.q[c], self.p[c], out=incoming[c])
+        if i is not None:
+            outgoing[:, i] = 0.0
+            incoming[:, i] = 0.0
+        return outgoing, incoming
+
+    def upsert(self, supplier: Any, scores: Dict[str, float]) -> str:
+        """
+        Add a supplier or replace its scores in O(n * k)
+
+        Returns:
+            str: 'added', 'updated' or 'unchanged'
+        """
+        with self._lock:
+            row = self._score_row(scores)
+            i = self._index.get(supplier)
+            if i is not None and np.array_equal(self.scores[i], row):
+                return 'unchanged'
+
+            if i is None:
+                i = len(self.suppliers)
+                self.suppliers.append(supplier)
+                self._index[supplier] = i
+                self.scores = np.vstack([self.scores, row[None, :]])
+                self.row_sums = np.hstack([self.row_sums, np.zeros((len(self.criteria), 1))])
+                self.column_sums = np.hstack([self.column_sums, np.zeros((len(self.criteria), 1))])
+                old_outgoing = old_incoming = np.zeros((len(self.criteria), len(self.suppliers)))
+                status = 'added'
+            else:
+                old_outgoing, old_incoming = self._pair_preferences(self.scores[i], i)
+                self.scores[i] = row
+                status = 'updated'
+
+            outgoing, incoming = self._pair_preferences(row, i)
+            # Row i of each matrix is outgoing, column i is incoming; the others change in one cell each
+            self.row_sums += incoming - old_incoming
+            self.column_sums += outgoing - old_outgoing
+            self.row_sums[:, i] = outgoing.sum(axis=1)
+            self.column_sums[:, i] = incoming.sum(axis=1)
+            self.updates_since_rebuild += 1
+            return status
+
+    def remove(self, supplier: Any) -> bool:
+        """Drop a supplier in O(n * k); False if it is not part of the state"""
+        with self._lock:
+            i = self._index.get(supplier)
+            if i is None:
+                return False
+            outgoing, incoming = self._pair_preferences(self.scores[i], i)
+            self.row_sums -= incoming
+            self.column_sums -= outgoing
+
+            keep = np.arange(len(self.suppliers)) != i
+            self.scores = self.scores[keep]
+            self.row_sums = self.row_sums[:, keep]
+            self.column_sums = self.column_sums[:, keep]
+            del self.suppliers[i]
+            self._index = {s: j for j, s in enumerate(self.suppliers)}
+            self.updates_since_rebuild += 1
+            return True
+
+    def sync(self, supplier_scores: Dict[Any, Dict[str, float]]) -> Dict[str, Any]:
+        """
+        Bring the state in line with supplier_scores, patching only what changed
+
+        Falls back to a full rebuild when many suppliers changed or after rebuild_after updates.
+
+        Returns:
+            dict: mode ('incremental' or 'rebuild') and added/removed/updated counts
+        """
+        with self._lock:
+            removed = [s for s in self.suppliers if s not in supplier_scores]
+            added = [s for s in supplier_scores if s not in self._index]
+            updated = [s for s in supplier_scores
+                       if s in self._index and not np.array_equal(self.scores[self._index[s]],
+                                                                  self._score_row(supplier_scores[s]))]
+            changes = len(removed) + len(added) + len(updated)
+            stats = {'added': len(added), 'removed': len(removed), 'updated': len(updated)}
+
+            if (not self.suppliers or changes > REBUILD_FRACTION * len(supplier_scores)
+                    or self.updates_since_rebuild + changes > self.rebuild_after):
+                if changes or self.updates_since_rebuild:
+                    self.rebuild(supplier_scores)
+                    return dict(stats, mode='rebuild')
+                return dict(stats, mode='incremental')
+
+            for supplier in removed:
+                self.remove(supplier)
+            for supplier in added + updated:
+                self.upsert(supplier, supplier_scores[supplier])
+            return dict(stats, mode='incremental')
+
+    def flows(self, suppliers: List[Any] = None) -> CriterionFlows:
+        """Per-criterion flows, in the given supplier order (state order if None)"""
+        with self._lock:
+            n = len(self.suppliers)
+            order = [self._index[s] for s in suppliers] if suppliers is not None else list(range(n))
+            divisor = n if n else 1
+            return CriterionFlows(list(suppliers) if suppliers is not None else list(self.suppliers),
+                                  list(self.criteria), self.row_sums[:, order] / divisor,
+                                  self.column_sums[:, order] / divisor)
+
+    def results(self, criteria_weights: Dict[str, float], suppliers: List[Any] = None) -> Dict[str, Any]:
+        """Weighted PROMETHEE II results in the shape of calculate_promethee_ii() (no preference matrix)"""
+        flows = self.flows(suppliers)
+        weights = np.array([criteria_weights[criterion] for criterion in self.criteria], dtype=np.float64)
+        return flow_results(flows.suppliers, flows.criteria, weights @ flows.criteria_positive,
+                            weights @ flows.criteria_negative, flows.criteria_positive, flows.criteria_negative)
+
+
+class IncrementalStateRegistry:
+    """
+    Incremental states kept between requests, one per criteria/preference-parameter set (LRU)
+    """
+
+    def __init__(self, maxsize: int = 8):
+        self.maxsize = maxsize
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(criteria: List[str], preference_functions: Dict[str, str] = None,
+            preference_thresholds: Dict[str, float] = None, indifference_thresholds: Dict[str, float] = None) -> str:
+        functions, q, p = resolve_parameters(criteria, preference_functions, preference_thresholds,
+                                             indifference_thresholds)
+        return hashlib.sha1(repr((list(criteria), functions, [float(v) for v in q],
+                                  [float(v) for v in p])).encode()).hexdigest()
+
+    def get(self, criteria: List[str], preference_functions: Dict[str, str] = None,
+            preference_thresholds: Dict[str, float] = None,
+            indifference_thresholds: Dict[str, float] = None) -> IncrementalPROMETHEE:
+        """The state for these parameters, created empty on first use"""
+        key = self.key(criteria, preference_functions, preference_thresholds, indifference_thresholds)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = IncrementalPROMETHEE(criteria, preference_functions, preference_thresholds,
+                                             indifference_thresholds)
+                self._states[key] = state
+            self._states.move_to_end(key)
+            while len(self._states) > self.maxsize:
+                self._states.popitem(last=False)
+            return state
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+
+# Shared by the API so successive calculate calls only patch what changed since the last one
+incremental_states = IncrementalStateRegistry()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Batch evaluation of PROMETHEE II parameter scenarios.
+
+Many preference-function / threshold configurations are evaluated together: the difference
+matrix of each criterion is built once per block and every distinct (function, q, p) used for
+that criterion in any scenario is evaluated on it. A scenario's flows are then a weighted sum of
+the per-criterion flows it selects. Nothing is persisted.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from scipy.stats import kendalltau
+
+from process_pool import pool_map
+from promethee import default_block_rows, preference_degrees, resolve_parameters, score_matrix
+
+
+def criterion_variant_flows(column: np.ndarray, variants: List[Tuple[str, float, float]],
+                            block_rows: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Unicriterion positive/negative flows for several parameter variants of one criterion
+
+    Args:
+        column: Scores of every supplier on the criterion
+        variants: (function type, q, p) tuples
+        block_rows: Rows per difference block (default_block_rows() if None)
+
+    Returns:
+        tuple: positive, negative flows, each len(variants) x n
+    """
+    n = len(column)
+    positive = np.zeros((len(variants), n))
+    column_sums = np.zeros((len(variants), n))
+    block_rows = default_block_rows(n) if block_rows is None else max(1, min(block_rows, n))
+
+    diff_buffer = np.empty((block_rows, n))
+    preference_buffer = np.empty((block_rows, n))
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        rows = stop - start
+        diff = diff_buffer[:rows]
+        diff[:] = column
+        np.subtract(column[start:stop, None], diff, out=diff)  # shared by every variant
+        for v, (function_type, q, p) in enumerate(variants):
+            preference = preference_degrees(diff, function_type, q, p, out=preference_buffer[:rows])
+            preference[np.arange(rows), np.arange(start, stop)] = 0.0
+            positive[v, start:stop] = preference.sum(axis=1)
+            column_sums[v] += preference.sum(axis=0)
+
+    divisor = n if n else 1
+    return positive / divisor, column_sums / divisor
+
+
+def _criterion_task(args):
+    # Module-level so it can be pickled for the shared process pool
+    return criterion_variant_flows(*args)
+
+
+def compare_rankings(net: np.ndarray, baseline_net: np.ndarray, top_k: int) -> Dict[str, Any]:
+    """Kendall tau-b between two net-flow vectors and the overlap of their top-k suppliers"""
+    top = np.argsort(-net, kind='stable')[:top_k]
+    baseline_top = np.argsort(-baseline_net, kind='stable')[:top_k]
+    if len(net) < 2:
+        tau = 1.0
+    else:
+        tau = kendalltau(net, baseline_net).statistic
+        tau = 1.0 if np.isnan(tau) else float(tau)  # all flows tied on one side
+    ranks = np.empty(len(net), dtype=int)
+    ranks[np.argsort(-net, kind='stable')] = np.arange(len(net))
+    baseline_ranks = np.empty(len(net), dtype=int)
+    baseline_ranks[np.argsort(-baseline_net, kind='stable')] = np.arange(len(net))
+    return {
+        'kendall_tau': tau,
+        'top_k_overlap': len(set(top.tolist()) & set(baseline_top.tolist())) / max(len(baseline_top), 1),
+        'max_rank_shift': int(np.max(np.abs(ranks - baseline_ranks))) if len(net) else 0
+    }
+
+
+def evaluate_scenarios(supplier_scores: Dict[Any, Dict[str, float]], criteria_weights: Dict[str, float],
+                       scenarios: List[Dict[str, Any]], baseline: int = 0, top_k: int = 5,
+                       workers: int = None, block_rows: int = None) -> Dict[str, Any]:
+    """
+    Evaluate many PROMETHEE II parameter configurations and compare each ranking with a baseline
+
+    Args:
+        supplier_scores: {supplier_id: {criterion: score}}
+        criteria_weights: {criterion: weight}, used by scenarios without their own weights
+        scenarios: dicts with optional name, preference_functions, preference_thresholds,
+            indifference_thresholds and criteria_weights
+        baseline: Index of the scenario the others are compared with
+        top_k: Size of the top-k set compared
+        workers: Criteria evaluated at once on the shared process pool (None or 1 runs in-process)
+        block_rows: Rows per difference block
+
+    Returns:
+        dict: suppliers, distinct variants evaluated per criterion and, per scenario, net flows,
+              ranking and the comparison with the baseline
+    """
+    if not scenarios:
+        raise ValueError("At least one scenario is required")
+    if not 0 <= baseline < len(scenarios):
+        raise ValueError(f"baseline must index one of the {len(scenarios)} scenarios")
+    if top_k < 1:
+        raise ValueError("top_k must be >= 1")
+
+    suppliers = list(supplier_scores)
+    criteria = list(criteria_weights)
+    scores = score_matrix(supplier_scores, criteria)
+
+    # Distinct (function, q, p) per criterion across all scenarios
+    variants = [[] for _ in criteria]
+    selections = []
+    for scenario in scenarios:
+        functions, q, p = resolve_parameters(criteria, scenario.get('preference_functions'),
+                                             scenario.get('preference_thresholds'),
+                                             scenario.get('indifference_thresholds'))
+        selection = []
+        for k in range(len(criteria)):
+            variant = (functions[k], float(q[k]), float(p[k]))
+            if variant not in variants[k]:
+                variants[k].append(variant)
+            selection.append(variants[k].index(variant))
+        selections.append(selection)
+
+    tasks = [(scores[:, k], variants[k], block_rows) for k in range(len(criteria))]
+    if workers and workers > 1 and len(tasks) > 1:
+        criterion_flows = pool_map(_criterion_task, tasks, workers)
+    else:
+        criterion_flows = [_criterion_task(task) for task in tasks]
+
+    evaluated = []
+    for scenario, selection in zip(scenarios, selections):
+        weights_by_name = scenario.get('criteria_weights') or criteria_weights
+        missing = [c for c in criteria if c not in weights_by_name]
+        if missing:
+            raise ValueError(f"Scenario weights missing for: {', '.join(missing)}")
+        positive = np.zeros(len(suppliers))
+        negative = np.zeros(len(suppliers))
+        for k, criterion in enumerate(criteria):
+            positive += weights_by_name[criterion] * criterion_flows[k][0][selection[k]]
+            negative += weights_by_name[criterion] * criterion_flows[k][1][selection[k]]
+        evaluated.append((positive, negative, positive - negative))
+
+    baseline_net = evaluated[baseline][2]
+    results = []
+    for i, (scenario, (positive, negative, net)) in enumerate(zip(scenarios, evaluated)):
+        results.append(dict({
+            'name': scenario.get('name') or f"Scenario {i + 1}",
+            'net_flows': net,
+            'ranking': np.argsort(-net, kind='stable')
+        }, **compare_rankings(net, baseline_net, top_k)))
+
+    return {
+        'suppliers': suppliers,
+        'criteria_names': criteria,
+        'baseline': baseline,
+        'top_k': top_k,
+        'variants_evaluated': {criterion: len(variants[k]) for k, criterion in enumerate(criteria)},
+        'scenarios': results
+    }
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Weight-sensitivity and rank-stability analysis for PROMETHEE II.
+
+Weight vectors are sampled around a base (BWM) weight vector and every sample is ranked in one
+batched product with the per-criterion flow matrix (see CriterionFlows). Only rank histograms
+are accumulated, so memory stays bounded by the batch size whatever the number of samples.
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+
+from promethee import CriterionFlows
+
+SAMPLING_METHODS = ('dirichlet', 'perturbation')
+
+DEFAULT_SAMPLES = 10_000
+DEFAULT_CONCENTRATION = 100.0  # Dirichlet alpha = concentration * base weights
+DEFAULT_SPREAD = 0.2  # Perturbation: each weight scaled by U(1 - spread, 1 + spread)
+DEFAULT_INTERVAL = 0.9  # Central share of the rank distribution reported as stability interval
+
+# Upper bound on cells per batch of sampled flows (samples x suppliers float64)
+MAX_BATCH_ELEMENTS = 2_000_000
+
+
+def sample_weights(base_weights: np.ndarray, n_samples: int, method: str = 'dirichlet',
+                   concentration: float = DEFAULT_CONCENTRATION, spread: float = DEFAULT_SPREAD,
+                   rng: np.random.Generator = None) -> np.ndarray:
+    """
+    Draw weight vectors around base_weights
+
+    Args:
+        base_weights: Non-negative weights, one per criterion (normalised internally)
+        n_samples: Number of vectors to draw
+        method: 'dirichlet' (mean = base weights) or 'perturbation' (bounded relative noise)
+        concentration: Dirichlet concentration; larger values stay closer to the base weights
+        spread: Maximum relative change per weight for 'perturbation'
+        rng: numpy Generator (a fresh unseeded one if None)
+
+    Returns:
+        np.ndarray: n_samples x k matrix, each row summing to 1
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    base = np.asarray(base_weights, dtype=np.float64)
+    if base.ndim != 1 or base.size == 0 or np.any(base < 0) or base.sum() <= 0:
+        raise ValueError("Base weights must be a non-empty vector of non-negative values with a positive sum")
+    base = base / base.sum()
+
+    if method == 'dirichlet':
+        if concentration <= 0:
+            raise ValueError("concentration must be positive")
+        # Dirichlet needs strictly positive alphas; zero weights stay (almost) zero
+        return rng.dirichlet(np.maximum(base * concentration, 1e-9), size=n_samples)
+    if method == 'perturbation':
+        if not 0 <= spread < 1:
+            raise ValueError("spread must be in [0, 1)")
+        samples = base * rng.uniform(1 - spread, 1 + spread, size=(n_samples, base.size))
+        return samples / samples.sum(axis=1, keepdims=True)
+    raise ValueError(f"Unknown sampling method '{method}'; expected one of {', '.join(SAMPLING_METHODS)}")
+
+
+def rank_stability(flows: CriterionFlows, base_weights, n_samples: int = DEFAULT_SAMPLES,
+                   method: str = 'dirichlet', concentration: float = DEFAULT_CONCENTRATION,
+                   spread: float = DEFAULT_SPREAD, interval: float = DEFAULT_INTERVAL, seed: int = None,
+                   top_k: int = 1) -> Dict[str, Any]:
+    """
+    Rank distribution of every supplier under sampled weight uncertainty
+
+    Args:
+        flows: Per-criterion flows for the scores and preference parameters being analysed
+        base_weights: Weights (criteria order of flows) the samples are centred on
+        n_samples: Number of sampled weight vectors
+        method, concentration, spread: See sample_weights()
+        interval: Central probability mass of the reported rank interval (e.g. 0.9 -> 5th-95th percentile)
+        seed: Optional seed for reproducible samples
+        top_k: Report the probability of each supplier placing within the best top_k ranks
+
+    Returns:
+        dict: base ranks, per-supplier rank probabilities (n x n, rank 1 first), mean/std rank,
+              stability intervals, top-k probabilities and sampled weight statistics
+    """
+    base = np.asarray(base_weights, dtype=np.float64)
+    if base.shape != (len(flows.criteria),):
+        raise ValueError(f"Base weights need {len(flows.criteria)} values, got {base.size}")
+    if n_samples < 1:
+        raise ValueError("n_samples must be >= 1")
+    if not 0 < interval <= 1:
+        raise ValueError("interval must be in (0, 1]")
+    if top_k < 1:
+        raise ValueError("top_k must be >= 1")
+
+    n = len(flows.suppliers)
+    rng = np.random.default_rng(seed)
+    counts = np.zeros(n * n, dtype=np.int64)  # supplier * n + rank position
+    weight_sum = np.zeros(base.size)
+    weight_sq_sum = np.zeros(base.size)
+    batch = max(1, MAX_BATCH_ELEMENTS // max(n, 1))
+    offsets = np.arange(n) * n
+
+    for start in range(0, n_samples, batch):
+        weights = sample_weights(base, min(batch, n_samples - start), method, concentration, spread, rng)
+        weight_sum += weights.sum(axis=0)
+        weight_sq_sum += (weights ** 2).sum(axis=0)
+        if n == 0:
+            continue
+        # Position of each supplier in each sampled ranking (0 = best); stable sort, so ties keep supplier
+        # order as in calculate_promethee_ii and CriterionFlows.weighted_flows
+        order = np.argsort(-(weights @ flows.criteria_net), axis=1, kind='stable')
+        positions = np.empty_like(order)
+        np.put_along_axis(positions, order, np.arange(n)[None, :], axis=1)
+        counts += np.bincount((positions + offsets).ravel(), minlength=n * n)
+
+    probabilities = counts.reshape(n, n) / n_samples
+    ranks = np.arange(1, n + 1)
+    mean_rank = probabilities @ ranks
+    std_rank = np.sqrt(np.maximum(probabilities @ ranks ** 2 - mean_rank ** 2, 0.0))
+
+    # Interval bounds from the cumulative rank distribution (no per-sample ranks kept)
+    cumulative = np.cumsum(probabilities, axis=1)
+    tail = (1 - interval) / 2
+    lower = np.argmax(cumulative > tail - 1e-12, axis=1) + 1 if n else np.zeros(0, dtype=int)
+    upper = np.argmax(cumulative >= 1 - tail - 1e-12, axis=1) + 1 if n else np.zeros(0, dtype=int)
+
+    base_order = flows.weighted_flows(base / base.sum())['ranking'][0]
+    base_rank = np.empty(n, dtype=int)
+    base_rank[base_order] = ranks
+
+    weight_mean = weight_sum / n_samples
+    return {
+        'suppliers': flows.suppliers,
+        'criteria_names': flows.criteria,
+        'n_samples': n_samples,
+        'method': method,
+        'base_weights': (base / base.sum()).tolist(),
+        'sampled_weight_mean': weight_mean.tolist(),
+        'sampled_weight_std': np.sqrt(np.maximum(weight_sq_sum / n_samples - weight_mean ** 2, 0.0)).tolist(),
+        'base_rank': base_rank.tolist(),
+        'mean_rank': mean_rank.tolist(),
+        'std_rank': std_rank.tolist(),
+        'rank_interval': {'probability': interval, 'lower': np.asarray(lower).tolist(),
+                          'upper': np.asarray(upper).tolist()},
+        'probability_base_rank': probabilities[np.arange(n), base_rank - 1].tolist(),
+        'top_k': top_k,
+        'probability_top_k': probabilities[:, :top_k].sum(axis=1).tolist(),
+        'rank_probabilities': probabilities
+    }
+
+
+def stability_table(result: Dict[str, Any], supplier_names: Dict[Any, str] = None) -> List[Dict[str, Any]]:
+    """Per-supplier rows of a rank_stability() result, ordered by base rank"""
+    supplier_names = supplier_names or {}
+    rows = []
+    for i, supplier in enumerate(result['suppliers']):
+        rows.append({
+            'supplier_id': supplier,
+            'supplier_name': supplier_names.get(supplier, f"Supplier {supplier}"),
+            'base_rank': result['base_rank'][i],
+            'mean_rank': result['mean_rank'][i],
+            'std_rank': result['std_rank'][i],
+            'rank_interval': [result['rank_interval']['lower'][i], result['rank_interval']['upper'][i]],
+            'probability_base_rank': result['probability_base_rank'][i],
+            'probability_top_k': result['probability_top_k'][i]
+        })
+    return sorted(rows, key=lambda row: row['base_rank'])
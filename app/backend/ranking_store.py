@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Columnar store for supplier ranking analysis.
+
+analyze_supplier_alternatives() produces a nested dict with one entry per alternative for every
+depot of every Pareto solution. RankingStore keeps the same data as flat numpy columns (one row
+per alternative, already in rank order) plus a small per-solution header, and renders the CSV,
+text and Parquet reports on demand as streams of chunks instead of files written on every run.
+"""
+
+import csv
+import io
+import os
+
+import numpy as np
+
+OPERATIONS = ('collection', 'delivery')
+
+DETAILED_COLUMNS = ['solution_id', 'epsilon', 'depot', 'rank', 'supplier', 'operation', 'cost_impact',
+                    'score_impact', 'new_cost', 'new_score', 'ranking_score', 'is_current']
+SUMMARY_COLUMNS = ['solution_id', 'depot', 'best_supplier', 'best_operation', 'best_cost_impact',
+                   'best_score_impact', 'best_ranking_score', 'num_alternatives']
+
+# Sortable columns for query(), with the direction that counts as "best first"
+QUERY_METRICS = {'ranking_score': 'desc', 'cost_impact': 'asc', 'score_impact': 'desc',
+                 'new_cost': 'asc', 'new_score': 'desc'}
+
+_ROW_FIELDS = ('supplier', 'cost_impact', 'score_impact', 'new_cost', 'new_score', 'ranking_score')
+
+
+class RankingStore:
+    """
+    Ranking analysis for one optimization run, stored column-wise
+
+    Row columns (length = total alternatives): solution (index into the header lists), depot,
+    rank (1-based within solution/depot), supplier, operation (index into OPERATIONS),
+    cost_impact, score_impact, new_cost, new_score, ranking_score, is_current.
+    """
+
+    def __init__(self, solutions, columns, ranking_metric="cost_effectiveness"):
+        self.solutions = solutions  # per-solution headers, in solution order
+        self.columns = columns
+        self.ranking_metric = ranking_metric
+
+    @classmethod
+    def from_analysis(cls, analysis_results, ranking_metric="cost_effectiveness"):
+        """Build a store from the dict returned by analyze_supplier_alternatives()"""
+        solutions = []
+        rows = {name: [] for name in ('solution', 'depot', 'rank', 'operation', 'is_current') + _ROW_FIELDS}
+
+        for position, (solution_id, analysis) in enumerate(analysis_results.items()):
+            solutions.append({
+                'solution_id': solution_id,
+                'epsilon': float(analysis['epsilon']),
+                'epsilons': list(analysis.get('epsilons', [analysis['epsilon']])),
+                'weakly_dominated': bool(analysis.get('weakly_dominated', False)),
+                'current_cost': float(analysis['current_cost']),
+                'current_score': float(analysis['current_score']),
+                'current_allocation': analysis['current_allocation']
+            })
+            for depot, alternatives in analysis['depot_alternatives'].items():
+                for rank, alt in enumerate(alternatives, start=1):
+                    rows['solution'].append(position)
+                    rows['depot'].append(depot)
+                    rows['rank'].append(rank)
+                    rows['operation'].append(OPERATIONS.index(alt['operation']))
+                    rows['is_current'].append(alt['is_current'])
+                    for field in _ROW_FIELDS:
+                        rows[field].append(alt[field])
+
+        columns = {
+            'solution': np.asarray(rows['solution'], dtype=np.int32),
+            'depot': np.asarray(rows['depot'], dtype=np.int32),
+            'rank': np.asarray(rows['rank'], dtype=np.int32),
+            'supplier': np.asarray(rows['supplier'], dtype=np.int32),
+            'operation': np.asarray(rows['operation'], dtype=np.int8),
+            'is_current': np.asarray(rows['is_current'], dtype=bool)
+        }
+        for field in _ROW_FIELDS[1:]:
+            columns[field] = np.asarray(rows[field], dtype=np.float64)
+        return cls(solutions, columns, ranking_metric)
+
+    def __len__(self):
+        return len(self.columns['rank'])
+
+    @property
+    def solution_ids(self):
+        return [s['solution_id'] for s in self.solutions]
+
+    def _position(self, solution_id):
+        for position, solution in enumerate(self.solutions):
+            if solution['solution_id'] == solution_id:
+                return position
+        raise KeyError(solution_id)
+
+    def _record(self, row):
+        """Row as the alternative dict produced by _analyze_depot_alternatives()"""
+        c = self.columns
+        return {
+            'depot': int(c['depot'][row]),
+            'supplier': int(c['supplier'][row]),
+            'operation': OPERATIONS[c['operation'][row]],
+            'cost_impact': float(c['cost_impact'][row]),
+            'score_impact': float(c['score_impact'][row]),
+            'new_cost': float(c['new_cost'][row]),
+            'new_score': float(c['new_score'][row]),
+            'ranking_score': float(c['ranking_score'][row]),
+            'is_current': bool(c['is_current'][row])
+        }
+
+    def solution_analysis(self, solution_id):
+        """Rebuild the nested analysis dict for one solution (KeyError if unknown)"""
+        position = self._position(solution_id)
+        header = self.solutions[position]
+        depot_alternatives = {}
+        for row in np.flatnonzero(self.columns['solution'] == position):
+            record = self._record(row)
+            depot_alternatives.setdefault(record['depot'], []).append(record)
+        return dict(header, depot_alternatives=depot_alternatives)
+
+    def _rows(self, top_n=None):
+        """Row indices in storage order, optionally limited to the top_n ranks per depot"""
+        if top_n is None:
+            return range(len(self))
+        return np.flatnonzero(self.columns['rank'] <= top_n)
+
+    def summary(self):
+        """Compact per-solution overview for API responses (no individual alternatives)"""
+        c = self.columns
+        best_rows = np.flatnonzero(c['rank'] == 1)
+        counts = np.bincount(c['solution'], minlength=len(self.solutions))
+        improving = np.bincount(c['solution'], weights=(c['ranking_score'] > 0) & ~c['is_current'],
+                                minlength=len(self.solutions))
+        best_score = np.full(len(self.solutions), -np.inf)
+        np.maximum.at(best_score, c['solution'][best_rows], c['ranking_score'][best_rows])
+
+        return {
+            'ranking_metric': self.ranking_metric,
+            'n_solutions': len(self.solutions),
+            'n_alternatives': len(self),
+            'depots': sorted(int(d) for d in np.unique(c['depot'])),
+            'solutions': [
+                {
+                    'solution_id': header['solution_id'],
+                    'epsilon': header['epsilon'],
+                    'n_alternatives': int(counts[position]),
+                    'n_improving_alternatives': int(improving[position]),
+                    'best_ranking_score': float(best_score[position]) if counts[position] else None
+                }
+                for position, header in enumerate(self.solutions)
+            ]
+        }
+
+    def query(self, solution_id=None, depot=None, metric='ranking_score', top_k=None, offset=0, limit=50):
+        """
+        Filter, order and page the stored alternatives
+
+        Args:
+            solution_id: Only alternatives for this solution (None for all)
+            depot: Only alternatives for this depot (None for all)
+            metric: Column that orders alternatives within each solution/depot; see QUERY_METRICS
+            top_k: Keep only the best top_k alternatives per solution/depot under metric
+            offset, limit: Page through the ordered result
+
+        Returns:
+            tuple: (total matching alternatives, list of alternative dicts for the page,
+                    each with solution_id and its rank under metric)
+        """
+        if metric not in QUERY_METRICS:
+            raise ValueError(f"Unsupported metric '{metric}'. Use one of {list(QUERY_METRICS)}")
+
+        c = self.columns
+        mask = np.ones(len(self), dtype=bool)
+        if solution_id is not None:
+            try:
+                mask &= c['solution'] == self._position(solution_id)
+            except KeyError:
+                mask[:] = False
+        if depot is not None:
+            mask &= c['depot'] == depot
+        rows = np.flatnonzero(mask)
+
+        # Order by solution, then depot, then metric (best first); lexsort sorts by the last key first
+        values = c[metric][rows] * (-1.0 if QUERY_METRICS[metric] == 'desc' else 1.0)
+        rows = rows[np.lexsort((rows, values, c['depot'][rows], c['solution'][rows]))]
+
+        group = c['solution'][rows].astype(np.int64) * (int(c['depot'].max(initial=0)) + 1) + c['depot'][rows]
+        group_start = np.flatnonzero(np.r_[True, group[1:] != group[:-1]]) if len(rows) else np.array([], dtype=int)
+        ranks = np.arange(len(rows)) - np.repeat(group_start, np.diff(np.r_[group_start, len(rows)])) + 1
+        if top_k is not None:
+            keep = ranks <= top_k
+            rows, ranks = rows[keep], ranks[keep]
+
+        page = slice(offset, offset + limit)
+        items = []
+        for row, rank in zip(rows[page], ranks[page]):
+            record = self._record(row)
+            record['solution_id'] = self.solutions[c['solution'][row]]['solution_id']
+            record['rank'] = int(rank)
+            items.append(record)
+        return len(rows), items
+
+    # ------------------------------------------------------------------
+    # Report renderers: each yields text chunks so responses can be streamed
+    # ------------------------------------------------------------------
+
+    def iter_detailed_csv(self, top_n=10, chunk_rows=1000):
+        """Detailed CSV (top_n alternatives per depot, all if None)"""
+        c = self.columns
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(DETAILED_COLUMNS)
+        for count, row in enumerate(self._rows(top_n), start=1):
+            header = self.solutions[c['solution'][row]]
+            writer.writerow([
+                header['solution_id'], header['epsilon'], c['depot'][row], c['rank'][row],
+                c['supplier'][row], OPERATIONS[c['operation'][row]], c['cost_impact'][row],
+                c['score_impact'][row], c['new_cost'][row], c['new_score'][row],
+                c['ranking_score'][row], bool(c['is_current'][row])
+            ])
+            if count % chunk_rows == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def iter_summary_csv(self):
+        """Best alternative per solution and depot"""
+        c = self.columns
+        first_rows = np.flatnonzero(c['rank'] == 1)
+        # Alternatives per (solution, depot) block: rows are contiguous, so diff the block starts
+        counts = np.diff(np.append(first_rows, len(self)))
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(SUMMARY_COLUMNS)
+        for row, count in zip(first_rows, counts):
+            writer.writerow([
+                self.solutions[c['solution'][row]]['solution_id'], c['depot'][row], c['supplier'][row],
+                OPERATIONS[c['operation'][row]], c['cost_impact'][row], c['score_impact'][row],
+                c['ranking_score'][row], int(count)
+            ])
+        yield buffer.getvalue()
+
+    def iter_text_report(self, top_n=3, detailed_top_n=10):
+        """Human-readable report with the top_n alternatives per depot"""
+        c = self.columns
+        yield "=" * 80 + "\n"
+        yield "SUPPLIER RANKING ANALYSIS REPORT\n"
+        yield "=" * 80 + "\n\n"
+        yield "Analysis Summary:\n"
+        yield f"- Total solutions analyzed: {len(self.solutions)}\n"
+        yield f"- Total depot-supplier alternatives evaluated: {len(self._rows(detailed_top_n))}\n\n"
+
+        for position, header in enumerate(self.solutions):
+            lines = [
+                f"SOLUTION {header['solution_id']} (Epsilon: {header['epsilon']:.2e})\n",
+                "-" * 50 + "\n",
+                f"Current Cost: {header['current_cost']:,.2f}\n",
+                f"Current Score: {header['current_score']:.2f}\n",
+                f"Current Allocation: {header['current_allocation']}\n\n"
+            ]
+            rows = np.flatnonzero(c['solution'] == position)
+            for row in rows:
+                rank = c['rank'][row]
+                if rank == 1:
+                    lines.append(f"  DEPOT {c['depot'][row]} - Top {top_n} Alternatives:\n")
+                if rank <= top_n:
+                    status = " (CURRENT)" if c['is_current'][row] else ""
+                    lines.append(f"    {rank}. Supplier {c['supplier'][row]} ({OPERATIONS[c['operation'][row]]}){status}\n")
+                    lines.append(f"       Cost Impact: {c['cost_impact'][row]:+,.2f}, Score Impact: {c['score_impact'][row]:+.2f}\n")
+                    lines.append(f"       New Cost: {c['new_cost'][row]:,.2f}, New Score: {c['new_score'][row]:.2f}\n")
+                    lines.append(f"       Ranking Score: {c['ranking_score'][row]:.4f}\n")
+                next_row = row + 1
+                if next_row == len(self) or c['rank'][next_row] == 1:
+                    lines.append("\n")
+            lines.append("\n" + "=" * 80 + "\n\n")
+            yield "".join(lines)
+
+    def to_parquet_bytes(self, top_n=None):
+        """
+        Detailed rows as Parquet, built straight from the columns
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        c = self.columns
+        rows = np.asarray(self._rows(top_n))
+        solution = c['solution'][rows]
+        solution_ids = np.asarray(self.solution_ids)
+        epsilons = np.asarray([s['epsilon'] for s in self.solutions], dtype=np.float64)
+        table = pa.table({
+            'solution_id': solution_ids[solution] if len(rows) else np.asarray([], dtype=np.int64),
+            'epsilon': epsilons[solution] if len(rows) else np.asarray([], dtype=np.float64),
+            'depot': c['depot'][rows],
+            'rank': c['rank'][rows],
+            'supplier': c['supplier'][rows],
+            'operation': pa.DictionaryArray.from_arrays(c['operation'][rows], list(OPERATIONS)),
+            'cost_impact': c['cost_impact'][rows],
+            'score_impact': c['score_impact'][rows],
+            'new_cost': c['new_cost'][rows],
+            'new_score': c['new_score'][rows],
+            'ranking_score': c['ranking_score'][rows],
+            'is_current': c['is_current'][rows]
+        })
+        sink = io.BytesIO()
+        pq.write_table(table, sink)
+        return sink.getvalue()
+
+    def write_reports(self, save_path="Output Data/"):
+        """
+        Write the detailed CSV, text report and summary CSV to save_path
+
+        Returns:
+            dict: File names keyed as 'detailed_csv', 'text_report' and 'summary_csv'
+        """
+        os.makedirs(save_path, exist_ok=True)
+        files = {
+            'detailed_csv': (f"{save_path}supplier_ranking_analysis.csv", self.iter_detailed_csv()),
+            'text_report': (f"{save_path}supplier_ranking_report.txt", self.iter_text_report()),
+            'summary_csv': (f"{save_path}supplier_ranking_summary.csv", self.iter_summary_csv())
+        }
+        for filename, chunks in files.values():
+            with open(filename, 'w', newline='') as f:
+                f.writelines(chunks)
+        return {key: filename for key, (filename, _) in files.items()}
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+In-process cache of small reference datasets (profile scoring configuration, latest BWM weights).
+
+They are read for nearly every supplier write and refresh but change only when an admin saves
+configuration. Each entry is stored with the table's data_versions counter at the time it was
+read; a lookup passes the current counter (one primary-key read) and only hits on an exact match.
+The counters are bumped by triggers on every write, whichever process makes it, so other worker
+processes see a changed version and reload.
+"""
+
+import pickle
+import threading
+from typing import Any, Dict, Tuple
+
+
+class ReferenceDataCache:
+    """
+    {table: (data version, value)} for one database file
+
+    Only committed data may be stored (see SupplierDatabase._cached_reference_data): a version seen
+    inside a transaction that is later rolled back is reused by the next write, with other content.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[int, bytes]] = {}  # values pickled: unpickling is a cheap deep copy
+        self._lock = threading.Lock()
+        self._metrics = {'hits': 0, 'misses': 0, 'stores': 0}
+
+    def get(self, table: str, version: int) -> Tuple[bool, Any]:
+        """
+        Returns:
+            tuple: (found, a private copy of the value); callers may modify what they get
+        """
+        with self._lock:
+            entry = self._entries.get(table)
+            if entry is None or entry[0] != version:
+                self._metrics['misses'] += 1
+                return False, None
+            self._metrics['hits'] += 1
+            value = entry[1]
+        return True, pickle.loads(value)
+
+    def put(self, table: str, version: int, value: Any):
+        with self._lock:
+            current = self._entries.get(table)
+            if current is None or current[0] <= version:
+                self._entries[table] = (version, pickle.dumps(value))
+                self._metrics['stores'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._metrics, versions={table: entry[0] for table, entry in self._entries.items()})
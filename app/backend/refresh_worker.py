@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Background refresh of unified criteria scores.
+
+Writes that change a supplier's inputs enqueue its id instead of starting a thread each. A single
+long-lived worker waits until the queue has been quiet for a short debounce window, then
+refreshes the pending suppliers in batched transactions. An id enqueued again while still pending
+is refreshed once. The ids of a failed batch are queued again and retried after an exponential
+backoff, up to a retry limit.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable
+
+# Quiet period after the last enqueue before a batch starts
+DEFAULT_DEBOUNCE = 0.05
+
+# Upper bound on how long a pending id can be held back by a steady stream of enqueues
+DEFAULT_MAX_DELAY = 1.0
+
+# Suppliers refreshed per transaction
+DEFAULT_MAX_BATCH = 200
+
+# Retries of a supplier whose refresh batch failed before it is dropped
+DEFAULT_MAX_RETRIES = 3
+
+# Wait before the first retry; doubled for every further failed attempt
+DEFAULT_RETRY_BACKOFF = 0.5
+
+
+class UnifiedScoresRefreshWorker:
+    """
+    Coalescing queue plus one daemon thread refreshing unified scores for a SupplierDatabase
+
+    The thread starts on the first enqueue. Latest BWM criteria are read once per batch; without
+    BWM weights the batch is dropped with a warning (nothing to refresh against). After a failed
+    batch no batch starts until its backoff has passed (flushes wait for it too; stopping does not).
+    """
+
+    def __init__(self, db, debounce: float = DEFAULT_DEBOUNCE, max_delay: float = DEFAULT_MAX_DELAY,
+                 max_batch: int = DEFAULT_MAX_BATCH, max_retries: int = DEFAULT_MAX_RETRIES,
+                 retry_backoff: float = DEFAULT_RETRY_BACKOFF):
+        self.db = db
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._pending = OrderedDict()  # supplier_id -> (first enqueue time, trigger sources), oldest first
+        self._attempts = {}  # supplier_id -> failed refresh attempts so far
+        self._retry_after = 0.0
+        self._last_enqueue = 0.0
+        self._in_flight = 0
+        self._flush_requests = 0
+        self._stopping = False
+        self._thread = None
+        self._condition = threading.Condition()
+        self._metrics = {
+            'enqueued': 0,
+            'coalesced': 0,
+            'refreshed': 0,
+            'batches': 0,
+            'failed_batches': 0,
+            'retried': 0,
+            'dropped_after_retries': 0,
+            'skipped_no_weights': 0,
+            'last_batch_size': 0,
+            'last_batch_ms': 0.0,
+            'last_lag_ms': 0.0,
+            'max_lag_ms': 0.0
+        }
+
+    def enqueue(self, supplier_ids: Iterable[int], trigger_source: str = "manual"):
+        """Schedule suppliers for a refresh; ids already pending are not queued twice"""
+        now = time.monotonic()
+        with self._condition:
+            if self._stopping:
+                return
+            for supplier_id in supplier_ids:
+                self._metrics['enqueued'] += 1
+                if supplier_id in self._pending:
+                    self._metrics['coalesced'] += 1
+                    self._pending[supplier_id][1].add(trigger_source)
+                else:
+                    self._pending[supplier_id] = (now, {trigger_source})
+            self._last_enqueue = now
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="unified-scores-refresh", daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def _ready(self, now: float) -> bool:
+        if not self._pending:
+            return False
+        if self._stopping:
+            return True
+        if now < self._retry_after:
+            return False
+        oldest = next(iter(self._pending.values()))[0]
+        return (self._flush_requests > 0 or now - self._last_enqueue >= self.debounce
+                or now - oldest >= self.max_delay)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._ready(time.monotonic()):
+                    if self._stopping and not self._pending:
+                        return
+                    timeout = None
+                    if self._pending:
+                        oldest = next(iter(self._pending.values()))[0]
+                        now = time.monotonic()
+                        deadline = max(min(self._last_enqueue + self.debounce, oldest + self.max_delay),
+                                       self._retry_after)
+                        timeout = max(deadline - now, 0.001)
+                    self._condition.wait(timeout)
+                batch = []
+                while self._pending and len(batch) < self.max_batch:
+                    batch.append(self._pending.popitem(last=False))
+                self._in_flight = len(batch)
+            try:
+                self._refresh(batch)
+            finally:
+                with self._condition:
+                    self._in_flight = 0
+                    self._condition.notify_all()
+
+    def _refresh(self, batch):
+        started = time.monotonic()
+        supplier_ids = [supplier_id for supplier_id, _ in batch]
+        sources = sorted(set().union(*(entry[1] for _, entry in batch)))
+        try:
+            bwm_data = self.db.get_latest_bwm_weights()
+            if not bwm_data:
+                print(f"Warning: No BWM weights found for unified scores refresh of {len(batch)} suppliers")
+                with self._condition:
+                    self._metrics['skipped_no_weights'] += len(batch)
+                return
+            self.db.refresh_unified_scores_for_suppliers(supplier_ids, bwm_data['criteria_names'], ",".join(sources))
+            failed = False
+        except Exception as e:
+            print(f"Background refresh warning: Failed to refresh unified scores for suppliers {supplier_ids}: {e}")
+            failed = True
+
+        finished = time.monotonic()
+        lag_ms = (finished - min(entry[0] for _, entry in batch)) * 1000
+        with self._condition:
+            self._metrics['batches'] += 1
+            self._metrics['last_batch_size'] = len(batch)
+            self._metrics['last_batch_ms'] = round((finished - started) * 1000, 3)
+            if failed:
+                self._metrics['failed_batches'] += 1
+                self._requeue(batch, finished)
+            else:
+                for supplier_id in supplier_ids:
+                    self._attempts.pop(supplier_id, None)
+                self._metrics['refreshed'] += len(batch)
+                self._metrics['last_lag_ms'] = round(lag_ms, 3)
+                self._metrics['max_lag_ms'] = round(max(self._metrics['max_lag_ms'], lag_ms), 3)
+
+    def _requeue(self, batch, now: float):
+        # Called with the condition held. Retried ids go back to the front: they are the oldest pending
+        attempts = 0
+        for supplier_id, (first_enqueued, sources) in reversed(batch):
+            attempt = self._attempts.get(supplier_id, 0) + 1
+            if attempt > self.max_retries:
+                self._attempts.pop(supplier_id, None)
+                self._metrics['dropped_after_retries'] += 1
+                print(f"Background refresh warning: Giving up on unified scores of supplier {supplier_id} "
+                      f"after {attempt} failed attempts")
+                continue
+            self._attempts[supplier_id] = attempt
+            attempts = max(attempts, attempt)
+            if supplier_id in self._pending:  # enqueued again meanwhile
+                sources = sources | self._pending[supplier_id][1]
+            self._pending[supplier_id] = (first_enqueued, sources)
+            self._pending.move_to_end(supplier_id, last=False)
+            self._metrics['retried'] += 1
+        if attempts:
+            self._retry_after = now + self.retry_backoff * 2 ** (attempts - 1)
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Refresh everything pending now, skipping the debounce, and wait for it to finish
+
+        Returns:
+            bool: False if the timeout expired first
+        """
+        with self._condition:
+            self._flush_requests += 1
+            self._condition.notify_all()
+            try:
+                return self._condition.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+            finally:
+                self._flush_requests -= 1
+
+    def stop(self, flush: bool = True, timeout: float = 5.0):
+        """Stop the thread, by default after refreshing what is still pending"""
+        with self._condition:
+            if not flush:
+                self._pending.clear()
+            self._stopping = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, age of the oldest pending id and refresh counters/lag (milliseconds)"""
+        with self._condition:
+            now = time.monotonic()
+            oldest = next(iter(self._pending.values()))[0] if self._pending else None
+            return dict(self._metrics,
+                        queue_depth=len(self._pending),
+                        in_flight=self._in_flight,
+                        oldest_pending_ms=round((now - oldest) * 1000, 3) if oldest is not None else 0.0,
+                        running=self._thread is not None and self._thread.is_alive())
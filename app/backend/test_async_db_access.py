@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for running database operations off the event loop (run_db_operation)
+"""
+
+import sys
+import os
+import time
+import asyncio
+import threading
+import sqlite3
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import unified_api
+from unified_api import run_db_operation
+
+
+def test_slow_operation_does_not_block_the_event_loop():
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        tick_task = asyncio.create_task(ticker())
+        result = await run_db_operation(lambda: time.sleep(0.3) or threading.current_thread().name)
+        tick_task.cancel()
+        return result, ticks
+
+    thread_name, ticks = asyncio.run(scenario())
+    assert thread_name.startswith("db")
+    assert ticks >= 10  # the loop kept running while the operation slept in the pool
+
+
+def test_errors_map_like_execute_db_operation():
+    def locked():
+        raise sqlite3.OperationalError("database is locked")
+
+    def not_found():
+        raise HTTPException(status_code=404, detail="Supplier not found")
+
+    with pytest.raises(HTTPException) as busy:
+        asyncio.run(run_db_operation(locked))
+    assert busy.value.status_code == 503
+    with pytest.raises(HTTPException) as missing:
+        asyncio.run(run_db_operation(not_found))
+    assert missing.value.status_code == 404
+
+
+def test_pending_limit_rejects_instead_of_queueing(monkeypatch):
+    monkeypatch.setattr(unified_api, "DB_EXECUTOR_MAX_PENDING", 2)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.create_task(run_db_operation(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as rejected:
+            await run_db_operation(lambda: None)
+        assert unified_api.db_executor_stats()["pending"] == 2
+        release.set()
+        return rejected.value.status_code, await asyncio.gather(*running)
+
+    status, results = asyncio.run(scenario())
+    assert status == 503 and results == [True, True]
+    assert unified_api.db_executor_stats()["pending"] == 0
+
+
+def test_endpoints_run_through_the_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(unified_api, "DB_PATH", str(tmp_path / "async.db"))
+    with TestClient(unified_api.app) as client:  # lifespan: opens the database, stops the pools after
+        created = client.post("/api/suppliers/", json={"name": "Supplier A", "email": "a@example.com"})
+        assert created.status_code == 200, created.text
+        listed = client.get("/api/suppliers/")
+        assert [s["name"] for s in listed.json()["suppliers"]] == ["Supplier A"]
+        assert client.get("/api/health").json()["db_executor"]["pending"] == 0
+    assert unified_api._db_executor is None
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the analytic linear-BWM solver, verified against the HiGHS LP on randomised inputs.
+"""
+
+import sys
+import os
+import random
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from best_worst_method import BestWorstMethod, calculate_bwm_weights, calculate_bwm_weight_intervals
+
+
+def random_bwm(rng, n):
+    criteria = [f"c{i}" for i in range(n)]
+    best, worst = rng.sample(criteria, 2)
+    bwm = BestWorstMethod()
+    bwm.set_criteria(criteria)
+    bwm.set_best_worst(best, worst)
+    bwm.set_best_to_others({c: rng.choice([rng.randint(1, 9), round(rng.uniform(1, 9), 2)]) for c in criteria})
+    bwm.set_others_to_worst({c: rng.choice([rng.randint(1, 9), round(rng.uniform(1, 9), 2)]) for c in criteria})
+    return bwm
+
+
+def test_analytic_matches_lp_on_random_inputs():
+    rng = random.Random(41)
+    for _ in range(500):
+        bwm = random_bwm(rng, rng.randint(2, 9))
+        lp_weights, lp_xi = bwm._solve_lp()
+        weights, xi = bwm.calculate_weights(method="analytic")
+
+        assert bwm.solver == "analytic"
+        assert xi == pytest.approx(lp_xi, abs=1e-9)
+        assert bwm._satisfies_constraints(np.array(list(weights.values())), xi, 1e-9)
+
+
+def test_consistent_comparisons_have_zero_xi():
+    result = calculate_bwm_weights(["Price", "Quality", "Delivery"], "Price", "Delivery",
+                                   {"Quality": 2, "Delivery": 4}, {"Price": 4, "Quality": 2}, method="analytic")
+    assert result["consistency_ratio"] == pytest.approx(0.0, abs=1e-12)
+    assert result["weights"] == pytest.approx({"Price": 4 / 7, "Quality": 2 / 7, "Delivery": 1 / 7})
+    assert result["solver"] == "analytic"
+
+
+def test_lp_remains_the_default_and_bad_method_is_rejected():
+    bwm = random_bwm(random.Random(1), 4)
+    bwm.calculate_weights()
+    assert bwm.solver == "highs"
+    with pytest.raises(ValueError):
+        bwm.calculate_weights(method="simplex")
+
+
+def test_api_uses_the_library_default_solver(tmp_path, monkeypatch):
+    import unified_api
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(unified_api, "DB_PATH", str(tmp_path / "bwm.db"))
+    args = (["Price", "Quality", "Delivery"], "Price", "Delivery",
+            {"Quality": 3, "Delivery": 5}, {"Price": 5, "Quality": 2})
+    with TestClient(unified_api.app) as client:
+        response = client.post("/api/bwm/calculate/", json=dict(zip(
+            ["criteria", "best_criterion", "worst_criterion", "best_to_others", "others_to_worst"], args)))
+
+    assert response.status_code == 200, response.text
+    data, expected = response.json()["data"], calculate_bwm_weights(*args)
+    assert data["solver"] == expected["solver"] == "highs"
+    assert data["weights"] == pytest.approx(expected["weights"])
+
+
+def test_weight_intervals_contain_the_solution_and_centre_is_optimal():
+    rng = random.Random(42)
+    for n in (3, 6, 16):
+        bwm = random_bwm(rng, n)
+        intervals = bwm.calculate_weight_intervals()
+        weights = np.array(list(bwm.weights.values()))
+        centre = np.array([intervals["centre_weights"][c] for c in bwm.criteria])
+
+        for i, criterion in enumerate(bwm.criteria):
+            low, high = intervals["weight_intervals"][criterion]
+            assert low - 1e-9 <= weights[i] <= high + 1e-9
+            assert low - 1e-9 <= centre[i] <= high + 1e-9
+        assert centre.sum() == pytest.approx(1.0)
+        assert bwm._satisfies_constraints(centre, intervals["consistency_ratio"], 1e-9)
+        assert intervals["unique_solution"] == (intervals["max_interval_width"] <= 1e-9)
+
+
+def test_interval_convenience_function_reports_solver_vertex():
+    result = calculate_bwm_weight_intervals(["Price", "Quality", "Delivery"], "Price", "Delivery",
+                                            {"Quality": 2, "Delivery": 5}, {"Price": 5, "Quality": 3})
+    assert result["unique_solution"]
+    assert result["weights"] == pytest.approx(result["solver_weights"], abs=1e-12)
+    assert set(result["weight_intervals"]) == {"Price", "Quality", "Delivery"}
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for the batch Best-Worst Method solver: one block-diagonal LP must reproduce the
+per-respondent solutions.
+"""
+
+import sys
+import os
+import random
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from best_worst_method import aggregate_weights, calculate_bwm_weights, calculate_bwm_weights_batch
+from process_pool import get_process_pool
+
+
+def random_respondents(criteria, count, seed):
+    rng = random.Random(seed)
+    respondents = []
+    for _ in range(count):
+        best, worst = rng.sample(criteria, 2)
+        respondents.append({
+            "best_criterion": best,
+            "worst_criterion": worst,
+            "best_to_others": {c: rng.randint(1, 9) for c in criteria},
+            "others_to_worst": {c: rng.randint(1, 9) for c in criteria}
+        })
+    return respondents
+
+
+def test_batch_matches_individual_solutions():
+    for n in (2, 4, 7):
+        criteria = [f"c{i}" for i in range(n)]
+        respondents = random_respondents(criteria, 40, seed=n)
+        batch = calculate_bwm_weights_batch(criteria, respondents)
+
+        for respondent, result in zip(respondents, batch["respondents"]):
+            single = calculate_bwm_weights(criteria, respondent["best_criterion"], respondent["worst_criterion"],
+                                           respondent["best_to_others"], respondent["others_to_worst"])
+            assert result["consistency_ratio"] == pytest.approx(single["consistency_ratio"], abs=1e-9)
+            assert sum(result["weights"].values()) == pytest.approx(1.0)
+            assert result["best_to_others"][respondent["best_criterion"]] == 1.0
+            assert result["solver"] == "highs"
+        assert batch["respondents"][0]["respondent"] == "Respondent 1"
+        assert sum(batch["group_weights"].values()) == pytest.approx(1.0)
+
+
+def test_process_pool_method_gives_same_consistency(monkeypatch):
+    criteria = ["Price", "Quality", "Delivery"]
+    respondents = random_respondents(criteria, 6, seed=1)
+    sparse_result = calculate_bwm_weights_batch(criteria, respondents)
+    pool = get_process_pool()
+    submitted = []
+    monkeypatch.setattr(pool, "submit", lambda *args: submitted.append(args) or type(pool).submit(pool, *args))
+    pool_result = calculate_bwm_weights_batch(criteria, respondents, method="pool", workers=2)
+    assert len(submitted) == len(respondents)  # solved on the shared pool, not one created per call
+    assert [r["consistency_ratio"] for r in pool_result["respondents"]] == \
+        pytest.approx([r["consistency_ratio"] for r in sparse_result["respondents"]], abs=1e-9)
+
+
+def test_aggregation_and_validation():
+    weights = np.array([[0.5, 0.3, 0.2], [0.2, 0.3, 0.5]])
+    assert aggregate_weights(weights, "arithmetic").tolist() == pytest.approx([0.35, 0.3, 0.35])
+    geometric = aggregate_weights(weights, "geometric")
+    assert geometric.sum() == pytest.approx(1.0) and geometric[0] == pytest.approx(geometric[2])
+
+    criteria = ["Price", "Quality"]
+    incomplete = {"best_criterion": "Price", "worst_criterion": "Quality",
+                  "best_to_others": {"Quality": 3}, "others_to_worst": {}}
+    with pytest.raises(ValueError, match="Respondent 0"):
+        calculate_bwm_weights_batch(criteria, [incomplete])
+    with pytest.raises(ValueError):
+        calculate_bwm_weights_batch(criteria, [])
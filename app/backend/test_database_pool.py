@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for the SupplierDatabase connection pool and user_version schema migrations
+"""
+
+import sys
+import os
+import sqlite3
+import threading
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import SupplierDatabase
+
+
+def test_schema_version_recorded_and_migrations_run_once(tmp_path, monkeypatch):
+    path = str(tmp_path / "pool.db")
+    db = SupplierDatabase(path)
+    with db.get_connection() as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SupplierDatabase.SCHEMA_VERSION
+
+    calls = []
+    monkeypatch.setattr(SupplierDatabase, 'init_database', lambda self: calls.append(self.db_path))
+    again = SupplierDatabase(path)
+    assert calls == []  # pool (and schema) already set up for this file
+    assert again._pool is db._pool
+    db.close()
+
+
+def test_untracked_database_is_adopted(tmp_path):
+    # A file written before user_version was tracked: full tables, no data_versions, version 0
+    path = tmp_path / "legacy.db"
+    db = SupplierDatabase(str(path))
+    db.add_supplier("Existing")
+    db.close()
+    conn = sqlite3.connect(path)
+    for (trigger,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall():
+        conn.execute(f"DROP TRIGGER {trigger}")
+    conn.execute("DROP TABLE data_versions")
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+    conn.close()
+
+    db = SupplierDatabase(str(path))
+    assert [s['name'] for s in db.get_suppliers()] == ['Existing']
+    assert set(db.get_data_versions()) == set(SupplierDatabase.VERSIONED_TABLES)
+    assert sqlite3.connect(path).execute("PRAGMA user_version").fetchone()[0] == SupplierDatabase.SCHEMA_VERSION
+    db.close()
+
+
+def test_connections_are_reused_and_configured_once(tmp_path):
+    db = SupplierDatabase(str(tmp_path / "reuse.db"))
+    with db.get_connection() as first:
+        assert first.execute("PRAGMA busy_timeout").fetchone()[0] == 30000
+        with db.get_connection() as nested:
+            assert nested is first  # same thread, same connection
+    for _ in range(20):
+        db.get_suppliers()
+    with db.get_connection() as later:
+        assert later is first
+    assert db.pool_stats()['opened'] == 1
+    db.close()
+
+
+def test_open_transaction_rolled_back_on_release(tmp_path):
+    db = SupplierDatabase(str(tmp_path / "rollback.db"))
+    with pytest.raises(RuntimeError):
+        with db.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT INTO suppliers (name) VALUES ('Half written')")
+            raise RuntimeError("caller failed mid-transaction")
+    with db.get_connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM suppliers").fetchone()[0] == 0
+    db.close()
+
+
+def test_pool_is_bounded_across_threads(tmp_path):
+    db = SupplierDatabase(str(tmp_path / "bounded.db"), pool_size=2)
+    db.close()
+    db = SupplierDatabase(str(tmp_path / "bounded.db"), pool_size=2)
+    errors = []
+    barrier = threading.Barrier(6)
+
+    def worker(i):
+        try:
+            barrier.wait()
+            for j in range(10):
+                db.add_supplier(f"Supplier {i}-{j}")
+                db.get_suppliers()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(db.get_suppliers()) == 60
+    assert db.pool_stats()['opened'] <= 2
+    db.close()
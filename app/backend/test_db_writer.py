@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Tests for the single writer thread: write routing, group commit and per-write error isolation
+"""
+
+import sys
+import os
+import re
+import inspect
+import asyncio
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import unified_api
+from database import SupplierDatabase
+from db_writer import after_rollback
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SupplierDatabase(str(tmp_path / "writer.db"))
+    yield db
+    db.close()
+
+
+def supplier_names(db):
+    return sorted(supplier['name'] for supplier in db.get_suppliers())
+
+
+def hold_writer(db):
+    """Block the writer thread until the returned event is set, so following writes queue up"""
+    started, release = threading.Event(), threading.Event()
+    db.writer.submit(lambda: started.set() or release.wait(10))
+    assert started.wait(10)
+    return release
+
+
+def test_concurrent_writers_get_no_lock_errors(db):
+    depot = db.add_depot("Depot A", annual_volume=1000.0)
+
+    def write(i):
+        supplier = db.add_supplier(f"Supplier {i:03d}")
+        db.submit_supplier_data(supplier, depot, {'zone_differential': i / 100})
+        return supplier
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        ids = list(pool.map(write, range(200)))  # raises if any write failed
+
+    assert len(set(ids)) == 200
+    assert len(db.get_supplier_submissions(status='pending')) == 200
+    metrics = db.writer.metrics()
+    assert metrics['failed'] == 0 and metrics['queue_depth'] == 0
+    assert metrics['committed'] == 401
+    assert metrics['transactions'] < metrics['committed']  # concurrent writes shared commits
+
+
+def test_queued_writes_share_one_transaction(db):
+    release = hold_writer(db)
+    futures = [db.writer.submit(db.add_supplier, f"Supplier {i}") for i in range(10)]
+    transactions = db.writer.metrics()['transactions']
+    release.set()
+
+    assert sorted(future.result(10) for future in futures) == list(range(1, 11))
+    metrics = db.writer.metrics()
+    # The held write's own transaction, then one for all ten
+    assert metrics['transactions'] == transactions + 2 and metrics['last_batch_size'] == 10
+
+
+def test_failed_write_is_rolled_back_alone(db):
+    def insert_then_fail():
+        with db.get_connection() as conn:
+            conn.execute("INSERT INTO suppliers (name) VALUES ('Half written')")
+        raise ValueError("validation failed")
+
+    release = hold_writer(db)
+    before = db.writer.submit(db.add_supplier, "Before")
+    failing = db.writer.submit(insert_then_fail)
+    after = db.writer.submit(db.add_supplier, "After")
+    release.set()
+
+    with pytest.raises(ValueError):
+        failing.result(10)
+    assert before.result(10) and after.result(10)
+    assert supplier_names(db) == ["After", "Before"]
+    assert db.writer.metrics()['failed'] == 1
+
+
+def test_writes_of_a_transaction_lost_to_sqlite_all_fail(db):
+    def io_error():
+        # What SQLite leaves behind after e.g. SQLITE_IOERR or SQLITE_FULL mid-transaction: the whole
+        # transaction rolled back, not just the failing statement
+        db.writer.connection.execute("ROLLBACK")
+        raise sqlite3.OperationalError("disk I/O error")
+
+    release = hold_writer(db)
+    before = db.writer.submit(db.add_supplier, "Before")
+    failing = db.writer.submit(io_error)
+    after = db.writer.submit(db.add_supplier, "After")
+    release.set()
+
+    with pytest.raises(sqlite3.OperationalError, match="disk I/O error"):
+        failing.result(10)
+    with pytest.raises(sqlite3.OperationalError, match="rolled back"):
+        before.result(10)
+    assert after.result(10)
+    assert supplier_names(db) == ["After"]
+    assert db.writer.metrics()['lost_transactions'] == 1
+
+
+def test_after_rollback_writes_survive_the_failed_write(db):
+    def insert(name):
+        with db.get_connection() as conn:
+            conn.execute("INSERT INTO suppliers (name) VALUES (?)", (name,))
+
+    def write(name, fail):
+        insert(name)
+        after_rollback(lambda: insert(f"{name} failed"))
+        if fail:
+            raise ValueError("validation failed")
+
+    release = hold_writer(db)
+    failing = db.writer.submit(write, "Rejected", True)
+    passing = db.writer.submit(write, "Accepted", False)
+    release.set()
+
+    with pytest.raises(ValueError):
+        failing.result(10)
+    passing.result(10)
+    assert supplier_names(db) == ["Accepted", "Rejected failed"]
+
+
+def test_write_methods_run_on_the_writer_thread(db):
+    threads = []
+    original = db.writer.connection
+
+    with db.get_connection() as reader:
+        reader.set_trace_callback(lambda statement: threads.append(('reader', statement)))
+        original.set_trace_callback(lambda statement: threads.append((threading.current_thread().name, statement)))
+        supplier = db.add_supplier("Supplier A")
+        db.update_supplier_profile(supplier, {'geographical_network': 'National'})
+        reader.set_trace_callback(None)
+        original.set_trace_callback(None)
+
+    writes = [(name, statement) for name, statement in threads
+              if re.match(r'\s*(INSERT|UPDATE|DELETE)', statement, re.IGNORECASE)]
+    assert writes and all(name == "db-writer" for name, _ in writes)
+    # Committed by the time the call returns, visible to a reader connection
+    assert db.get_supplier_by_id(supplier)['geographical_network'] == 'National'
+
+
+def test_every_writing_method_is_a_write_operation():
+    writes_sql = re.compile(r'\b(INSERT (OR \w+ )?INTO|UPDATE \w+ SET|DELETE FROM)\b')
+    unrouted = [name for name, method in inspect.getmembers(SupplierDatabase, inspect.isfunction)
+                if not name.startswith('_migrate')  # run once at startup, before any writer exists
+                and writes_sql.search(' '.join(inspect.getsource(method).split()))
+                and not getattr(method, 'write_operation', False)]
+    assert unrouted == []
+
+
+def test_close_commits_queued_writes(tmp_path):
+    path = str(tmp_path / "drain.db")
+    db = SupplierDatabase(path)
+    release = hold_writer(db)
+    futures = [db.writer.submit(db.add_supplier, f"Supplier {i}") for i in range(5)]
+    threading.Timer(0.1, release.set).start()
+    db.close()
+    assert all(future.done() for future in futures)
+
+    db = SupplierDatabase(path)
+    assert len(supplier_names(db)) == 5
+    db.close()
+
+
+def test_async_writes_await_the_writer_future(db):
+    async def scenario():
+        return await asyncio.gather(*(unified_api.run_db_operation(db.add_supplier, f"Supplier {i}")
+                                      for i in range(20)))
+
+    submitted = db.writer.metrics()['submitted']
+    ids = asyncio.run(scenario())
+    assert sorted(ids) == list(range(1, 21))
+    assert db.writer.metrics()['submitted'] == submitted + 20
+    assert unified_api.db_executor_stats()['pending'] == 0
+
+
+def test_full_write_queue_is_reported_as_busy(db, monkeypatch):
+    release = hold_writer(db)
+    monkeypatch.setattr(db.writer, 'max_queue', 1)
+    queued = db.writer.submit(db.add_supplier, "Queued")
+    with pytest.raises(unified_api.HTTPException) as busy:
+        asyncio.run(unified_api.run_db_operation(db.add_supplier, "Rejected"))
+    release.set()
+    assert busy.value.status_code == 503
+    assert queued.result(10) and supplier_names(db) == ["Queued"]
+    assert db.writer.metrics()['rejected'] == 1
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests that CPU-heavy endpoints do their computation off the event loop
+"""
+
+import sys
+import os
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import process_pool
+import unified_api
+
+CRITERIA = ['a', 'b']
+SCORES = {s: {'a': float(s % 5), 'b': float(s % 3)} for s in range(20)}
+
+
+def on_event_loop():
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def traced(calls, name, func):
+    """func, recording (name, ran on the event loop) per call"""
+    def wrapper(*args, **kwargs):
+        calls.append((name, on_event_loop()))
+        return func(*args, **kwargs)
+    return wrapper
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(unified_api, "load_promethee_supplier_scores", lambda db, criteria: (SCORES, {}, {}))
+    monkeypatch.setattr(unified_api, "DB_PATH", str(tmp_path / "offload.db"))
+    unified_api.criterion_flow_cache.clear()
+    with TestClient(unified_api.app) as client:
+        yield client
+
+
+def test_sensitivity_runs_off_the_event_loop(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(unified_api, "rank_stability", traced(calls, "sampling", unified_api.rank_stability))
+    monkeypatch.setattr(unified_api.criterion_flow_cache, "get_or_compute",
+                        traced(calls, "flows", unified_api.criterion_flow_cache.get_or_compute))
+
+    response = client.post("/api/promethee/sensitivity",
+                           json={"criteria_names": CRITERIA, "criteria_weights": [0.5, 0.5], "n_samples": 500})
+
+    assert response.status_code == 200, response.text
+    assert calls == [("flows", False), ("sampling", False)]
+
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_scenarios_run_off_the_event_loop(client, monkeypatch, workers):
+    calls = []
+    monkeypatch.setattr(unified_api, "evaluate_scenarios", traced(calls, "evaluate", unified_api.evaluate_scenarios))
+    monkeypatch.setattr(process_pool, "wait", traced(calls, "pool wait", process_pool.wait))
+
+    response = client.post("/api/promethee/scenarios", json={
+        "criteria_names": CRITERIA, "criteria_weights": [0.5, 0.5], "workers": workers,
+        "scenarios": [{"name": "default"}, {"preference_functions": {"a": "usual", "b": "usual"}}]})
+
+    assert response.status_code == 200, response.text
+    assert calls[0] == ("evaluate", False)
+    assert all(not on_loop for _, on_loop in calls)
+    assert any(name == "pool wait" for name, _ in calls) == (workers is not None)
+
+
+@pytest.mark.parametrize('method', ['sparse', 'pool'])
+def test_bwm_batches_run_off_the_event_loop(client, monkeypatch, method):
+    calls = []
+    monkeypatch.setattr(unified_api, "calculate_bwm_weights_batch",
+                        traced(calls, "batch", unified_api.calculate_bwm_weights_batch))
+    monkeypatch.setattr(process_pool, "wait", traced(calls, "pool wait", process_pool.wait))
+    respondent = {"best_criterion": "Price", "worst_criterion": "Quality",
+                  "best_to_others": {"Price": 1, "Quality": 4}, "others_to_worst": {"Price": 4, "Quality": 1}}
+
+    response = client.post("/api/bwm/calculate-batch", json={
+        "criteria": ["Price", "Quality"], "respondents": [respondent] * 3, "method": method, "workers": 2})
+
+    assert response.status_code == 200, response.text
+    assert calls[0] == ("batch", False) and all(not on_loop for _, on_loop in calls)
+    assert any(name == "pool wait" for name, _ in calls) == (method == "pool")
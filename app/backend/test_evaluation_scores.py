@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for the normalised supplier_evaluation_scores table and the GROUP BY survey aggregation
+"""
+
+import sys
+import os
+import json
+import random
+import sqlite3
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import SupplierDatabase
+
+CRITERIA = ['Quality', ' Service ', 'Price']
+
+
+def json_survey_scores(db, criteria_names):
+    """Aggregation straight from the JSON column, as it was done before the long table existed"""
+    collected = {}
+    for evaluation in db.get_supplier_evaluations():
+        scores = evaluation['criteria_scores']
+        scores = json.loads(scores) if isinstance(scores, str) else scores
+        for name, score in scores.items():
+            match = next((c for c in criteria_names if c.strip() == name.strip()), None)
+            if match and isinstance(score, (int, float)) and not isinstance(score, bool):  # non-numeric entries skipped
+                collected.setdefault(evaluation['supplier_id'], {}).setdefault(match, []).append(score)
+    return {supplier: {criterion: (sum(s) / len(s), len(s)) for criterion, s in by_criterion.items()}
+            for supplier, by_criterion in collected.items()}
+
+
+def sql_survey_scores(db, criteria_names):
+    return {supplier: {criterion: (data['score'], data['evaluations_count']) for criterion, data in by_criterion.items()}
+            for supplier, by_criterion in db._get_survey_scores(criteria_names).items()}
+
+
+def assert_same(db):
+    expected = json_survey_scores(db, CRITERIA)
+    actual = sql_survey_scores(db, CRITERIA)
+    assert set(actual) == set(expected)
+    for supplier in expected:
+        assert set(actual[supplier]) == set(expected[supplier])
+        for criterion, (score, count) in expected[supplier].items():
+            assert actual[supplier][criterion][0] == pytest.approx(score)
+            assert actual[supplier][criterion][1] == count
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SupplierDatabase(str(tmp_path / "evaluations.db"))
+    db.suppliers = [db.add_supplier(f"Supplier {i}") for i in range(4)]
+    yield db
+    db.close()
+
+
+def test_long_table_follows_every_write_path(db):
+    rng = random.Random(3)
+    managers = ['Ann', 'Ben', 'Cas']
+    for _ in range(30):
+        supplier = rng.choice(db.suppliers)
+        scores = {rng.choice(['Quality', 'Service', ' Price', 'Unrelated']): rng.randint(1, 10) for _ in range(3)}
+        db.submit_supplier_evaluation(supplier, scores, rng.choice(managers))  # INSERT OR REPLACE per manager
+        assert_same(db)
+
+    db.submit_supplier_evaluations_batch(
+        [{'supplier_id': s, 'criterion_name': 'Quality', 'score': 9.5} for s in db.suppliers], 'Dee', None)
+    assert_same(db)
+
+    evaluation = db.get_supplier_evaluations()[0]
+    db.delete_supplier_evaluation(evaluation['id'])
+    assert_same(db)
+
+    with db.get_connection() as conn:
+        conn.execute("UPDATE supplier_evaluations SET criteria_scores = ? WHERE id = (SELECT MIN(id) FROM supplier_evaluations)",
+                     (json.dumps({'Price': 1, 'Quality': 'n/a'}),))
+    assert_same(db)
+
+    with db.get_connection() as conn:
+        orphans = conn.execute("""
+            SELECT COUNT(*) FROM supplier_evaluation_scores
+            WHERE evaluation_id NOT IN (SELECT id FROM supplier_evaluations)
+        """).fetchone()[0]
+    assert orphans == 0
+
+    db.clear_supplier_evaluations()
+    assert db._get_survey_scores(CRITERIA) == {}
+
+
+def test_single_supplier_scores_are_rounded_and_named_as_requested(db):
+    supplier = db.suppliers[0]
+    db.submit_supplier_evaluation(supplier, {'Service': 7, 'Quality': 8}, 'Ann')
+    db.submit_supplier_evaluation(supplier, {'Service ': 8}, 'Ben')
+    db.submit_supplier_evaluation(db.suppliers[1], {'Service': 1}, 'Ann')
+    assert db._get_survey_scores_for_supplier(supplier, [' Service ', 'Price']) == {
+        ' Service ': {'score': 7.5, 'count': 2, 'source': 'survey'}
+    }
+
+
+def test_existing_evaluations_are_backfilled(tmp_path):
+    path = tmp_path / "backfill.db"
+    db = SupplierDatabase(str(path))
+    supplier = db.add_supplier("Supplier A")
+    db.close()
+    conn = sqlite3.connect(path)
+    conn.execute("DROP TABLE supplier_evaluation_scores")
+    for trigger in ('insert', 'update', 'delete'):
+        conn.execute(f"DROP TRIGGER trg_supplier_evaluations_{trigger}_scores")
+    conn.execute("INSERT INTO supplier_evaluations (supplier_id, participant_name, criteria_scores) VALUES (?, 'Ann', ?)",
+                 (supplier, json.dumps({'Quality ': 6, 'Price': 2.5})))
+    conn.execute("INSERT INTO supplier_evaluations (supplier_id, participant_name, criteria_scores) VALUES (?, 'Ben', 'not json')",
+                 (supplier,))
+    conn.execute("PRAGMA user_version = 4")
+    conn.commit()
+    conn.close()
+
+    db = SupplierDatabase(str(path))
+    assert sql_survey_scores(db, ['Quality', 'Price']) == {supplier: {'Quality': (6.0, 1), 'Price': (2.5, 1)}}
+    db.close()
+
+
+def test_aggregation_is_a_single_indexed_query(db):
+    with db.get_connection() as conn:
+        statements = []
+        conn.set_trace_callback(statements.append)
+        db._get_survey_scores(CRITERIA)
+        conn.set_trace_callback(None)
+    assert len(statements) == 1 and 'GROUP BY' in statements[0]
+    plan = db.explain_query_plan(statements[0])
+    assert any('COVERING INDEX idx_evaluation_scores' in step for step in plan)
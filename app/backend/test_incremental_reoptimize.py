@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental re-optimisation after bid coefficient changes.
+
+Every refreshed sweep is compared with a full re-solve of the changed problem on the same epsilon grid.
+"""
+
+import sys
+import os
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import unified_api
+from MOO_e_constraint_Dynamic_Bid import SelectiveNAFlexibleEConstraintOptimizer
+
+DEPOTS = [1, 2, 3]
+SUPPLIERS = [1, 2, 3, 4]
+N_POINTS = 9
+
+
+def write_problem(path, seed=5):
+    rng = random.Random(seed)
+    rows = []
+    for depot in DEPOTS:
+        for supplier in SUPPLIERS:
+            rows.append({
+                'Depot': depot,
+                'Supplier': supplier,
+                'COC Rebate(R/L)': round(rng.uniform(0.5, 2.0), 2) if rng.random() > 0.2 else 'NA',
+                'Cost of Collection (R/L)': round(rng.uniform(0.2, 1.0), 2),
+                'DEL Rebate(R/L)': round(rng.uniform(0.3, 1.5), 2),
+                'Zone Differentials': round(rng.uniform(0.0, 0.5), 2)
+            })
+    obj1 = pd.DataFrame(rows)
+    scores = pd.DataFrame({'Scoring Element': [f"Criterion {k}" for k in range(6)] + ['Total'],
+                           **{f"Supplier {s}": [0.0] * 6 + [rng.uniform(1, 10)] for s in SUPPLIERS}})
+    volumes = pd.DataFrame({'Depot': DEPOTS, 'Annual Volume(Litres)': [rng.randint(1000, 5000) for _ in DEPOTS]})
+    with pd.ExcelWriter(path) as writer:
+        obj1.to_excel(writer, sheet_name='Obj1_Coeff', index=False)
+        scores.to_excel(writer, sheet_name='Obj2_Coeff', index=False)
+        volumes.to_excel(writer, sheet_name='Annual Volumes', index=False)
+    return str(path)
+
+
+@pytest.fixture
+def problem(tmp_path):
+    return write_problem(tmp_path / "problem.xlsx")
+
+
+def swept(path, constraint_type):
+    optimizer = SelectiveNAFlexibleEConstraintOptimizer(path)
+    epsilon_range = optimizer.detect_epsilon_range(constraint_type)
+    optimizer.optimize_epsilon_constraint(epsilon_range, N_POINTS, constraint_type)
+    return optimizer, epsilon_range
+
+
+def full_resolve(path, changes, constraint_type, epsilon_range, delta_constant):
+    optimizer = SelectiveNAFlexibleEConstraintOptimizer(path)
+    optimizer.apply_coefficient_changes(changes)
+    shift = delta_constant if constraint_type == "cost" else 0
+    return optimizer.run_full_optimization((epsilon_range[0] + shift, epsilon_range[1] + shift), N_POINTS,
+                                           constraint_type)
+
+
+def assert_same_sweep(refreshed, full, constraint_type):
+    # The constrained objective's optimum per epsilon defines the front; allocations may tie
+    optimum = 'score' if constraint_type == "cost" else 'cost'
+    assert list(refreshed['status']) == list(full['status'])
+    assert np.allclose(refreshed['epsilon'], full['epsilon'])
+    feasible = (full['status'] == 'Optimal').to_numpy()
+    assert np.allclose(refreshed[optimum][feasible].astype(float), full[optimum][feasible].astype(float),
+                       rtol=1e-6)
+
+
+CHANGES = {
+    'better delivery rebate': [{'depot': 1, 'supplier': 2, 'del_rebate': 3.0}],
+    'worse collection cost': [{'depot': 2, 'supplier': 1, 'cost_of_collection': 5.0},
+                              {'depot': 3, 'supplier': 4, 'coc_rebate': None}],
+    'new supplier': [{'depot': 3, 'supplier': 5, 'del_rebate': 2.5, 'zone_differential': 0.1}],
+}
+
+
+@pytest.mark.parametrize('constraint_type', ['cost', 'score'])
+@pytest.mark.parametrize('name', CHANGES)
+def test_refresh_matches_full_resolve(problem, name, constraint_type):
+    changes = CHANGES[name]
+    optimizer, epsilon_range = swept(problem, constraint_type)
+    old_constant = optimizer._objective_coefficients()[0]
+
+    refreshed = optimizer.reoptimize_incremental(changes)
+    delta_constant = optimizer._objective_coefficients()[0] - old_constant
+    full = full_resolve(problem, changes, constraint_type, epsilon_range, delta_constant)
+
+    assert_same_sweep(refreshed, full, constraint_type)
+    stats = optimizer.last_incremental_stats
+    assert stats['epsilon_points'] == N_POINTS and stats['reused'] + stats['resolved'] == N_POINTS
+    assert set(refreshed['refresh']) <= {'reused', 'resolved'}
+
+
+def test_unchanged_coefficients_reuse_every_solution(problem):
+    optimizer, _ = swept(problem, "cost")
+    optimizer.reoptimize_incremental([{'depot': 1, 'supplier': 1, 'cost_of_collection': optimizer.COST[(1, 1)]}])
+    assert optimizer.last_incremental_stats['resolved'] == 0
+
+
+def coefficient_state(optimizer):
+    return (list(optimizer.all_pairs), list(optimizer.suppliers), dict(optimizer.COC), dict(optimizer.COST),
+            dict(optimizer.DEL), dict(optimizer.ZD), dict(optimizer.valid_collection),
+            dict(optimizer.valid_delivery), {d: set(s) for d, s in optimizer.depot_suppliers.items()})
+
+
+@pytest.mark.parametrize('changes', [
+    # The first change is valid; the second leaves depot 1 without any operation
+    [{'depot': 2, 'supplier': 1, 'del_rebate': 9.0}] +
+    [{'depot': 1, 'supplier': s, 'coc_rebate': None, 'del_rebate': None} for s in SUPPLIERS],
+    [{'depot': 2, 'supplier': 1, 'del_rebate': 9.0}, {'depot': 1, 'supplier': 9, 'del_rebate': 1.0}],
+    [{'depot': 1, 'supplier': 1, 'zone_differential': None}],
+    [{'depot': 7, 'supplier': 1, 'del_rebate': 1.0}],
+], ids=['no feasible operation', 'new pair without zone differential', 'NA zone differential', 'unknown depot'])
+def test_invalid_changes_leave_the_optimizer_untouched(problem, changes):
+    optimizer, _ = swept(problem, "cost")
+    before = coefficient_state(optimizer)
+    sweep = optimizer.last_sweep
+    with pytest.raises(ValueError):
+        optimizer.reoptimize_incremental(changes)
+    assert coefficient_state(optimizer) == before
+    assert optimizer.last_sweep is sweep
+
+
+def test_reoptimize_endpoint(problem, tmp_path, monkeypatch):
+    optimizer, _ = swept(problem, "cost")
+    monkeypatch.setattr(unified_api, "optimizer_instances", {"test": optimizer})
+    monkeypatch.setattr(unified_api, "DB_PATH", str(tmp_path / "api.db"))
+    with TestClient(unified_api.app) as client:
+        rejected = client.post("/api/optimization/reoptimize",
+                               json={"changes": [{"depot_id": 1, "supplier_id": 9, "del_rebate": 1.0}]})
+        refreshed = client.post("/api/optimization/reoptimize",
+                                json={"changes": [{"depot_id": 1, "supplier_id": 2, "del_rebate": 3.0}]})
+
+    assert rejected.status_code == 400 and "zone_differential" in rejected.json()["detail"]
+    assert refreshed.status_code == 200, refreshed.text
+    body = refreshed.json()
+    assert body["solutions"] and body["refresh_stats"]["epsilon_points"] == N_POINTS
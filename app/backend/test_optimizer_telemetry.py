@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for optimizer run telemetry.
+
+A stand-in for the docplex model is used, so no solver is required.
+"""
+
+import sys
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from optimizer_telemetry import OptimizerTelemetry, telemetry_run, active_telemetry, finished_telemetry
+
+
+def make_model(status="integer optimal solution", gap=0.0, nodes=3):
+    details = SimpleNamespace(status=status, time=0.01, nb_nodes_processed=nodes,
+                              nb_iterations=12, mip_relative_gap=gap, best_bound=float('nan'))
+    return SimpleNamespace(solve_details=details, number_of_variables=60, number_of_constraints=13)
+
+
+def test_solves_feed_phases_and_summary():
+    telemetry = OptimizerTelemetry({"load": 0.5}, {"load": 1})
+    solution = SimpleNamespace(objective_value=100.0)
+    telemetry.record_solve("epsilon", 1.0, "cost", make_model(), solution,
+                           build_seconds=0.2, solve_seconds=0.1, extraction_seconds=0.05)
+    telemetry.record_solve("epsilon", 2.0, "cost", make_model(nodes=7), solution,
+                           build_seconds=0.2, solve_seconds=0.3)
+    with telemetry.phase("report_writing"):
+        pass
+
+    data = telemetry.to_dict()
+    assert data["phases"]["load"] == {"seconds": 0.5, "calls": 1}
+    assert data["phases"]["model_build"]["calls"] == 2
+    assert abs(data["phases"]["solve"]["seconds"] - 0.4) < 1e-12
+    assert data["phases"]["report_writing"]["calls"] == 1
+    assert data["summary"]["n_solves"] == 2
+    assert data["summary"]["slowest_epsilon"] == 2.0
+    assert data["summary"]["total_nodes"] == 10
+    assert data["solves"][0]["best_bound"] is None  # NaN is not valid JSON
+
+
+def test_write_json_uses_report_path(tmp_path):
+    telemetry = OptimizerTelemetry()
+    assert telemetry.write_json() is None
+
+    telemetry.record_solve("range_min_cost", None, "cost", make_model(), None,
+                           build_seconds=0.1, solve_seconds=0.1)
+    telemetry.report_path = str(tmp_path / "out" / "telemetry.json")
+    assert telemetry.write_json() == telemetry.report_path
+
+    with open(telemetry.report_path) as f:
+        data = json.load(f)
+    assert data["solves"][0]["feasible"] is False
+    assert data["summary"]["n_feasible"] == 0
+
+
+def test_concurrent_runs_on_one_optimizer_keep_their_own_telemetry():
+    class Runner:
+        load_telemetry = OptimizerTelemetry({"load": 0.5}, {"load": 1})
+
+        @telemetry_run()
+        def run(self, label, started, proceed):
+            self.inner(label)
+            started.set()
+            proceed.wait(10)
+            self.inner(label)
+            return active_telemetry(self)
+
+        @telemetry_run('inner')
+        def inner(self, label):
+            active_telemetry(self).add_phase(label, 1.0)
+
+    runner = Runner()
+    started = {label: threading.Event() for label in "ab"}
+    proceed = threading.Event()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = {label: pool.submit(lambda label=label: (runner.run(label, started[label], proceed),
+                                                             finished_telemetry(runner)))
+                   for label in "ab"}
+        assert all(event.wait(10) for event in started.values())  # both runs are in flight
+        proceed.set()
+        results = {label: future.result(10) for label, future in futures.items()}
+
+    for label, other in ("ab", "ba"):
+        telemetry, finished = results[label]
+        assert finished is telemetry
+        assert telemetry.phase_calls[label] == 2 and other not in telemetry.phase_calls
+        assert telemetry.phase_calls["inner"] == 2 and telemetry.phase_calls["load"] == 1
+    assert active_telemetry(runner) is None and runner.last_telemetry in (results["a"][0], results["b"][0])
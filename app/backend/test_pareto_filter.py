@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for the Pareto front filter applied to e-constraint sweep output.
+
+These tests build sweep DataFrames by hand, so no solver is required.
+"""
+
+import sys
+import os
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from MOO_e_constraint_Dynamic_Bid import filter_pareto_front
+
+
+def make_sweep(rows):
+    return pd.DataFrame(rows, columns=["epsilon", "cost", "score", "allocations", "status"])
+
+
+def test_duplicates_collapse_and_keep_all_epsilons():
+    df = make_sweep([
+        (1.0, 100.0, 10.0, "C(1,1)", "Optimal"),
+        (2.0, 120.0, 20.0, "D(1,2)", "Optimal"),
+        (3.0, 120.0, 20.0, "D(1,2)", "Optimal"),
+        (4.0, 120.0, 20.0, "D(1,2)", "Optimal"),
+    ])
+    front = filter_pareto_front(df)
+
+    assert list(front["allocations"]) == ["C(1,1)", "D(1,2)"]
+    assert front.loc[1, "epsilons"] == [2.0, 3.0, 4.0]
+    assert front.loc[1, "epsilon"] == 2.0
+    assert not front["weakly_dominated"].any()
+
+
+def test_infeasible_and_strictly_dominated_rows_are_removed():
+    df = make_sweep([
+        (1.0, 100.0, 10.0, "C(1,1)", "Optimal"),
+        (2.0, 150.0, 5.0, "C(1,3)", "Optimal"),
+        (3.0, None, None, "No solution", "Infeasible"),
+        (4.0, 200.0, 30.0, "D(1,2)", "Optimal"),
+    ])
+    front = filter_pareto_front(df)
+
+    assert list(front["allocations"]) == ["C(1,1)", "D(1,2)"]
+    assert list(front["cost"]) == [100.0, 200.0]
+
+
+def test_weakly_dominated_points_are_flagged():
+    df = make_sweep([
+        (1.0, 100.0, 10.0, "C(1,1)", "Optimal"),
+        (2.0, 110.0, 10.0, "C(1,2)", "Optimal"),  # same score, higher cost
+        (3.0, 100.0, 8.0, "D(1,1)", "Optimal"),   # same cost, lower score
+        (4.0, 120.0, 15.0, "D(1,2)", "Optimal"),
+    ])
+    front = filter_pareto_front(df).set_index("allocations")
+
+    assert not front.loc["C(1,1)", "weakly_dominated"]
+    assert front.loc["C(1,2)", "weakly_dominated"]
+    assert front.loc["D(1,1)", "weakly_dominated"]
+    assert not front.loc["D(1,2)", "weakly_dominated"]
+
+
+def test_empty_or_fully_infeasible_sweep():
+    df = make_sweep([(1.0, None, None, "No solution", "Infeasible")])
+    front = filter_pareto_front(df)
+
+    assert len(front) == 0
+    assert "epsilons" in front.columns and "weakly_dominated" in front.columns
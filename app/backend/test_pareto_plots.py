@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for the headless Pareto plot renderer.
+"""
+
+import sys
+import os
+import threading
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pareto_plots
+import unified_api
+from pareto_plots import render_pareto_plots, submit_pareto_plots
+
+
+def make_front():
+    return pd.DataFrame({
+        "epsilon": [1.0, 2.0, 3.0],
+        "cost": [100.0, 120.0, 150.0],
+        "score": [10.0, 20.0, 25.0],
+        "allocations": ["C(1,1)", "D(1,2)", "D(1,3)"],
+        "status": ["Optimal"] * 3
+    })
+
+
+def test_render_writes_requested_formats(tmp_path):
+    files = render_pareto_plots(make_front(), f"{tmp_path}/", "cost", formats=("png",))
+
+    assert list(files) == ["png"]
+    assert os.path.getsize(files["png"]) > 0
+    assert not os.path.exists(files["png"].replace(".png", ".html"))
+
+
+def test_background_render_and_validation(tmp_path):
+    files = submit_pareto_plots(make_front(), f"{tmp_path}/", "score").result(timeout=60)
+    assert set(files) == {"png", "html"}
+    assert all(os.path.exists(path) for path in files.values())
+
+    assert render_pareto_plots(make_front().iloc[0:0], f"{tmp_path}/", "cost") == {}
+    with pytest.raises(ValueError):
+        render_pareto_plots(make_front(), f"{tmp_path}/", "cost", formats=("svg",))
+
+
+def test_plot_endpoint_renders_off_the_event_loop(tmp_path, monkeypatch):
+    threads = []
+    render = pareto_plots.render_pareto_plots
+
+    def traced_render(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return render(*args, **kwargs)
+
+    optimizer = SimpleNamespace(last_sweep=make_front(), last_sweep_constraint_type="cost")
+    monkeypatch.setattr(pareto_plots, "render_pareto_plots", traced_render)
+    monkeypatch.setattr(unified_api, "optimizer_instances", {"test": optimizer})
+    monkeypatch.setattr(unified_api, "DB_PATH", str(tmp_path / "api.db"))
+    monkeypatch.chdir(tmp_path)
+    with TestClient(unified_api.app) as client:
+        response = client.post("/api/optimization/plots", json={"formats": ["png"], "background": False})
+
+    assert response.status_code == 200, response.text
+    assert os.path.exists(response.json()["files"]["png"])
+    assert threads and all(name.startswith("pareto-plots") for name in threads)
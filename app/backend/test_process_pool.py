@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for the process pool shared by the batch calculations
+"""
+
+import sys
+import os
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import process_pool
+import unified_api
+from process_pool import get_process_pool, pool_map, shutdown_process_pool
+from promethee_scenarios import evaluate_scenarios
+
+
+def worker_pid(delay):
+    time.sleep(delay)
+    return os.getpid()
+
+
+def square_or_fail(x):
+    if x < 0:
+        raise ValueError(f"negative: {x}")
+    return x * x
+
+
+def test_workers_are_not_forked_and_the_pool_is_reused():
+    pool = get_process_pool()
+    assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+    assert pool_map(square_or_fail, range(10), workers=3) == [x * x for x in range(10)]
+
+    scores = {s: {'a': float(s % 4), 'b': float(s)} for s in range(12)}
+    evaluate_scenarios(scores, {'a': 0.5, 'b': 0.5}, [{}, {'preference_functions': {'a': 'usual'}}], workers=2)
+    assert get_process_pool() is pool
+
+
+def test_workers_limit_calls_in_flight(monkeypatch):
+    pool = get_process_pool()
+    submit = pool.submit
+    running, most = set(), []
+
+    def counting_submit(*args):
+        future = submit(*args)
+        running.add(future)
+        most.append(len(running))
+        future.add_done_callback(running.discard)
+        return future
+
+    monkeypatch.setattr(pool, "submit", counting_submit)
+    monkeypatch.setattr(process_pool, "PROCESS_POOL_WORKERS", 4)  # the cap, whatever this machine's CPU count
+    assert pool_map(worker_pid, [0.02] * 6, workers=2) and max(most) == 2
+    most.clear()
+    pool_map(worker_pid, [0.02] * 6, workers=1)
+    assert max(most) == 1
+
+
+def test_errors_propagate_and_empty_input():
+    with pytest.raises(ValueError):
+        pool_map(square_or_fail, [1, -2, 3], workers=2)
+    assert pool_map(square_or_fail, []) == []
+
+
+def test_lifespan_shuts_the_pool_down(tmp_path, monkeypatch):
+    monkeypatch.setattr(unified_api, "DB_PATH", str(tmp_path / "pool.db"))
+    with TestClient(unified_api.app) as client:
+        pool = get_process_pool()
+        assert client.get("/api/health").json()["process_pool"]["running"]
+    assert process_pool._pool is None
+    with pytest.raises(RuntimeError):
+        pool.submit(np.sum, [1, 2])
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Tests for the vectorized PROMETHEE II engine.
+
+The reference below is the original pairwise implementation (one preference value per
+supplier pair and criterion); the engine must reproduce it exactly.
+"""
+
+import sys
+import os
+import random
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import unified_api
+from promethee import (calculate_promethee_ii, preference_degrees, PREFERENCE_FUNCTIONS, CriterionFlows,
+                       CriterionFlowCache, ResultCache)
+
+
+def reference_preference(diff, function_type, q, p):
+    if function_type == 'usual':
+        return 1.0 if diff > 0 else 0.0
+    if function_type == 'u_shape':
+        return 1.0 if diff > q else 0.0
+    if function_type == 'v_shape':
+        return 0.0 if diff <= 0 else 1.0 if diff >= p else diff / p
+    if function_type == 'level':
+        return 0.0 if diff <= q else 1.0 if diff >= p else 0.5
+    if function_type == 'gaussian':
+        return 0.0 if diff <= 0 else 1 - np.exp(-(diff ** 2) / (2 * (p / 2) ** 2))
+    return 0.0 if diff <= q else 1.0 if diff >= p else (diff - q) / (p - q)
+
+
+def reference_promethee(supplier_scores, weights, functions, p, q):
+    suppliers = list(supplier_scores)
+    n = len(suppliers)
+    matrix = np.zeros((n, n))
+    for i, a in enumerate(suppliers):
+        for j, b in enumerate(suppliers):
+            if i != j:
+                total = 0.0
+                for criterion, weight in weights.items():
+                    diff = supplier_scores[a].get(criterion, 0) - supplier_scores[b].get(criterion, 0)
+                    total += weight * reference_preference(diff, functions[criterion], q[criterion], p[criterion])
+                matrix[i][j] = total
+    positive = np.mean(matrix, axis=1) if n else np.zeros(0)
+    negative = np.mean(matrix, axis=0) if n else np.zeros(0)
+    return matrix, positive - negative
+
+
+def test_matches_pairwise_reference_for_all_functions():
+    rng = random.Random(7)
+    for trial in range(40):
+        criteria = [f"c{k}" for k in range(rng.randint(1, 5))]
+        scores = {100 + s: {c: rng.choice([rng.randint(1, 9), round(rng.uniform(0, 10), 2)])
+                            for c in criteria if rng.random() > 0.1}  # some scores missing
+                  for s in range(rng.randint(2, 9))}
+        weights = {c: rng.random() for c in criteria}
+        functions = {c: rng.choice(PREFERENCE_FUNCTIONS) for c in criteria}
+        p = {c: rng.choice([0.5, 1.0, 2.0, 3.3]) for c in criteria}
+        q = {c: rng.choice([-0.5, 0.0, 0.5, 1.0, 4.0]) for c in criteria}  # includes q >= p
+
+        result = calculate_promethee_ii(scores, weights, functions, p, q)
+        matrix, net = reference_promethee(scores, weights, functions, p, q)
+
+        assert result['preference_matrix'] == matrix.tolist()
+        assert result['net_flows'] == net.tolist()
+        assert result['ranking'] == np.argsort(-net, kind='stable').tolist()  # ties keep supplier order
+        assert list(result['criteria_flows']) == criteria
+
+
+def test_defaults_and_degenerate_inputs():
+    result = calculate_promethee_ii({1: {'a': 9}, 2: {'a': 1}}, {'a': 1.0})
+    assert result['net_flows'] == [0.5, -0.5]  # default linear, q=0.5, p=2
+    assert result['ranking'] == [0, 1]
+
+    empty = calculate_promethee_ii({}, {'a': 1.0})
+    assert empty['net_flows'] == [] and empty['preference_matrix'] == []
+
+
+def test_unknown_function_falls_back_to_linear():
+    diff = np.array([-1.0, 0.5, 1.0, 3.0])
+    assert preference_degrees(diff, 'bogus', 0.5, 2.0).tolist() == \
+        preference_degrees(diff, 'linear', 0.5, 2.0).tolist() == [0.0, 0.0, 1 / 3, 1.0]
+
+
+def test_block_wise_flows_match_full_computation():
+    rng = np.random.default_rng(3)
+    criteria = ['a', 'b', 'c']
+    scores = {s: dict(zip(criteria, rng.uniform(0, 10, 3))) for s in range(57)}
+    weights = {'a': 0.5, 'b': 0.3, 'c': 0.2}
+    functions = {'a': 'linear', 'b': 'gaussian', 'c': 'level'}
+
+    full = calculate_promethee_ii(scores, weights, functions)
+    blocked = calculate_promethee_ii(scores, weights, functions, include_preference_matrix=False, block_rows=8)
+
+    assert 'preference_matrix' not in blocked
+    for key in ('positive_flows', 'negative_flows', 'net_flows'):
+        assert np.allclose(full[key], blocked[key], rtol=0, atol=1e-12)
+    assert np.allclose(full['criteria_flows']['b']['net_flows'], blocked['criteria_flows']['b']['net_flows'],
+                       rtol=0, atol=1e-12)
+    assert full['ranking'] == blocked['ranking']
+
+
+def test_preference_matrix_float32_base64():
+    import base64
+
+    scores = {1: {'a': 9}, 2: {'a': 1}, 3: {'a': 5}}
+    full = calculate_promethee_ii(scores, {'a': 1.0})
+    encoded = calculate_promethee_ii(scores, {'a': 1.0}, matrix_dtype='float32', matrix_encoding='base64',
+                                     block_rows=2)['preference_matrix']
+
+    assert encoded['dtype'] == 'float32' and encoded['shape'] == [3, 3]
+    matrix = np.frombuffer(base64.b64decode(encoded['data']), dtype='<f4').reshape(encoded['shape'])
+    assert np.allclose(matrix, full['preference_matrix'])
+
+
+def test_weighted_flows_match_full_calculation():
+    rng = np.random.default_rng(5)
+    criteria = ['a', 'b', 'c', 'd']
+    scores = {s: dict(zip(criteria, rng.integers(1, 10, 4).astype(float))) for s in range(30)}
+    functions = {'a': 'linear', 'b': 'usual', 'c': 'gaussian', 'd': 'v_shape'}
+
+    flows = CriterionFlows.compute(scores, criteria, functions)
+    weight_vectors = rng.dirichlet(np.ones(4), 6)
+    weighted = flows.weighted_flows(weight_vectors)
+
+    for i, vector in enumerate(weight_vectors):
+        full = calculate_promethee_ii(scores, dict(zip(criteria, vector)), functions, include_preference_matrix=False)
+        assert np.allclose(weighted['net'][i], full['net_flows'], rtol=0, atol=1e-12)
+        assert np.allclose(weighted['positive'][i], full['positive_flows'], rtol=0, atol=1e-12)
+    assert CriterionFlows.from_results(full).criteria == criteria
+
+    with pytest.raises(ValueError):
+        flows.weighted_flows([[1.0, 2.0]])
+
+
+def test_criterion_flow_cache_hits_and_evicts():
+    cache = CriterionFlowCache(maxsize=2)
+    runs = [{1: {'a': 9}, 2: {'a': float(k)}} for k in range(3)]
+
+    flows, hit = cache.get_or_compute(runs[0], ['a'])
+    assert not hit and cache.get_or_compute(runs[0], ['a']) == (flows, True)
+    assert not cache.get_or_compute(runs[0], ['a'], {'a': 'usual'})[1]  # parameters are part of the key
+
+    cache.get_or_compute(runs[1], ['a'])
+    assert cache.stats()['entries'] == 2
+    assert not cache.get_or_compute(runs[0], ['a'])[1]  # least recently used entry was evicted
+
+
+def test_result_cache_keys_on_versions_and_invalidates():
+    cache = ResultCache(maxsize=4)
+    versions = {'supplier_criteria_scores': 3, 'bwm_weights': 1}
+    params = {'criteria_names': ['a'], 'preference_functions': {'a': 'usual', 'b': 'linear'}}
+
+    cache.observe(versions)
+    cache.put(cache.key(versions, params), {'results': 1})
+    reordered = {'preference_functions': {'b': 'linear', 'a': 'usual'}, 'criteria_names': ['a']}
+    assert cache.get(cache.key(dict(reversed(list(versions.items()))), reordered)) == {'results': 1}
+
+    newer = dict(versions, supplier_criteria_scores=4)
+    cache.observe(newer)  # a write happened: nothing cached before it can be served
+    assert cache.stats()['entries'] == 0
+    assert cache.get(cache.key(versions, params)) is None
+
+
+def test_rerank_skips_the_score_load_while_data_is_unchanged(tmp_path, monkeypatch):
+    criteria = ['a', 'b']
+    # Few distinct score levels over many suppliers: most of the ranking is decided by ties
+    scores = {s: {'a': float(s % 3), 'b': float(s % 2)} for s in range(40)}
+    loads = []
+
+    def load_scores(db, criteria_names):
+        loads.append(criteria_names)
+        return scores, {}, {}
+
+    monkeypatch.setattr(unified_api, "load_promethee_supplier_scores", load_scores)
+    monkeypatch.setattr(unified_api, "DB_PATH", str(tmp_path / "rerank.db"))
+    request = {"criteria_names": criteria, "weight_vectors": [[0.5, 0.5], [0.9, 0.1]]}
+    with TestClient(unified_api.app) as client:
+        first = client.post("/api/promethee/rerank", json=request).json()
+        second = client.post("/api/promethee/rerank", json=request).json()
+        assert len(loads) == 1 and second["cache_hit"] and second["rankings"] == first["rankings"]
+
+        unified_api.get_db().add_supplier("Supplier X")  # any write to an input table bumps its version
+        client.post("/api/promethee/rerank", json=request)
+        assert len(loads) == 2
+
+    for entry in first["rankings"]:
+        full = calculate_promethee_ii(scores, dict(zip(criteria, entry["weights"])), include_preference_matrix=False)
+        assert entry["ranking"] == full["ranking"]
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental PROMETHEE II state: every patched state must match a full recomputation.
+"""
+
+import sys
+import os
+import random
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from promethee import calculate_promethee_ii, PREFERENCE_FUNCTIONS
+from promethee_incremental import IncrementalPROMETHEE, IncrementalStateRegistry
+
+
+def assert_matches_full(state, scores, weights, functions, p, q):
+    expected = calculate_promethee_ii(scores, weights, functions, p, q, include_preference_matrix=False)
+    result = state.results(weights, list(scores))
+    assert result['suppliers'] == expected['suppliers']
+    for key in ('positive_flows', 'negative_flows', 'net_flows'):
+        assert np.allclose(result[key], expected[key], rtol=0, atol=1e-12)
+    for criterion in weights:
+        assert np.allclose(result['criteria_flows'][criterion]['net_flows'],
+                           expected['criteria_flows'][criterion]['net_flows'], rtol=0, atol=1e-12)
+
+
+def test_add_remove_and_rescore_match_full_calculation():
+    rng = random.Random(4)
+    for trial in range(15):
+        criteria = [f"c{k}" for k in range(rng.randint(1, 4))]
+        functions = {c: rng.choice(PREFERENCE_FUNCTIONS) for c in criteria}
+        p = {c: rng.choice([1.0, 2.0, 3.0]) for c in criteria}
+        q = {c: rng.choice([-0.5, 0.0, 0.5]) for c in criteria}  # q < 0 makes u_shape prefer ties
+        weights = {c: rng.random() for c in criteria}
+        scores = {s: {c: rng.uniform(0, 10) for c in criteria} for s in range(rng.randint(2, 10))}
+
+        state = IncrementalPROMETHEE(criteria, functions, p, q)
+        state.rebuild(scores)
+        for step in range(15):
+            action = rng.random()
+            if action < 0.3 and len(scores) > 1:
+                supplier = rng.choice(list(scores))
+                del scores[supplier]
+                assert state.remove(supplier)
+            elif action < 0.5:
+                scores[100 + step] = {c: rng.uniform(0, 10) for c in criteria}
+                assert state.upsert(100 + step, scores[100 + step]) == 'added'
+            else:
+                supplier = rng.choice(list(scores))
+                scores[supplier] = {c: float(rng.randint(1, 9)) for c in criteria}
+                state.upsert(supplier, scores[supplier])
+            assert_matches_full(state, scores, weights, functions, p, q)
+
+
+def test_sync_patches_small_changes_and_rebuilds_large_ones():
+    criteria = ['a', 'b']
+    scores = {s: {'a': float(s % 7), 'b': float(s % 5)} for s in range(20)}
+    state = IncrementalPROMETHEE(criteria)
+
+    assert state.sync(scores)['mode'] == 'rebuild'  # first load
+    scores[3] = {'a': 9.0, 'b': 0.0}
+    del scores[7]
+    assert state.sync(scores) == {'added': 0, 'removed': 1, 'updated': 1, 'mode': 'incremental'}
+    assert_matches_full(state, scores, {'a': 0.6, 'b': 0.4}, None, None, None)
+
+    for s in range(10):
+        scores[s] = {'a': 1.0, 'b': 1.0}
+    assert state.sync(scores)['mode'] == 'rebuild'
+    assert state.sync(scores) == {'added': 0, 'removed': 0, 'updated': 0, 'mode': 'incremental'}
+
+
+def test_registry_keeps_one_state_per_parameter_set():
+    registry = IncrementalStateRegistry(maxsize=2)
+    state = registry.get(['a', 'b'])
+    assert registry.get(['a', 'b'], {'a': 'linear'}) is state  # same resolved parameters
+    assert registry.get(['a', 'b'], {'a': 'usual'}) is not state
+    registry.get(['c'])
+    assert registry.get(['a', 'b']) is not state  # evicted
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for run-versioned PROMETHEE II result storage.
+"""
+
+import sys
+import os
+import sqlite3
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import SupplierDatabase
+
+
+def make_db(tmp_path, n_suppliers=4):
+    db = SupplierDatabase(str(tmp_path / "runs.db"))
+    ids = [db.add_supplier(f"Supplier {i}") for i in range(n_suppliers)]
+    return db, ids
+
+
+def save_run(db, ids, ranking, weights):
+    n = len(ids)
+    return db.save_promethee_run(ids, [0.5] * n, [0.25] * n, [0.1 * i for i in range(n)], ranking,
+                                 [1.0] * n, weights, {'preference_functions': None})
+
+
+def test_latest_run_is_returned_in_rank_order(tmp_path):
+    db, ids = make_db(tmp_path)
+    first = save_run(db, ids, [3, 2, 1, 0], {'Quality': 1.0})
+    second = save_run(db, ids, [1, 0, 3, 2], {'Quality': 0.5, 'Price': 0.5})
+
+    latest = db.get_promethee_results()
+    assert [row['run_id'] for row in latest] == [second] * 4
+    assert [row['supplier_id'] for row in latest] == [ids[1], ids[0], ids[3], ids[2]]
+    assert [row['ranking'] for row in latest] == [1, 2, 3, 4]
+    assert [row['supplier_id'] for row in db.get_promethee_results(first)] == ids[::-1]
+
+    runs = db.get_promethee_runs()
+    assert [run['run_id'] for run in runs] == [second, first]
+    assert runs[0]['supplier_count'] == 4 and runs[0]['criteria_weights'] == {'Quality': 0.5, 'Price': 0.5}
+    assert runs[0]['params_hash'] == SupplierDatabase.promethee_params_hash(
+        {'Price': 0.5, 'Quality': 0.5}, {'preference_functions': None})
+
+
+def test_legacy_rows_and_old_schema(tmp_path):
+    db, ids = make_db(tmp_path, 2)
+    db.save_promethee_results(ids[0], 0.2, 0.1, 0.1, 1, 1.0, '{}')
+    assert [row['run_id'] for row in db.get_promethee_results()] == [None]  # no runs yet
+
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE promethee_results (id INTEGER PRIMARY KEY, supplier_id INTEGER NOT NULL, "
+                 "positive_flow REAL NOT NULL, negative_flow REAL NOT NULL, net_flow REAL NOT NULL, "
+                 "ranking INTEGER NOT NULL, confidence_level REAL, criteria_weights TEXT, created_at TIMESTAMP)")
+    conn.commit()
+    conn.close()
+    SupplierDatabase(str(path))
+    columns = [row[1] for row in sqlite3.connect(path).execute("PRAGMA table_info(promethee_results)")]
+    assert 'run_id' in columns
+
+
+def test_data_versions_follow_writes(tmp_path):
+    db, ids = make_db(tmp_path, 2)
+    before = db.get_data_versions()
+    assert set(before) == set(SupplierDatabase.VERSIONED_TABLES)
+
+    db.update_supplier_criteria_score(ids[0], 'Quality', 7.0, 'survey')
+    db.save_bwm_weights(['Quality'], {'Quality': 1.0}, 'Quality', 'Quality', {}, {}, 0.0, 'ok')
+    after = db.get_data_versions()
+    assert after['supplier_criteria_scores'] > before['supplier_criteria_scores']
+    assert after['bwm_weights'] == before['bwm_weights'] + 1
+
+    save_run(db, ids, [0, 1], {'Quality': 1.0})  # results are outputs, not versioned inputs
+    assert db.get_data_versions() == after
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the PROMETHEE weight-sensitivity / rank-stability analysis.
+"""
+
+import sys
+import os
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from promethee import CriterionFlows, calculate_promethee_ii
+from promethee_sensitivity import rank_stability, sample_weights, stability_table
+
+
+def make_flows():
+    # Supplier 1 dominates; 2 and 3 trade off the two criteria
+    scores = {1: {'a': 9, 'b': 9}, 2: {'a': 8, 'b': 2}, 3: {'a': 2, 'b': 8}, 4: {'a': 1, 'b': 1}}
+    return CriterionFlows.compute(scores, ['a', 'b'])
+
+
+def test_sampled_weights_are_normalised_and_centred():
+    rng = np.random.default_rng(0)
+    for method in ('dirichlet', 'perturbation'):
+        weights = sample_weights([2.0, 1.0, 1.0], 20000, method=method, rng=rng)
+        assert weights.shape == (20000, 3)
+        assert np.allclose(weights.sum(axis=1), 1.0)
+        assert np.allclose(weights.mean(axis=0), [0.5, 0.25, 0.25], atol=0.01)
+
+    with pytest.raises(ValueError):
+        sample_weights([1.0, 1.0], 10, method='uniform')
+    with pytest.raises(ValueError):
+        sample_weights([0.0, 0.0], 10)
+
+
+def test_rank_probabilities_match_explicit_rankings():
+    flows = make_flows()
+    result = rank_stability(flows, [0.5, 0.5], n_samples=3000, concentration=5.0, seed=11, top_k=2)
+
+    # Same samples, ranked one by one through weighted_flows
+    weights = sample_weights([0.5, 0.5], 3000, concentration=5.0, rng=np.random.default_rng(11))
+    positions = np.argsort(flows.weighted_flows(weights)['ranking'], axis=1)
+    expected = np.stack([np.bincount(positions[:, i], minlength=4) for i in range(4)]) / 3000
+
+    assert np.allclose(result['rank_probabilities'], expected)
+    assert np.allclose(result['rank_probabilities'].sum(axis=1), 1.0)
+    assert result['base_rank'][0] == 1 and result['base_rank'][3] == 4
+    assert result['probability_base_rank'][0] == 1.0  # a dominating supplier never moves
+    assert 0 < result['probability_top_k'][1] < 1  # suppliers 2 and 3 swap places
+
+
+def test_stability_interval_and_table():
+    result = rank_stability(make_flows(), [0.5, 0.5], n_samples=2000, concentration=2.0, seed=3)
+    assert result['rank_interval']['lower'][0] == result['rank_interval']['upper'][0] == 1
+    assert result['rank_interval']['lower'][1] == 2 and result['rank_interval']['upper'][1] == 3
+
+    rows = stability_table(result, {1: 'Acme'})
+    assert [row['base_rank'] for row in rows] == [1, 2, 3, 4]
+    assert rows[0]['supplier_name'] == 'Acme' and rows[1]['supplier_name'].startswith('Supplier ')
+
+    with pytest.raises(ValueError):
+        rank_stability(make_flows(), [1.0, 1.0, 1.0])
+
+
+def test_ties_rank_as_in_calculate():
+    # Many identical suppliers: the rankings are decided by the tie rule alone
+    scores = {s: {'a': float(s % 3), 'b': float(s % 2)} for s in range(40)}
+    flows = CriterionFlows.compute(scores, ['a', 'b'])
+    full = calculate_promethee_ii(scores, {'a': 0.5, 'b': 0.5}, include_preference_matrix=False)
+
+    result = rank_stability(flows, [0.5, 0.5], n_samples=1, concentration=1e9, seed=0)
+    expected = np.empty(40, dtype=int)
+    expected[full['ranking']] = np.arange(1, 41)
+    assert result['base_rank'] == expected.tolist()
+    assert np.array_equal(np.argmax(result['rank_probabilities'], axis=1) + 1, expected)
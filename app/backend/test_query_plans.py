@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression tests: the SQL issued by the hot read paths must not fall back to full
+table scans (or, where an index provides the order, to a separate sort step).
+"""
+
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import SupplierDatabase
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SupplierDatabase(str(tmp_path / "plans.db"))
+    supplier = db.add_supplier("Supplier A")
+    depot = db.add_depot("Depot A", annual_volume=1000.0)
+    db.submit_supplier_data(supplier, depot, {'zone_differential': 0.1, 'coc_rebate': 0.2})
+    db.update_supplier_criteria_score(supplier, 'Quality', 7.0, 'survey')
+    yield db
+    db.close()
+
+
+def traced_queries(db, call):
+    """Run call() and return the statements it executed (parameters inlined)"""
+    statements = []
+    with db.get_connection() as conn:  # nested reads on this thread reuse the connection
+        connections = (conn, db.writer.connection)  # writes run on the writer thread's connection
+        for connection in connections:
+            connection.set_trace_callback(statements.append)
+        try:
+            call()
+        finally:
+            for connection in connections:
+                connection.set_trace_callback(None)
+    return [s for s in statements if s.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE'))]
+
+
+def full_scans(plan, query):
+    # A bare "SCAN t" reads the whole table; "SCAN t USING INDEX" does too, unless a LIMIT stops it early
+    bounded = ' LIMIT ' in ' '.join(query.upper().split())
+    return [step for step in plan if step.startswith('SCAN ') and not (bounded and ' USING ' in step)]
+
+
+HOT_PATHS = {
+    'submissions by status': (lambda db: db.get_submissions_by_status('approved'), True),
+    'submissions by supplier and status': (lambda db: db.get_supplier_submissions(1, 'pending'), True),
+    'bulk approve': (lambda db: db.bulk_approve_supplier_submissions(1, 'admin'), True),
+    'optimizer export': (lambda db: db.export_to_optimizer_format(), False),
+    'unified scores': (lambda db: db.get_unified_supplier_scores(['Quality', 'Price']), False),
+    'promethee results': (lambda db: db.get_promethee_results(), True),
+    'promethee run results': (lambda db: db.get_promethee_results(run_id=1), True),
+    'audit log': (lambda db: db.get_unified_scores_audit_log(20), True),
+}
+
+
+@pytest.mark.parametrize('name', HOT_PATHS)
+def test_hot_path_uses_indexes(db, name):
+    call, sort_free = HOT_PATHS[name]
+    queries = traced_queries(db, lambda: call(db))
+    assert queries, f"{name}: no statements traced"
+    # The export also lists suppliers and depot volumes (whole-table reads by design); check its main query
+    if name == 'optimizer export':
+        queries = [q for q in queries if 'supplier_submissions' in q]
+    for query in queries:
+        plan = db.explain_query_plan(query)
+        assert full_scans(plan, query) == [], f"{name}: full table scan in {plan} for {query}"
+        if sort_free:
+            assert not any('TEMP B-TREE' in step for step in plan), f"{name}: sort step in {plan}"
+
+
+def test_export_order_comes_from_index(db):
+    queries = [q for q in traced_queries(db, db.export_to_optimizer_format) if 'supplier_submissions' in q]
+    plan = db.explain_query_plan(queries[0])
+    assert any('COVERING INDEX idx_submissions_export' in step for step in plan)
+    assert not any('TEMP B-TREE' in step for step in plan)
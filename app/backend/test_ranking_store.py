@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for the columnar ranking analysis store and its report renderers.
+
+Analysis dicts are built by hand in the shape analyze_supplier_alternatives() returns.
+"""
+
+import sys
+import os
+import io
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ranking_store import RankingStore
+
+
+def make_alternative(depot, supplier, operation, ranking_score, is_current=False):
+    return {
+        'depot': depot, 'supplier': supplier, 'operation': operation,
+        'cost_impact': -ranking_score * 10, 'score_impact': ranking_score,
+        'new_cost': 100.0 - ranking_score * 10, 'new_score': 10.0 + ranking_score,
+        'ranking_score': ranking_score, 'is_current': is_current
+    }
+
+
+def make_analysis():
+    return {
+        0: {
+            'solution_id': 0, 'epsilon': 1.0, 'epsilons': [1.0, 2.0], 'weakly_dominated': False,
+            'current_cost': 100.0, 'current_score': 10.0,
+            'current_allocation': {1: {'supplier': 1, 'operation': 'collection'}},
+            'depot_alternatives': {
+                1: [make_alternative(1, 2, 'delivery', 0.5),
+                    make_alternative(1, 1, 'collection', 0.0, is_current=True),
+                    make_alternative(1, 3, 'collection', -0.2)],
+                2: [make_alternative(2, 4, 'delivery', 0.1, is_current=True)]
+            }
+        },
+        1: {
+            'solution_id': 1, 'epsilon': 3.0, 'epsilons': [3.0], 'weakly_dominated': True,
+            'current_cost': 120.0, 'current_score': 12.0,
+            'current_allocation': {1: {'supplier': 2, 'operation': 'delivery'}},
+            'depot_alternatives': {
+                1: [make_alternative(1, 2, 'delivery', 0.0, is_current=True)]
+            }
+        }
+    }
+
+
+def test_round_trip_preserves_analysis():
+    analysis = make_analysis()
+    store = RankingStore.from_analysis(analysis)
+
+    assert len(store) == 5
+    assert store.solution_ids == [0, 1]
+    for solution_id, expected in analysis.items():
+        assert store.solution_analysis(solution_id) == expected
+
+
+def test_detailed_and_summary_csv():
+    store = RankingStore.from_analysis(make_analysis())
+
+    detailed = pd.read_csv(io.StringIO("".join(store.iter_detailed_csv(top_n=2))))
+    assert len(detailed) == 4  # depot 1 of solution 0 is cut to two alternatives
+    assert list(detailed['rank']) == [1, 2, 1, 1]
+    assert list(detailed['operation'])[:2] == ['delivery', 'collection']
+
+    summary = pd.read_csv(io.StringIO("".join(store.iter_summary_csv())))
+    assert list(summary['num_alternatives']) == [3, 1, 1]
+    assert list(summary['best_supplier']) == [2, 4, 2]
+
+
+def test_text_report_lists_top_three_per_depot():
+    store = RankingStore.from_analysis(make_analysis())
+    report = "".join(store.iter_text_report())
+
+    assert "Total solutions analyzed: 2" in report
+    assert report.count("DEPOT 1 - Top 3 Alternatives") == 2
+    assert "Supplier 1 (collection) (CURRENT)" in report
+
+    shorter = "".join(store.iter_text_report(top_n=2))
+    assert shorter.count("DEPOT 1 - Top 2 Alternatives") == 2 and "Top 3" not in shorter
+
+
+def test_query_filters_orders_and_pages():
+    store = RankingStore.from_analysis(make_analysis())
+
+    total, items = store.query(solution_id=0, depot=1, metric='cost_impact')
+    assert total == 3
+    assert [a['supplier'] for a in items] == [2, 1, 3]  # most negative cost impact first
+    assert [a['rank'] for a in items] == [1, 2, 3]
+
+    total, items = store.query(top_k=1, offset=1, limit=1)
+    assert total == 3  # one best alternative per solution/depot
+    assert items == [dict(make_alternative(2, 4, 'delivery', 0.1, is_current=True), solution_id=0, rank=1)]
+
+    assert store.query(solution_id=42) == (0, [])
+
+
+def test_summary_is_compact():
+    summary = RankingStore.from_analysis(make_analysis()).summary()
+
+    assert summary['n_alternatives'] == 5
+    assert summary['depots'] == [1, 2]
+    assert summary['solutions'][0]['n_improving_alternatives'] == 1  # the current supplier never counts
+    assert summary['solutions'][1]['best_ranking_score'] == 0.0
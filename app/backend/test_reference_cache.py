@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for the versioned in-process cache of the profile scoring config and latest BWM weights
+"""
+
+import sys
+import os
+import sqlite3
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import SupplierDatabase
+
+CRITERIA = ['Quality', 'Geographical Network']
+CONFIG = {'geographical_network': {'National': 9.0, 'Local': 3.0}}
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SupplierDatabase(str(tmp_path / "reference.db"))
+    db.save_bwm_weights(CRITERIA, {'Quality': 0.7, 'Geographical Network': 0.3}, 'Quality',
+                        'Geographical Network', {}, {}, 0.0, 'ok')
+    db.save_profile_scoring_config(CONFIG)
+    yield db
+    db.close()
+
+
+def reference_queries(db, call):
+    """Statements call() runs against the two reference tables"""
+    statements = []
+    with db.get_connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            call()
+        finally:
+            conn.set_trace_callback(None)
+    return [s for s in statements if 'FROM profile_scoring_config' in s or 'FROM bwm_weights' in s]
+
+
+def test_saves_write_through_to_the_cache(db):
+    misses = db.reference_cache_stats()['misses']
+    assert db.get_profile_scoring_config() == CONFIG
+    assert db.get_latest_bwm_weights()['criteria_names'] == CRITERIA
+    stats = db.reference_cache_stats()
+    assert stats['misses'] == misses and stats['hits'] >= 2
+    assert stats['versions'] == {table: version for table, version in db.get_data_versions().items()
+                                 if table in ('profile_scoring_config', 'bwm_weights')}
+
+
+def test_per_supplier_profile_scores_do_not_requery_the_config(db):
+    ids = [db.add_supplier(f"Supplier {i}") for i in range(5)]
+    for supplier in ids:
+        db.update_supplier_profile(supplier, {'geographical_network': 'National'})
+
+    scores = {}
+    assert reference_queries(db, lambda: scores.update(
+        (supplier, db._get_profile_scores_for_supplier(supplier, CRITERIA)) for supplier in ids)) == []
+    assert all(score['Geographical Network']['score'] == 9.0 for score in scores.values())
+    assert reference_queries(db, db.get_latest_bwm_weights) == []
+
+
+def test_callers_get_copies(db):
+    db.get_profile_scoring_config()['geographical_network']['National'] = 0.0
+    db.get_latest_bwm_weights()['criteria_names'].append('Price')
+    assert db.get_profile_scoring_config() == CONFIG
+    assert db.get_latest_bwm_weights()['criteria_names'] == CRITERIA
+
+
+def test_writes_from_another_process_are_noticed(db):
+    db.get_profile_scoring_config()
+    conn = sqlite3.connect(db.db_path)  # bypasses this process's SupplierDatabase entirely
+    conn.execute("UPDATE profile_scoring_config SET score = 1.0 WHERE option_value = 'National'")
+    conn.execute("DELETE FROM bwm_weights")
+    conn.commit()
+    conn.close()
+
+    assert db.get_profile_scoring_config()['geographical_network']['National'] == 1.0
+    assert db.get_latest_bwm_weights() is None
+
+
+def test_rolled_back_save_is_never_served(db):
+    def save_then_fail():
+        db.save_profile_scoring_config({'geographical_network': {'National': 1.0}})
+        assert db.get_profile_scoring_config() == {'geographical_network': {'National': 1.0}}
+        raise ValueError("rejected")
+
+    with pytest.raises(ValueError):
+        db.writer.submit(save_then_fail).result(10)
+    assert db.get_profile_scoring_config() == CONFIG
+
+    # The next save reaches the data version the rolled-back one had; it must not hit its content
+    replacement = {'geographical_network': {'Local': 4.0}}
+    db.save_profile_scoring_config(replacement)
+    assert db.get_profile_scoring_config() == replacement
+
+
+def test_clearing_bwm_weights_invalidates(db):
+    db.get_latest_bwm_weights()
+    db.clear_bwm_weights()
+    assert db.get_latest_bwm_weights() is None
+
+
+def test_a_write_during_the_load_is_not_cached_under_the_older_version(db, monkeypatch):
+    load = SupplierDatabase._load_profile_scoring_config
+
+    def load_after_another_process_wrote(conn):
+        other = sqlite3.connect(db.db_path)
+        other.execute("UPDATE profile_scoring_config SET score = 1.0 WHERE option_value = 'National'")
+        other.commit()
+        other.close()
+        return load(conn)
+
+    db._reference_cache.clear()
+    monkeypatch.setattr(SupplierDatabase, '_load_profile_scoring_config', staticmethod(load_after_another_process_wrote))
+    db.get_profile_scoring_config()
+    monkeypatch.undo()
+
+    # Whatever got cached must be the data of the version it is cached under
+    cached_version = db.reference_cache_stats()['versions']['profile_scoring_config']
+    current_version = db.get_data_versions()['profile_scoring_config']
+    found, cached = db._reference_cache.get('profile_scoring_config', cached_version)
+    assert found and cached['geographical_network']['National'] == (1.0 if cached_version == current_version else 9.0)
+    assert db.get_profile_scoring_config()['geographical_network']['National'] == 1.0
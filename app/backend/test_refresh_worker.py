@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for the coalescing background refresh of unified criteria scores
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import SupplierDatabase
+from refresh_worker import UnifiedScoresRefreshWorker
+
+CRITERIA = ['Quality', 'Price']
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SupplierDatabase(str(tmp_path / "refresh.db"))
+    db.save_bwm_weights(CRITERIA, {'Quality': 0.6, 'Price': 0.4}, 'Quality', 'Price', {}, {}, 0.0, 'ok')
+    yield db
+    db.close()
+
+
+def unified_rows(db):
+    with db.get_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM supplier_criteria_scores").fetchone()[0]
+
+
+def test_new_suppliers_are_refreshed_by_one_worker(db):
+    threads_before = threading.active_count()
+    ids = [db.add_supplier(f"Supplier {i}") for i in range(30)]
+    assert threading.active_count() <= threads_before + 1  # one worker, not a thread per write
+    assert db.refresh_worker.flush(timeout=10)
+
+    assert unified_rows(db) == len(ids) * len(CRITERIA)
+    metrics = db.refresh_worker.metrics()
+    assert metrics['queue_depth'] == 0 and metrics['in_flight'] == 0
+    assert metrics['refreshed'] == 30 and metrics['batches'] <= 30
+    assert metrics['max_lag_ms'] >= metrics['last_lag_ms'] > 0
+
+
+def test_repeated_ids_are_coalesced_into_one_batch(db):
+    ids = [db.add_supplier(f"Supplier {i}") for i in range(5)]
+    db.refresh_worker.flush(timeout=10)
+    refreshed = []
+    original = db.refresh_unified_scores_for_suppliers
+
+    def record(supplier_ids, criteria_names, trigger_source):
+        refreshed.append((list(supplier_ids), trigger_source))
+        return original(supplier_ids, criteria_names, trigger_source)
+
+    worker = UnifiedScoresRefreshWorker(db, debounce=60, max_delay=60)  # only a flush starts a batch
+    worker.db = type('RecordingDatabase', (), {'get_latest_bwm_weights': db.get_latest_bwm_weights,
+                                               'refresh_unified_scores_for_suppliers': staticmethod(record)})()
+    for _ in range(20):
+        worker.enqueue(ids, "profile_update")
+    worker.enqueue(ids[:2], "evaluation_submission")
+    assert worker.metrics()['queue_depth'] == 5
+    assert worker.flush(timeout=10)
+    worker.stop()
+
+    assert refreshed == [(ids, "evaluation_submission,profile_update")]
+    metrics = worker.metrics()
+    assert metrics['enqueued'] == 102 and metrics['coalesced'] == 97 and metrics['batches'] == 1
+
+
+def test_batches_are_bounded_and_audited_once_each(db):
+    ids = [db.add_supplier(f"Supplier {i}") for i in range(12)]
+    db.refresh_worker.flush(timeout=10)
+    worker = UnifiedScoresRefreshWorker(db, debounce=60, max_delay=60, max_batch=5)
+    worker.enqueue(ids, "batch_evaluation_submission")
+    assert worker.flush(timeout=10)
+    worker.stop()
+    assert worker.metrics()['batches'] == 3
+
+    log = [entry for entry in db.get_unified_scores_audit_log(50)
+           if entry['trigger_source'] == 'batch_evaluation_submission']
+    assert sorted(entry['records_affected'] for entry in log) == [4, 10, 10]
+    assert sorted(json.loads(entry['supplier_ids']) for entry in log) == [ids[:5], ids[5:10], ids[10:]]
+
+
+def test_failed_batches_are_retried_after_a_backoff(db):
+    worker = UnifiedScoresRefreshWorker(db, retry_backoff=0.01)
+    calls = []
+
+    def flaky(supplier_ids, criteria_names, trigger_source):
+        calls.append(supplier_ids)
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+
+    worker.db = type('FlakyDatabase', (), {'get_latest_bwm_weights': db.get_latest_bwm_weights,
+                                           'refresh_unified_scores_for_suppliers': staticmethod(flaky)})()
+    worker.enqueue([1], "manual")
+    assert worker.flush(timeout=10)
+    worker.enqueue([2], "manual")
+    assert worker.flush(timeout=10)
+    worker.stop()
+    metrics = worker.metrics()
+    assert calls == [[1], [1], [2]]
+    assert metrics['failed_batches'] == 1 and metrics['retried'] == 1 and metrics['refreshed'] == 2
+    assert metrics['dropped_after_retries'] == 0 and not metrics['running']
+
+
+def test_retries_back_off_and_give_up(db):
+    worker = UnifiedScoresRefreshWorker(db, max_retries=2, retry_backoff=0.05)
+    attempts = []
+
+    def failing(supplier_ids, criteria_names, trigger_source):
+        attempts.append((time.monotonic(), list(supplier_ids)))
+        raise RuntimeError("disk I/O error")
+
+    worker.db = type('FailingDatabase', (), {'get_latest_bwm_weights': db.get_latest_bwm_weights,
+                                             'refresh_unified_scores_for_suppliers': staticmethod(failing)})()
+    worker.enqueue([1, 2], "manual")
+    assert worker.flush(timeout=10)
+    worker.stop()
+
+    assert [ids for _, ids in attempts] == [[1, 2]] * 3
+    waits = [later - earlier for (earlier, _), (later, _) in zip(attempts, attempts[1:])]
+    assert waits[0] >= 0.05 and waits[1] >= 0.1  # doubled per attempt
+    metrics = worker.metrics()
+    assert metrics['retried'] == 4 and metrics['dropped_after_retries'] == 2 and metrics['queue_depth'] == 0
+
+
+def test_close_drains_the_queue(tmp_path):
+    path = str(tmp_path / "drain.db")
+    db = SupplierDatabase(path)
+    db.save_bwm_weights(CRITERIA, {'Quality': 0.6, 'Price': 0.4}, 'Quality', 'Price', {}, {}, 0.0, 'ok')
+    for i in range(3):
+        db.add_supplier(f"Supplier {i}")
+    db.close()
+    db = SupplierDatabase(path)
+    assert unified_rows(db) == 3 * len(CRITERIA)
+    db.close()
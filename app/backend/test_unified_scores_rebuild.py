@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Tests for the set-based rebuild of supplier_criteria_scores
+"""
+
+import sys
+import os
+import random
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import SupplierDatabase
+
+CRITERIA = ['Quality', 'Price', 'Geographical Network', 'B-BBEE Level', 'Reciprocal Business', 'Delivery']
+
+SCORING_CONFIG = {
+    'geographical_network': {'National': 9.0, 'Regional': 6.0, 'Local': 3.0},
+    'B-BBEE Level': {'Level 1': 10.0, 'Level 2': 8.0, 'Level 3': 6.0, 'Level 4': 4.0, 'Level 5+': 2.0},
+    'reciprocal_business': {'Yes': 8.0, 'No': 2.0}
+}
+
+
+def per_supplier_reference(db, criteria_names):
+    """Rows the per-supplier loop used to write: profile, then survey overriding it, then defaults"""
+    rows = {}
+    for supplier in db.get_suppliers():
+        sid = supplier['id']
+        for criterion, data in db._get_profile_scores_for_supplier(sid, criteria_names).items():
+            rows[(sid, criterion)] = (data['score'], 'profile', 1)
+        for criterion, data in db._get_survey_scores_for_supplier(sid, criteria_names).items():
+            rows[(sid, criterion)] = (data['score'], 'survey', data['count'])
+        for criterion in criteria_names:
+            rows.setdefault((sid, criterion), (5.0, 'default', 0))
+    return rows
+
+
+def stored_rows(db):
+    with db.get_connection() as conn:
+        return {(sid, criterion): (score, source, count) for sid, criterion, score, source, count in conn.execute(
+            "SELECT supplier_id, criterion_name, score, data_source, score_count FROM supplier_criteria_scores")}
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = SupplierDatabase(str(tmp_path / "unified.db"))
+    rng = random.Random(11)
+    db.save_profile_scoring_config(SCORING_CONFIG)
+    for i in range(25):
+        sid = db.add_supplier(f"Supplier {i}")
+        db.update_supplier_profile(sid, {
+            'geographical_network': rng.choice(['National', 'Regional', 'Local', 'Unknown', None]),
+            'bbee_level': rng.choice([1, 2, 3, 4, 5, 7, None]),
+            'reciprocal_business': rng.choice(['Yes', 'No', None])
+        })
+        for manager in rng.sample(['Ann', 'Ben', 'Cas', 'Dee'], rng.randint(0, 4)):
+            db.submit_supplier_evaluation(sid, {'Quality': rng.randint(1, 10), ' Price': rng.randint(1, 10),
+                                                'Reciprocal Business': rng.randint(1, 10)}, manager)
+    yield db
+    db.close()
+
+
+def test_rebuild_matches_per_supplier_loop(db):
+    result = db.migrate_to_unified_criteria_scores(CRITERIA)
+    expected = per_supplier_reference(db, CRITERIA)
+    assert stored_rows(db) == expected
+
+    stats = result['stats']
+    assert stats['suppliers_processed'] == 25
+    assert stats['survey_scores_added'] == sum(1 for row in expected.values() if row[1] == 'survey')
+    assert stats['default_scores_added'] == sum(1 for row in expected.values() if row[1] == 'default')
+    assert set(stats['timings_ms']) == {'clear', 'profile', 'survey', 'default', 'total'}
+
+
+def test_single_supplier_refresh_only_touches_that_supplier(db):
+    db.migrate_to_unified_criteria_scores(CRITERIA)
+    before = stored_rows(db)
+    target = db.get_suppliers()[3]['id']
+    db.submit_supplier_evaluation(target, {'Delivery': 9}, 'Eve')
+    db.update_supplier_profile(target, {'geographical_network': 'National', 'bbee_level': 1})
+
+    assert db.refresh_unified_scores_for_supplier(target, CRITERIA, "test")
+    after = stored_rows(db)
+    assert {key: row for key, row in after.items() if key[0] != target} == \
+        {key: row for key, row in before.items() if key[0] != target}
+    assert after[(target, 'Delivery')] == (9.0, 'survey', 1)
+    assert after[(target, 'Geographical Network')] == (9.0, 'profile', 1)
+    assert after[(target, 'B-BBEE Level')] == (10.0, 'profile', 1)
+
+
+def test_rebuild_is_atomic(db, monkeypatch):
+    db.migrate_to_unified_criteria_scores(CRITERIA)
+    before = stored_rows(db)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("aggregation failed")
+
+    monkeypatch.setattr(db, '_survey_score_aggregates', fail)
+    with pytest.raises(RuntimeError):
+        db.migrate_to_unified_criteria_scores(CRITERIA)
+    assert stored_rows(db) == before
+
+
+def test_failed_refresh_inside_a_write_keeps_the_previous_scores(db, monkeypatch):
+    db.migrate_to_unified_criteria_scores(CRITERIA)
+    before = stored_rows(db)
+    target = db.get_suppliers()[3]['id']
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("aggregation failed")
+
+    # The refresh runs nested in the evaluation's write, which logs its error and commits anyway
+    monkeypatch.setattr(db, '_survey_score_aggregates', fail)
+    evaluation_id = db.submit_single_supplier_evaluation(target, 'Delivery', 9, 'Eve')
+    assert evaluation_id
+    assert stored_rows(db) == before
+    assert any(evaluation['id'] == evaluation_id for evaluation in db.get_supplier_evaluations(target))
+    assert len(failure_log(db)) == 1
+
+
+def failure_log(db):
+    return [entry for entry in db.get_unified_scores_audit_log(100) if not entry['success']]
+
+
+def test_failed_refresh_is_audited_although_it_is_rolled_back(db, monkeypatch):
+    db.migrate_to_unified_criteria_scores(CRITERIA)
+    before = stored_rows(db)
+    targets = [supplier['id'] for supplier in db.get_suppliers()[:3]]
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("aggregation failed")
+
+    monkeypatch.setattr(db, '_survey_score_aggregates', fail)
+    with pytest.raises(RuntimeError):
+        db.refresh_unified_scores_for_suppliers(targets, CRITERIA, "worker")
+    with pytest.raises(RuntimeError):
+        db.refresh_unified_scores_for_supplier(targets[0], CRITERIA, "manual")
+
+    assert stored_rows(db) == before
+    log = sorted(failure_log(db), key=lambda entry: entry['operation_type'])
+    assert [(entry['operation_type'], entry['error_message']) for entry in log] == \
+        [("batch_refresh", "aggregation failed"), ("supplier_refresh", "aggregation failed")]
+    assert log[0]['supplier_ids'] == str(targets) and log[1]['supplier_id'] == targets[0]
+
+
+def test_rebuild_uses_a_fixed_number_of_statements(db):
+    statements = []
+    db.writer.connection.set_trace_callback(statements.append)  # the rebuild runs on the writer thread
+    db.migrate_to_unified_criteria_scores(CRITERIA)
+    db.writer.connection.set_trace_callback(None)
+    # Row triggers re-report their statement, so count distinct statements
+    inserts = {s for s in statements if s.lstrip().upper().startswith('INSERT')}
+    survey_rows = sum(1 for row in stored_rows(db).values() if row[1] == 'survey')
+    # One profile INSERT ... SELECT, the survey executemany (one traced statement per row) and one default INSERT
+    assert len(inserts) == 2 + survey_rows
+    assert not any('FROM suppliers WHERE id =' in ' '.join(s.split()) for s in statements)  # no per-supplier lookups
@@ -1,25 +1,47 @@
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel, field_validator
 from typing import List, Dict, Any, Optional
 import os
 import sys
 import json
+import csv
+import io
+import time
 import requests
 import numpy as np
 import pandas as pd
 from datetime import datetime
 import traceback
 import sqlite3
+import threading
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 
 # Add the current directory to sys.path to import the optimizer
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from MOO_e_constraint_Dynamic_Bid import SelectiveNAFlexibleEConstraintOptimizer
+from pareto_plots import render_pareto_plots, submit_pareto_plots, PLOT_FORMATS
 from database import SupplierDatabase
-from best_worst_method import calculate_bwm_weights
-
-app = FastAPI(title="Unified Supply Chain Optimizer API", version="1.0.0")
+from best_worst_method import calculate_bwm_weights, calculate_bwm_weights_batch, calculate_bwm_weight_intervals
+from promethee import calculate_promethee_ii, CriterionFlows, criterion_flow_cache, result_cache
+from promethee_sensitivity import rank_stability, stability_table
+from promethee_incremental import incremental_states
+from promethee_scenarios import evaluate_scenarios
+from process_pool import shutdown_process_pool, process_pool_stats
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the database (running any pending schema migrations) at startup; stop its thread pools and the process pool at shutdown"""
+    get_db()
+    yield
+    shutdown_process_pool()
+    shutdown_db_executor()
+    close_db()
+
+app = FastAPI(title="Unified Supply Chain Optimizer API", version="1.0.0", lifespan=lifespan)
 
 # Enable CORS with comprehensive origin support
 app.add_middleware(
@@ -42,7 +64,7 @@ app.add_middleware(
 optimizer_instances = {}
 optimization_results = {}
 
-# Database path configuration - avoid global database instance
+# Database path configuration (the database instance itself is created by get_db)
 import os
 BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
 # Use the fresh database that works properly
@@ -88,6 +110,22 @@ class BWMRequest(BaseModel):
     worst_criterion: str
     best_to_others: Dict[str, float]
     others_to_worst: Dict[str, float]
+    method: str = "lp"  # "lp" (HiGHS, as calculate_bwm_weights) or "analytic" (closed form, HiGHS fallback)
+    include_intervals: bool = False  # Min/max of each weight over all optima; weights become the centre solution
+
+class BWMRespondent(BaseModel):
+    respondent: Optional[str] = None  # Label, e.g. the depot manager's name
+    best_criterion: str
+    worst_criterion: str
+    best_to_others: Dict[str, float]
+    others_to_worst: Dict[str, float]
+
+class BWMBatchRequest(BaseModel):
+    criteria: List[str]
+    respondents: List[BWMRespondent]
+    aggregation: str = "geometric"  # "geometric" or "arithmetic" group weights
+    method: str = "sparse"  # "sparse" (one block-diagonal LP) or "pool" (process pool)
+    workers: Optional[int] = None  # Process pool size for method="pool"
 
 class BWMSaveRequest(BaseModel):
     criteria_names: List[str]
@@ -160,6 +198,52 @@ class PROMETHEECalculationRequest(BaseModel):
     preference_functions: Optional[Dict[str, str]] = None
     preference_thresholds: Optional[Dict[str, float]] = None
     indifference_thresholds: Optional[Dict[str, float]] = None
+    include_preference_matrix: bool = False  # n x n matrix is O(n^2); flows are always returned
+    preference_matrix_dtype: str = "float32"  # "float32" or "float64"
+    preference_matrix_encoding: str = "base64"  # "base64" (raw little-endian bytes) or "list"
+    block_rows: Optional[int] = None  # Rows per block when computing flows (memory bound)
+    incremental: bool = True  # Patch the kept per-criterion sums for changed suppliers only (no matrix)
+    use_cache: bool = True  # Return the memoized response when inputs are unchanged (no new run is saved)
+
+class PROMETHEERerankRequest(BaseModel):
+    criteria_names: List[str]
+    weight_vectors: List[List[float]]  # One weight per criterion, in criteria_names order
+    preference_functions: Optional[Dict[str, str]] = None
+    preference_thresholds: Optional[Dict[str, float]] = None
+    indifference_thresholds: Optional[Dict[str, float]] = None
+    top_k: Optional[int] = None  # Truncate each ranking to the best k suppliers
+    include_flows: bool = True  # Return net flows for every supplier per weight vector
+
+class PROMETHEESensitivityRequest(BaseModel):
+    criteria_names: List[str]
+    criteria_weights: Optional[List[float]] = None  # Defaults to the latest saved BWM weights
+    preference_functions: Optional[Dict[str, str]] = None
+    preference_thresholds: Optional[Dict[str, float]] = None
+    indifference_thresholds: Optional[Dict[str, float]] = None
+    n_samples: int = 10000
+    method: str = "dirichlet"  # "dirichlet" or "perturbation"
+    concentration: float = 100.0  # Dirichlet: larger stays closer to the base weights
+    spread: float = 0.2  # Perturbation: max relative change per weight
+    interval: float = 0.9  # Probability mass of the reported rank interval
+    top_k: int = 1
+    seed: Optional[int] = None
+    include_distribution: bool = False  # n x n rank-probability matrix (rank 1 first)
+
+class PROMETHEEScenario(BaseModel):
+    name: Optional[str] = None
+    preference_functions: Optional[Dict[str, str]] = None
+    preference_thresholds: Optional[Dict[str, float]] = None
+    indifference_thresholds: Optional[Dict[str, float]] = None
+    criteria_weights: Optional[Dict[str, float]] = None  # Overrides the request weights
+
+class PROMETHEEScenarioRequest(BaseModel):
+    criteria_names: List[str]
+    criteria_weights: List[float]
+    scenarios: List[PROMETHEEScenario]
+    baseline_index: int = 0  # Scenario the others are compared with
+    top_k: int = 5
+    workers: Optional[int] = None  # Process pool size; None evaluates in-process
+    include_rankings: bool = False  # Full ranking and net flows per scenario (top-k only otherwise)
 
 class CriteriaUpdateRequest(BaseModel):
     old_criteria_names: List[str]
@@ -183,6 +267,16 @@ class OptimizationRequest(BaseModel):
     enable_ranking: bool = False
     ranking_metric: str = "cost_effectiveness"
     show_ranking_in_ui: bool = True
+    include_telemetry: bool = False  # Attach phase timings and per-epsilon solver statistics
+
+class IncrementalOptimizationRequest(BaseModel):
+    submission_ids: List[int] = []  # Approved submissions whose coefficients changed
+    changes: List[Dict[str, Any]] = []  # Explicit {depot_id, supplier_id, coc_rebate, ...} changes
+    include_telemetry: bool = False
+
+class PlotRequest(BaseModel):
+    formats: List[str] = list(PLOT_FORMATS)  # "png" and/or "html"
+    background: bool = True  # Render after the response is sent
 
 # Legacy AHP response models removed - now using PROMETHEE II
 
@@ -200,14 +294,27 @@ class OptimizationResponse(BaseModel):
     success: bool
     message: str
     solutions: List[Dict[str, Any]]
-    ranking_analysis: Optional[Dict[str, Any]] = None
+    ranking_analysis: Optional[Dict[str, Any]] = None  # Deprecated: use ranking_summary and GET /ranking
+    ranking_summary: Optional[Dict[str, Any]] = None
     ranking_reports: Optional[Dict[str, str]] = None
+    refresh_stats: Optional[Dict[str, Any]] = None
+    telemetry: Optional[Dict[str, Any]] = None
+
+# App-lifetime database instance; its connection pool is shared by all requests
+_db_instance = None
+_db_instance_lock = threading.Lock()
 
-# Dependency to get database instance - creates new instance per request
 def get_db():
-    """Create a new database instance for each request to avoid connection sharing"""
+    """Return the shared database instance, creating it on first use (or when DB_PATH changes)"""
+    global _db_instance
     try:
-        return SupplierDatabase(DB_PATH)
+        db = _db_instance
+        if db is None or db.db_path != DB_PATH:
+            with _db_instance_lock:
+                if _db_instance is None or _db_instance.db_path != DB_PATH:
+                    _db_instance = SupplierDatabase(DB_PATH)
+                db = _db_instance
+        return db
     except sqlite3.OperationalError as e:
         if "disk I/O error" in str(e).lower():
             raise HTTPException(
@@ -219,11 +326,21 @@ def get_db():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database initialization error: {str(e)}")
 
+def close_db():
+    """Close the shared database instance's pooled connections"""
+    global _db_instance
+    with _db_instance_lock:
+        if _db_instance is not None:
+            _db_instance.close()
+            _db_instance = None
+
 # Helper function for database operations with error handling
 def execute_db_operation(operation_func, *args, **kwargs):
     """Execute a database operation with proper error handling for lock errors"""
     try:
         return operation_func(*args, **kwargs)
+    except HTTPException:
+        raise
     except sqlite3.OperationalError as e:
         if "database is locked" in str(e).lower():
             raise HTTPException(
@@ -235,6 +352,106 @@ def execute_db_operation(operation_func, *args, **kwargs):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
+# Blocking SQLite reads from async handlers run on this pool so a slow query only holds one of its
+# threads, never the event loop; writes go to the database's writer thread (see run_db_operation).
+# Beyond DB_EXECUTOR_MAX_PENDING queued or running operations of either kind new ones are rejected
+# with 503 instead of piling up.
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", "8"))
+DB_EXECUTOR_MAX_PENDING = int(os.getenv("DB_EXECUTOR_MAX_PENDING", "64"))
+_db_executor = None
+_db_executor_lock = threading.Lock()
+_db_operations_pending = 0
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Thread pool for database operations, created on first use"""
+    global _db_executor
+    with _db_executor_lock:
+        if _db_executor is None:
+            _db_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+        return _db_executor
+
+def shutdown_db_executor():
+    """Wait for running database operations and stop the pool"""
+    global _db_executor
+    with _db_executor_lock:
+        executor, _db_executor = _db_executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+def db_executor_stats() -> Dict[str, int]:
+    return {"workers": DB_EXECUTOR_WORKERS, "max_pending": DB_EXECUTOR_MAX_PENDING, "pending": _db_operations_pending}
+
+def _db_operation_done(_future):
+    global _db_operations_pending
+    with _db_executor_lock:
+        _db_operations_pending -= 1
+
+async def run_db_operation(operation_func, *args, **kwargs):
+    """
+    await run_db_operation() on the database thread pool, awaited without blocking the event loop.
+    SupplierDatabase write operations (@write_operation) are queued to the database's single writer
+    thread instead, and the request awaits the future resolved when their group commit is done.
+    """
+    global _db_operations_pending
+    with _db_executor_lock:
+        if _db_operations_pending >= DB_EXECUTOR_MAX_PENDING:
+            raise HTTPException(status_code=503, detail="Database is temporarily busy. Please try again in a moment.")
+        _db_operations_pending += 1
+    try:
+        if getattr(operation_func, "write_operation", False):
+            future = operation_func.__self__.writer.submit(execute_db_operation, operation_func, *args, **kwargs)
+        else:
+            future = get_db_executor().submit(execute_db_operation, operation_func, *args, **kwargs)
+    except sqlite3.OperationalError as e:
+        # Writer queue full
+        _db_operation_done(None)
+        raise HTTPException(status_code=503, detail="Database is temporarily busy. Please try again in a moment.") from e
+    except Exception:
+        _db_operation_done(None)
+        raise
+    # Released when the thread finishes, even if the awaiting request is cancelled first
+    future.add_done_callback(_db_operation_done)
+    return await asyncio.wrap_future(future)
+
+def pareto_front_to_solutions(df_front: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convert a filtered Pareto front DataFrame into JSON-ready solution dictionaries"""
+    solutions = []
+    for _, row in df_front.iterrows():
+        solutions.append({
+            "epsilon": float(row["epsilon"]),
+            "cost": float(row["cost"]),
+            "score": float(row["score"]),
+            "allocations": row["allocations"],
+            "status": row["status"],
+            "epsilons": [float(e) for e in row["epsilons"]],
+            "weakly_dominated": bool(row["weakly_dominated"])
+        })
+    return solutions
+
+SOLUTION_EXPORT_COLUMNS = ["epsilon", "cost", "score", "allocations", "status", "epsilons", "weakly_dominated"]
+
+def iter_solutions_csv(solutions: List[Dict[str, Any]]):
+    """Yield the solutions list as CSV text, one chunk per row"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(SOLUTION_EXPORT_COLUMNS)
+    yield buffer.getvalue()
+    for solution in solutions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow([solution.get(column) for column in SOLUTION_EXPORT_COLUMNS])
+        yield buffer.getvalue()
+
+def solutions_to_parquet_bytes(solutions: List[Dict[str, Any]]) -> bytes:
+    """Serialise the solutions list to Parquet (requires pyarrow)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.table({column: [solution.get(column) for solution in solutions] for column in SOLUTION_EXPORT_COLUMNS})
+    sink = io.BytesIO()
+    pq.write_table(table, sink)
+    return sink.getvalue()
+
 # AI scoring function
 async def get_ai_score(description: str, criterion: str) -> int:
     """Get AI-generated score for supplier evaluation"""
@@ -277,157 +494,6 @@ async def get_ai_score(description: str, criterion: str) -> int:
         print(f"AI scoring error: {e}")
         return 5
 
-# PROMETHEE II calculation function
-def calculate_promethee_ii(supplier_scores: Dict[int, Dict[str, float]], 
-                          criteria_weights: Dict[str, float],
-                          preference_functions: Dict[str, str] = None,
-                          preference_thresholds: Dict[str, float] = None,
-                          indifference_thresholds: Dict[str, float] = None) -> Dict[str, Any]:
-    """
-    Calculate PROMETHEE II ranking for suppliers
-    """
-    suppliers = list(supplier_scores.keys())
-    criteria = list(criteria_weights.keys())
-    n_suppliers = len(suppliers)
-    
-    # Initialize parameters if not provided
-    if preference_functions is None:
-        preference_functions = {criterion: 'linear' for criterion in criteria}
-    if preference_thresholds is None:
-        preference_thresholds = {criterion: 2.0 for criterion in criteria}
-    if indifference_thresholds is None:
-        indifference_thresholds = {criterion: 0.5 for criterion in criteria}
-    
-    def calculate_preference_value(diff: float, function_type: str, 
-                                 indiff_threshold: float, pref_threshold: float) -> float:
-        """Calculate preference value based on function type"""
-        if function_type == 'usual':
-            return 1.0 if diff > 0 else 0.0
-            
-        elif function_type == 'u_shape':
-            return 1.0 if diff > indiff_threshold else 0.0
-            
-        elif function_type == 'v_shape':
-            if diff <= 0:
-                return 0.0
-            elif diff >= pref_threshold:
-                return 1.0
-            else:
-                return diff / pref_threshold
-                
-        elif function_type == 'level':
-            if diff <= indiff_threshold:
-                return 0.0
-            elif diff >= pref_threshold:
-                return 1.0
-            else:
-                return 0.5  # Plateau level
-                
-        elif function_type == 'linear':
-            if diff <= indiff_threshold:
-                return 0.0
-            elif diff >= pref_threshold:
-                return 1.0
-            else:
-                return (diff - indiff_threshold) / (pref_threshold - indiff_threshold)
-                
-        elif function_type == 'gaussian':
-            if diff <= 0:
-                return 0.0
-            else:
-                # Gaussian with sigma = preference_threshold / 2
-                sigma = pref_threshold / 2
-                return 1 - np.exp(-(diff**2) / (2 * sigma**2))
-                
-        else:  # Default to linear
-            if diff <= indiff_threshold:
-                return 0.0
-            elif diff >= pref_threshold:
-                return 1.0
-            else:
-                return (diff - indiff_threshold) / (pref_threshold - indiff_threshold)
-
-    # Calculate pairwise preferences
-    preference_matrix = np.zeros((n_suppliers, n_suppliers))
-    criteria_preference_matrices = {}
-    
-    # Initialize per-criteria matrices
-    for criterion in criteria:
-        criteria_preference_matrices[criterion] = np.zeros((n_suppliers, n_suppliers))
-    
-    for i, supplier_a in enumerate(suppliers):
-        for j, supplier_b in enumerate(suppliers):
-            if i != j:
-                aggregated_preference = 0.0
-                
-                for criterion in criteria:
-                    score_a = supplier_scores[supplier_a].get(criterion, 0)
-                    score_b = supplier_scores[supplier_b].get(criterion, 0)
-                    
-                    # Calculate difference (assuming higher is better)
-                    diff = score_a - score_b
-                    
-                    # Calculate preference using selected function type
-                    preference = calculate_preference_value(
-                        diff,
-                        preference_functions.get(criterion, 'linear'),
-                        indifference_thresholds[criterion],
-                        preference_thresholds[criterion]
-                    )
-                    
-                    # Store unweighted preference for per-criteria analysis
-                    criteria_preference_matrices[criterion][i][j] = preference
-                    
-                    # Weight the preference for aggregated matrix
-                    aggregated_preference += criteria_weights[criterion] * preference
-                
-                preference_matrix[i][j] = aggregated_preference
-    
-    # Calculate flows
-    if preference_matrix.size > 0:
-        positive_flows = np.mean(preference_matrix, axis=1)  # How much each supplier dominates others
-        negative_flows = np.mean(preference_matrix, axis=0)  # How much each supplier is dominated
-        net_flows = positive_flows - negative_flows
-    else:
-        # Handle empty matrix case
-        positive_flows = np.zeros(n_suppliers)
-        negative_flows = np.zeros(n_suppliers)
-        net_flows = np.zeros(n_suppliers)
-    
-    # Calculate per-criteria flows
-    criteria_flows = {}
-    for criterion in criteria:
-        criteria_matrix = criteria_preference_matrices[criterion]
-        if criteria_matrix.size > 0:
-            criteria_positive_flows = np.mean(criteria_matrix, axis=1)
-            criteria_negative_flows = np.mean(criteria_matrix, axis=0)
-            criteria_net_flows = criteria_positive_flows - criteria_negative_flows
-        else:
-            criteria_positive_flows = np.zeros(n_suppliers)
-            criteria_negative_flows = np.zeros(n_suppliers)
-            criteria_net_flows = np.zeros(n_suppliers)
-        
-        criteria_flows[criterion] = {
-            'positive_flows': criteria_positive_flows.tolist(),
-            'negative_flows': criteria_negative_flows.tolist(),
-            'net_flows': criteria_net_flows.tolist()
-        }
-    
-    # Create ranking
-    ranking_indices = np.argsort(-net_flows)  # Sort by net flow (descending)
-    
-    results = {
-        'suppliers': suppliers,
-        'positive_flows': positive_flows.tolist(),
-        'negative_flows': negative_flows.tolist(),
-        'net_flows': net_flows.tolist(),
-        'ranking': ranking_indices.tolist(),
-        'preference_matrix': preference_matrix.tolist(),
-        'criteria_flows': criteria_flows
-    }
-    
-    return results
-
 # ============================================================================
 # API ROUTES
 # ============================================================================
@@ -454,7 +520,7 @@ async def health_check_simple():
 async def create_supplier(supplier: SupplierCreate, db: SupplierDatabase = Depends(get_db)):
     """Create a new supplier"""
     try:
-        supplier_id = execute_db_operation(db.add_supplier, supplier.name, supplier.email)
+        supplier_id = await run_db_operation(db.add_supplier, supplier.name, supplier.email)
         return {"id": supplier_id, "message": "Supplier created successfully"}
     except HTTPException:
         raise  # Re-raise HTTP exceptions from execute_db_operation
@@ -468,7 +534,7 @@ async def create_supplier(supplier: SupplierCreate, db: SupplierDatabase = Depen
 async def get_suppliers(db: SupplierDatabase = Depends(get_db)):
     """Get all suppliers"""
     try:
-        suppliers = execute_db_operation(db.get_suppliers)
+        suppliers = await run_db_operation(db.get_suppliers)
         return {"suppliers": suppliers}
     except HTTPException:
         raise  # Re-raise HTTP exceptions from execute_db_operation
@@ -479,7 +545,7 @@ async def get_suppliers(db: SupplierDatabase = Depends(get_db)):
 async def create_depot(depot: DepotCreate, db: SupplierDatabase = Depends(get_db)):
     """Create a new depot (admin only)"""
     try:
-        depot_id = execute_db_operation(
+        depot_id = await run_db_operation(
             db.add_depot,
             name=depot.name,
             annual_volume=depot.annual_volume,
@@ -500,7 +566,7 @@ async def create_depot(depot: DepotCreate, db: SupplierDatabase = Depends(get_db
 async def get_depots(db: SupplierDatabase = Depends(get_db)):
     """Get all depots"""
     try:
-        depots = execute_db_operation(db.get_depots)
+        depots = await run_db_operation(db.get_depots)
         return {"depots": depots}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching depots: {str(e)}")
@@ -522,7 +588,7 @@ async def submit_supplier_data(submission: SupplierDataSubmission, db: SupplierD
             'distance_km': submission.distance_km
         }
         
-        submission_id = execute_db_operation(
+        submission_id = await run_db_operation(
             db.submit_supplier_data,
             submission.supplier_id,
             submission.depot_id,
@@ -542,7 +608,7 @@ async def submit_bulk_supplier_data(bulk_submission: BulkDataSubmission, db: Sup
     try:
         submission_ids = []
         for depot_data in bulk_submission.submissions:
-            submission_id = execute_db_operation(
+            submission_id = await run_db_operation(
                 db.submit_supplier_data,
                 bulk_submission.supplier_id,
                 depot_data['depot_id'],
@@ -561,7 +627,7 @@ async def submit_bulk_supplier_data(bulk_submission: BulkDataSubmission, db: Sup
 async def get_supplier_submissions(supplier_id: int, db: SupplierDatabase = Depends(get_db)):
     """Get submissions for a specific supplier"""
     try:
-        submissions = execute_db_operation(db.get_supplier_submissions, supplier_id=supplier_id)
+        submissions = await run_db_operation(db.get_supplier_submissions, supplier_id=supplier_id)
         return {"submissions": submissions}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching submissions: {str(e)}")
@@ -570,7 +636,7 @@ async def get_supplier_submissions(supplier_id: int, db: SupplierDatabase = Depe
 async def get_supplier_profile(supplier_id: int, db: SupplierDatabase = Depends(get_db)):
     """Get supplier profile information"""
     try:
-        supplier = execute_db_operation(db.get_supplier_by_id, supplier_id)
+        supplier = await run_db_operation(db.get_supplier_by_id, supplier_id)
         if not supplier:
             raise HTTPException(status_code=404, detail="Supplier not found")
         return {"supplier": supplier}
@@ -584,13 +650,13 @@ async def update_supplier_profile(supplier_id: int, profile: SupplierProfileUpda
     """Update supplier profile information"""
     try:
         # Check if supplier exists
-        supplier = execute_db_operation(db.get_supplier_by_id, supplier_id)
+        supplier = await run_db_operation(db.get_supplier_by_id, supplier_id)
         if not supplier:
             raise HTTPException(status_code=404, detail="Supplier not found")
         
         # Update profile
         profile_data = profile.dict(exclude_unset=True)
-        success = execute_db_operation(db.update_supplier_profile, supplier_id, profile_data)
+        success = await run_db_operation(db.update_supplier_profile, supplier_id, profile_data)
         
         if success:
             return {"message": "Profile updated successfully"}
@@ -607,7 +673,7 @@ async def update_supplier_profile(supplier_id: int, profile: SupplierProfileUpda
 async def get_all_submissions(status: Optional[str] = None, db: SupplierDatabase = Depends(get_db)):
     """Get all submissions (admin only) with optional status filtering"""
     try:
-        submissions = execute_db_operation(db.get_supplier_submissions, status=status)
+        submissions = await run_db_operation(db.get_supplier_submissions, status=status)
         return {"submissions": submissions}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching submissions: {str(e)}")
@@ -616,7 +682,7 @@ async def get_all_submissions(status: Optional[str] = None, db: SupplierDatabase
 async def approve_submission(approval: ApprovalRequest, db: SupplierDatabase = Depends(get_db)):
     """Approve a supplier submission (admin only)"""
     try:
-        success = execute_db_operation(db.approve_submission, approval.submission_id, approval.approved_by)
+        success = await run_db_operation(db.approve_submission, approval.submission_id, approval.approved_by)
         if success:
             return {"message": "Submission approved successfully"}
         else:
@@ -628,7 +694,7 @@ async def approve_submission(approval: ApprovalRequest, db: SupplierDatabase = D
 async def reject_submission(rejection: ApprovalRequest, db: SupplierDatabase = Depends(get_db)):
     """Reject a supplier submission (admin only)"""
     try:
-        success = execute_db_operation(db.reject_submission, rejection.submission_id, rejection.approved_by)
+        success = await run_db_operation(db.reject_submission, rejection.submission_id, rejection.approved_by)
         if success:
             return {"message": "Submission rejected successfully"}
         else:
@@ -640,7 +706,7 @@ async def reject_submission(rejection: ApprovalRequest, db: SupplierDatabase = D
 async def get_pending_submissions(db: SupplierDatabase = Depends(get_db)):
     """Get all pending submissions (admin only)"""
     try:
-        submissions = execute_db_operation(db.get_submissions_by_status, 'pending')
+        submissions = await run_db_operation(db.get_submissions_by_status, 'pending')
         return submissions
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error fetching pending submissions: {str(e)}")
@@ -649,7 +715,7 @@ async def get_pending_submissions(db: SupplierDatabase = Depends(get_db)):
 async def bulk_approve_supplier_submissions(approval: BulkApprovalRequest, db: SupplierDatabase = Depends(get_db)):
     """Approve all pending submissions for a supplier (admin only)"""
     try:
-        success = execute_db_operation(db.bulk_approve_supplier_submissions, approval.supplier_id, approval.approved_by)
+        success = await run_db_operation(db.bulk_approve_supplier_submissions, approval.supplier_id, approval.approved_by)
         if success:
             return {"message": "All supplier submissions approved successfully"}
         else:
@@ -661,7 +727,7 @@ async def bulk_approve_supplier_submissions(approval: BulkApprovalRequest, db: S
 async def bulk_reject_supplier_submissions(rejection: BulkApprovalRequest, db: SupplierDatabase = Depends(get_db)):
     """Reject all pending submissions for a supplier (admin only)"""
     try:
-        success = execute_db_operation(db.bulk_reject_supplier_submissions, rejection.supplier_id, rejection.approved_by)
+        success = await run_db_operation(db.bulk_reject_supplier_submissions, rejection.supplier_id, rejection.approved_by)
         if success:
             return {"message": "All supplier submissions rejected successfully"}
         else:
@@ -674,7 +740,7 @@ async def get_approved_optimization_data(db: SupplierDatabase = Depends(get_db))
     """Get all approved data ready for optimization"""
     try:
         # Get approved submissions with supplier and depot details
-        approved_data = execute_db_operation(db.get_approved_optimization_data)
+        approved_data = await run_db_operation(db.get_approved_optimization_data)
         return {"approved_data": approved_data}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching approved data: {str(e)}")
@@ -683,7 +749,7 @@ async def get_approved_optimization_data(db: SupplierDatabase = Depends(get_db))
 async def cleanup_duplicate_submissions(db: SupplierDatabase = Depends(get_db)):
     """Clean up duplicate supplier-depot submissions (admin only)"""
     try:
-        result = execute_db_operation(db.cleanup_duplicate_submissions)
+        result = await run_db_operation(db.cleanup_duplicate_submissions)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error cleaning duplicates: {str(e)}")
@@ -692,9 +758,9 @@ async def cleanup_duplicate_submissions(db: SupplierDatabase = Depends(get_db)):
 async def validate_data_completeness(db: SupplierDatabase = Depends(get_db)):
     """Check if all required data is complete for optimization"""
     try:
-        suppliers = execute_db_operation(db.get_suppliers)
-        depots = execute_db_operation(db.get_depots)
-        submissions = execute_db_operation(db.get_supplier_submissions, status='approved')
+        suppliers = await run_db_operation(db.get_suppliers)
+        depots = await run_db_operation(db.get_depots)
+        submissions = await run_db_operation(db.get_supplier_submissions, status='approved')
         # Skip scores check for now due to potential table corruption
         
         # Check completeness
@@ -738,7 +804,7 @@ async def validate_data_completeness(db: SupplierDatabase = Depends(get_db)):
 async def export_optimizer_data(db: SupplierDatabase = Depends(get_db)):
     """Export data in optimizer format (admin only)"""
     try:
-        data = execute_db_operation(db.export_to_optimizer_format)
+        data = await run_db_operation(db.export_to_optimizer_format)
         return {
             "message": "Data exported successfully",
             "data": {
@@ -754,7 +820,7 @@ async def export_optimizer_data(db: SupplierDatabase = Depends(get_db)):
 async def create_temp_excel(db: SupplierDatabase = Depends(get_db)):
     """Create temporary Excel file for optimizer (admin only)"""
     try:
-        temp_file = execute_db_operation(db.create_temporary_excel_file)
+        temp_file = await run_db_operation(db.create_temporary_excel_file)
         return {
             "message": "Temporary Excel file created successfully",
             "file_path": temp_file
@@ -769,22 +835,49 @@ async def create_temp_excel(db: SupplierDatabase = Depends(get_db)):
 async def calculate_bwm_weights_endpoint(request: BWMRequest):
     """Calculate criteria weights using Best-Worst Method"""
     try:
-        result = calculate_bwm_weights(
+        calculate = calculate_bwm_weight_intervals if request.include_intervals else calculate_bwm_weights
+        result = calculate(
             criteria=request.criteria,
             best=request.best_criterion,
             worst=request.worst_criterion,
             best_to_others=request.best_to_others,
-            others_to_worst=request.others_to_worst
+            others_to_worst=request.others_to_worst,
+            method=request.method
         )
         return {"success": True, "data": result}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"BWM calculation failed: {str(e)}")
 
+MAX_BWM_BATCH_RESPONDENTS = 5000
+
+@app.post("/api/bwm/calculate-batch")
+async def calculate_bwm_weights_batch_endpoint(request: BWMBatchRequest):
+    """Calculate BWM weights for many respondents at once plus aggregated group weights"""
+    try:
+        if len(request.respondents) > MAX_BWM_BATCH_RESPONDENTS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BWM_BATCH_RESPONDENTS} respondents per batch")
+        if request.workers is not None and not 1 <= request.workers <= 8:
+            raise HTTPException(status_code=400, detail="workers must be between 1 and 8")
+        # On a worker thread: the sparse LP solves here, method="pool" waits on the process pool
+        result = await asyncio.to_thread(
+            calculate_bwm_weights_batch,
+            criteria=request.criteria,
+            respondents=[respondent.model_dump() for respondent in request.respondents],
+            aggregation=request.aggregation,
+            method=request.method,
+            workers=request.workers
+        )
+        return {"success": True, "data": result}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"BWM batch calculation failed: {str(e)}")
+
 @app.post("/api/bwm/save/")
 async def save_bwm_weights_endpoint(request: BWMSaveRequest, db: SupplierDatabase = Depends(get_db)):
     """Save BWM weights configuration to database"""
     try:
-        weight_id = execute_db_operation(
+        weight_id = await run_db_operation(
             db.save_bwm_weights,
             criteria_names=request.criteria_names,
             weights=request.weights,
@@ -804,7 +897,7 @@ async def save_bwm_weights_endpoint(request: BWMSaveRequest, db: SupplierDatabas
 async def get_latest_bwm_weights_endpoint(db: SupplierDatabase = Depends(get_db)):
     """Get the latest BWM weights configuration from database"""
     try:
-        weights = execute_db_operation(db.get_latest_bwm_weights)
+        weights = await run_db_operation(db.get_latest_bwm_weights)
         if weights:
             return {"success": True, "data": weights}
         else:
@@ -886,8 +979,8 @@ async def initialize_optimizer_from_db(request: OptimizerInitFromDBRequest):
         np.random.seed(request.random_seed)
         
         # Create temporary Excel file from database
-        db_instance = SupplierDatabase(DB_PATH)
-        temp_file = db_instance.create_temporary_excel_file()
+        db_instance = get_db()
+        temp_file = await run_db_operation(db_instance.create_temporary_excel_file)
         
         # Initialize optimizer with temporary file
         sheet_names = {
@@ -967,18 +1060,11 @@ async def run_optimization(request: OptimizationRequest):
             n_points=request.n_points,
             constraint_type=request.constraint_type
         )
-        
-        # Convert DataFrame to list of dictionaries
-        solutions = []
-        for _, row in df_pareto.iterrows():
-            solutions.append({
-                "epsilon": row["epsilon"],
-                "cost": row["cost"],
-                "score": row["score"],
-                "allocations": row["allocations"],
-                "status": row["status"]
-            })
-        
+
+        # Drop duplicate/dominated points before serialisation
+        df_front = optimizer.get_pareto_front(df_pareto)
+        solutions = pareto_front_to_solutions(df_front)
+
         # Store results
         result_id = f"result_{datetime.now().timestamp()}"
         optimization_results[result_id] = {
@@ -989,7 +1075,8 @@ async def run_optimization(request: OptimizationRequest):
         return OptimizationResponse(
             success=True,
             message="Optimization completed successfully",
-            solutions=solutions
+            solutions=solutions,
+            telemetry=optimizer.run_telemetry().to_dict() if request.include_telemetry else None
         )
         
     except Exception as e:
@@ -1007,52 +1094,129 @@ async def run_optimization_with_ranking(request: OptimizationRequest):
         
         optimizer = list(optimizer_instances.values())[-1]
         
-        # Run optimization with ranking
-        df_pareto = optimizer.run_full_optimization_with_ranking(
+        # Run optimization with ranking (returns the filtered Pareto front)
+        df_front = optimizer.run_full_optimization_with_ranking(
             n_points=request.n_points,
             constraint_type=request.constraint_type,
             ranking_metric=request.ranking_metric
         )
-        
-        # Convert DataFrame to list of dictionaries
-        solutions = []
-        for _, row in df_pareto.iterrows():
-            solutions.append({
-                "epsilon": row["epsilon"],
-                "cost": row["cost"],
-                "score": row["score"],
-                "allocations": row["allocations"],
-                "status": row["status"]
-            })
-        
-        # Get ranking analysis if available
-        ranking_analysis = None
-        ranking_reports = None
-        if hasattr(optimizer, 'last_ranking_analysis'):
-            ranking_analysis = optimizer.last_ranking_analysis
-        if hasattr(optimizer, 'last_ranking_reports'):
-            ranking_reports = optimizer.last_ranking_reports
-        
+        solutions = pareto_front_to_solutions(df_front)
+
+        # Ranking analysis stays server-side; alternatives are paged via GET /ranking, reports via /export
+        ranking_store = optimizer.last_ranking_store
+        ranking_summary = ranking_store.summary() if ranking_store is not None else None
+        ranking_reports = optimizer.last_ranking_reports
+
         # Store results
         result_id = f"result_{datetime.now().timestamp()}"
         optimization_results[result_id] = {
             "solutions": solutions,
             "optimizer": optimizer,
-            "ranking_analysis": ranking_analysis,
-            "ranking_reports": ranking_reports
+            "ranking_store": ranking_store
         }
-        
+
         return OptimizationResponse(
             success=True,
             message="Optimization with ranking completed successfully",
             solutions=solutions,
-            ranking_analysis=ranking_analysis,
-            ranking_reports=ranking_reports
+            ranking_summary=ranking_summary,
+            ranking_reports=ranking_reports,
+            telemetry=optimizer.run_telemetry().to_dict() if request.include_telemetry else None
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error running optimization with ranking: {str(e)}")
 
+@app.post("/api/optimization/reoptimize", response_model=OptimizationResponse)
+async def reoptimize_incremental(request: IncrementalOptimizationRequest, db: SupplierDatabase = Depends(get_db)):
+    """Refresh the last Pareto front after a few bid coefficients changed, re-solving only affected epsilons"""
+    try:
+        if not optimizer_instances:
+            raise HTTPException(status_code=400, detail="No optimizer initialized. Call /initialize first.")
+
+        optimizer = list(optimizer_instances.values())[-1]
+        if getattr(optimizer, 'last_sweep', None) is None:
+            raise HTTPException(status_code=400, detail="No previous optimization run to refresh. Call /run first.")
+
+        coefficient_fields = ['coc_rebate', 'cost_of_collection', 'del_rebate', 'zone_differential']
+
+        # Approved submissions carry the full coefficient set for their depot-supplier pair
+        changes = []
+        submissions = await run_db_operation(db.get_submissions_by_ids, request.submission_ids)
+        for submission in submissions:
+            if submission['status'] != 'approved':
+                continue
+            change = {'depot': submission['depot_id'], 'supplier': submission['supplier_id']}
+            change.update({field: submission[field] for field in coefficient_fields})
+            changes.append(change)
+
+        for item in request.changes:
+            change = {'depot': item['depot_id'], 'supplier': item['supplier_id']}
+            change.update({field: item[field] for field in coefficient_fields if field in item})
+            changes.append(change)
+
+        if not changes:
+            raise HTTPException(status_code=400, detail="No approved submissions or coefficient changes to apply")
+
+        df_sweep = optimizer.reoptimize_incremental(changes)
+        solutions = pareto_front_to_solutions(optimizer.get_pareto_front(df_sweep))
+        refresh_stats = optimizer.last_incremental_stats
+
+        result_id = f"result_{datetime.now().timestamp()}"
+        optimization_results[result_id] = {
+            "solutions": solutions,
+            "optimizer": optimizer
+        }
+
+        return OptimizationResponse(
+            success=True,
+            message=f"Pareto front refreshed: re-solved {refresh_stats['resolved']} of {refresh_stats['epsilon_points']} epsilon values",
+            solutions=solutions,
+            refresh_stats=refresh_stats,
+            telemetry=optimizer.run_telemetry().to_dict() if request.include_telemetry else None
+        )
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error refreshing optimization: {str(e)}")
+
+@app.post("/api/optimization/plots")
+async def render_optimization_plots(request: PlotRequest, background_tasks: BackgroundTasks):
+    """Write PNG/HTML Pareto plots for the last optimization run (plots are never rendered during /run)"""
+    try:
+        if not optimizer_instances:
+            raise HTTPException(status_code=400, detail="No optimizer initialized. Call /initialize first.")
+
+        optimizer = list(optimizer_instances.values())[-1]
+        if getattr(optimizer, 'last_sweep', None) is None:
+            raise HTTPException(status_code=400, detail="No optimization run to plot. Call /run first.")
+
+        unsupported = set(request.formats) - set(PLOT_FORMATS)
+        if unsupported or not request.formats:
+            raise HTTPException(status_code=400, detail=f"formats must be a non-empty subset of {list(PLOT_FORMATS)}")
+
+        df_feasible = optimizer.last_sweep[optimizer.last_sweep['status'] == 'Optimal'].copy()
+        if len(df_feasible) == 0:
+            raise HTTPException(status_code=400, detail="Last optimization run has no feasible solutions to plot")
+
+        constraint_type = optimizer.last_sweep_constraint_type
+        if request.background:
+            background_tasks.add_task(render_pareto_plots, df_feasible, "Output Data/", constraint_type, request.formats)
+            return {"success": True, "message": "Plot rendering scheduled", "files": {}}
+
+        # Rendered on the plot worker thread; the event loop keeps serving other requests meanwhile
+        files = await asyncio.wrap_future(submit_pareto_plots(df_feasible, "Output Data/", constraint_type,
+                                                              request.formats))
+        return {"success": True, "message": "Plots rendered", "files": files}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rendering plots: {str(e)}")
+
 @app.get("/api/optimization/solution/{solution_id}")
 async def get_solution_details(solution_id: int):
     """Get detailed information about a specific solution"""
@@ -1073,44 +1237,100 @@ async def get_solution_details(solution_id: int):
         solution = optimal_solutions[solution_id]
         
         # Add additional details if available
-        if "ranking_analysis" in latest_results and latest_results["ranking_analysis"]:
-            ranking_analysis = latest_results["ranking_analysis"]
-            if solution_id in ranking_analysis:
-                solution["ranking_details"] = ranking_analysis[solution_id]
-        
+        ranking_store = latest_results.get("ranking_store")
+        if ranking_store is not None and solution_id in ranking_store.solution_ids:
+            solution = dict(solution, ranking_details=ranking_store.solution_analysis(solution_id))
+
         return {"solution": solution}
-        
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting solution details: {str(e)}")
 
 @app.get("/api/optimization/export/{format}")
-async def export_results(format: str = "csv"):
-    """Export optimization results"""
+async def export_results(format: str = "csv", report: str = "solutions", top_n: Optional[int] = 10):
+    """
+    Stream optimization results or ranking reports
+
+    report: "solutions" (csv/parquet), "ranking" (detailed alternatives, csv/parquet, top_n per depot),
+    "ranking_summary" (csv) or "ranking_report" (txt). Nothing is written to disk.
+    """
     try:
         if not optimization_results:
             raise HTTPException(status_code=404, detail="No optimization results available")
-        
+
         # Get the most recent results
         latest_results = list(optimization_results.values())[-1]
         solutions = latest_results["solutions"]
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(solutions)
-        
-        # Create output directory if it doesn't exist
-        output_dir = "Output Data"
-        os.makedirs(output_dir, exist_ok=True)
-        
-        if format.lower() == "csv":
-            filename = f"{output_dir}/optimization_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            df.to_csv(filename, index=False)
-            return FileResponse(filename, media_type="text/csv", filename=os.path.basename(filename))
-        else:
+        ranking_store = latest_results.get("ranking_store")
+        format = format.lower()
+
+        if report.startswith("ranking") and ranking_store is None:
+            raise HTTPException(status_code=404, detail="No ranking analysis available")
+
+        renderers = {
+            ("solutions", "csv"): lambda: iter_solutions_csv(solutions),
+            ("solutions", "parquet"): lambda: iter([solutions_to_parquet_bytes(solutions)]),
+            ("ranking", "csv"): lambda: ranking_store.iter_detailed_csv(top_n=top_n),
+            ("ranking", "parquet"): lambda: iter([ranking_store.to_parquet_bytes(top_n=top_n)]),
+            ("ranking_summary", "csv"): lambda: ranking_store.iter_summary_csv(),
+            ("ranking_report", "txt"): lambda: ranking_store.iter_text_report()
+        }
+        if (report, format) not in renderers:
             raise HTTPException(status_code=400, detail="Unsupported export format")
-            
+
+        media_types = {"csv": "text/csv", "txt": "text/plain", "parquet": "application/vnd.apache.parquet"}
+        try:
+            content = renderers[(report, format)]()
+        except ImportError:
+            raise HTTPException(status_code=400, detail="Parquet export requires pyarrow to be installed")
+
+        filename = f"{report}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+        return StreamingResponse(
+            content,
+            media_type=media_types[format],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error exporting results: {str(e)}")
 
+@app.get("/api/optimization/ranking")
+async def query_ranking_alternatives(solution_id: Optional[int] = None, depot: Optional[int] = None,
+                                     metric: str = "ranking_score", top_k: Optional[int] = None,
+                                     offset: int = 0, limit: int = 50):
+    """Page through ranked supplier alternatives, filtered by solution and depot and ordered by metric"""
+    try:
+        if not optimization_results:
+            raise HTTPException(status_code=404, detail="No optimization results available")
+
+        ranking_store = list(optimization_results.values())[-1].get("ranking_store")
+        if ranking_store is None:
+            raise HTTPException(status_code=404, detail="No ranking analysis available")
+
+        if offset < 0 or not 1 <= limit <= 1000 or (top_k is not None and top_k < 1):
+            raise HTTPException(status_code=400, detail="offset must be >= 0, limit between 1 and 1000 and top_k >= 1")
+
+        total, items = ranking_store.query(solution_id=solution_id, depot=depot, metric=metric,
+                                           top_k=top_k, offset=offset, limit=limit)
+        return {
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "metric": metric,
+            "alternatives": items
+        }
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error querying ranking analysis: {str(e)}")
+
 @app.get("/api/optimization/ranking/{solution_id}")
 async def get_ranking_analysis(solution_id: int):
     """Get ranking analysis for a specific solution"""
@@ -1121,16 +1341,17 @@ async def get_ranking_analysis(solution_id: int):
         # Get the most recent results
         latest_results = list(optimization_results.values())[-1]
         
-        if "ranking_analysis" not in latest_results or not latest_results["ranking_analysis"]:
+        ranking_store = latest_results.get("ranking_store")
+        if ranking_store is None:
             raise HTTPException(status_code=404, detail="No ranking analysis available")
-        
-        ranking_analysis = latest_results["ranking_analysis"]
-        
-        if solution_id not in ranking_analysis:
+
+        if solution_id not in ranking_store.solution_ids:
             raise HTTPException(status_code=404, detail="Ranking analysis not found for this solution")
-        
-        return {"ranking_analysis": ranking_analysis[solution_id]}
-        
+
+        return {"ranking_analysis": ranking_store.solution_analysis(solution_id)}
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting ranking analysis: {str(e)}")
 
@@ -1143,7 +1364,7 @@ async def submit_supplier_evaluation(request: SupplierEvaluationRequest, db: Sup
     """Submit a single supplier evaluation"""
     try:
         # Submit single supplier evaluation
-        evaluation_id = execute_db_operation(
+        evaluation_id = await run_db_operation(
             db.submit_single_supplier_evaluation,
             request.supplier_id,
             request.criterion_name,
@@ -1160,7 +1381,7 @@ async def submit_supplier_evaluations_batch(request: SupplierEvaluationBatchRequ
     """Submit multiple supplier evaluations at once"""
     try:
         # Submit evaluations directly to the new supplier_evaluations table
-        evaluation_ids = execute_db_operation(
+        evaluation_ids = await run_db_operation(
             db.submit_supplier_evaluations_batch,
             request.evaluations,
             request.participant_name,
@@ -1175,7 +1396,7 @@ async def submit_supplier_evaluations_batch(request: SupplierEvaluationBatchRequ
 async def get_supplier_evaluations(supplier_id: int = None, db: SupplierDatabase = Depends(get_db)):
     """Get supplier evaluations with optional filtering"""
     try:
-        evaluations = execute_db_operation(db.get_supplier_evaluations, supplier_id)
+        evaluations = await run_db_operation(db.get_supplier_evaluations, supplier_id)
         return {"evaluations": evaluations}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting evaluations: {str(e)}")
@@ -1184,7 +1405,7 @@ async def get_supplier_evaluations(supplier_id: int = None, db: SupplierDatabase
 async def get_evaluation_summary(db: SupplierDatabase = Depends(get_db)):
     """Get summary of supplier evaluations"""
     try:
-        summary = execute_db_operation(db.get_evaluation_summary)
+        summary = await run_db_operation(db.get_evaluation_summary)
         return {"summary": summary}
     except HTTPException:
         raise  # Re-raise HTTP exceptions from execute_db_operation
@@ -1195,7 +1416,7 @@ async def get_evaluation_summary(db: SupplierDatabase = Depends(get_db)):
 async def clear_supplier_evaluations(db: SupplierDatabase = Depends(get_db)):
     """Clear all supplier evaluations"""
     try:
-        result = execute_db_operation(db.clear_supplier_evaluations)
+        result = await run_db_operation(db.clear_supplier_evaluations)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error clearing evaluations: {str(e)}")
@@ -1204,7 +1425,7 @@ async def clear_supplier_evaluations(db: SupplierDatabase = Depends(get_db)):
 async def delete_supplier_evaluation(evaluation_id: int, db: SupplierDatabase = Depends(get_db)):
     """Delete a specific supplier evaluation"""
     try:
-        result = execute_db_operation(db.delete_supplier_evaluation, evaluation_id)
+        result = await run_db_operation(db.delete_supplier_evaluation, evaluation_id)
         if not result.get("success", False):
             raise HTTPException(status_code=404, detail=result.get("message", "Evaluation not found"))
         return result
@@ -1221,7 +1442,7 @@ async def delete_supplier_evaluation(evaluation_id: int, db: SupplierDatabase =
 async def save_profile_scoring_config(request: ProfileScoringConfigRequest, db: SupplierDatabase = Depends(get_db)):
     """Save profile scoring configuration to database"""
     try:
-        result = execute_db_operation(db.save_profile_scoring_config, request.config_data)
+        result = await run_db_operation(db.save_profile_scoring_config, request.config_data)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error saving profile scoring config: {str(e)}")
@@ -1230,7 +1451,7 @@ async def save_profile_scoring_config(request: ProfileScoringConfigRequest, db:
 async def get_profile_scoring_config(db: SupplierDatabase = Depends(get_db)):
     """Get profile scoring configuration from database"""
     try:
-        config = execute_db_operation(db.get_profile_scoring_config)
+        config = await run_db_operation(db.get_profile_scoring_config)
         return {"config": config}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting profile scoring config: {str(e)}")
@@ -1239,7 +1460,7 @@ async def get_profile_scoring_config(db: SupplierDatabase = Depends(get_db)):
 async def get_supplier_profile_scores(supplier_id: int, db: SupplierDatabase = Depends(get_db)):
     """Get calculated profile scores for a specific supplier"""
     try:
-        scores = execute_db_operation(db.get_supplier_profile_scores, supplier_id)
+        scores = await run_db_operation(db.get_supplier_profile_scores, supplier_id)
         return {"supplier_id": supplier_id, "profile_scores": scores}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting supplier profile scores: {str(e)}")
@@ -1248,82 +1469,106 @@ async def get_supplier_profile_scores(supplier_id: int, db: SupplierDatabase = D
 # PROMETHEE II ENDPOINTS (from backend_api.py)
 # ============================================================================
 
+def load_promethee_supplier_scores(db: SupplierDatabase, criteria_names: List[str]):
+    """
+    Load unified supplier scores in the shape the PROMETHEE engine expects
+
+    Returns:
+        tuple: (supplier_scores {supplier_id: {criterion: score}}, confidence_levels
+                {supplier_id: [confidence per criterion]}, evaluation_counts)
+
+    Raises:
+        HTTPException: 400 if a profile criterion has no data for some supplier
+    """
+    # Ensure unified scores table is populated before calculation
+    migration_result = execute_db_operation(db.ensure_unified_scores_populated, criteria_names)
+
+    # Get aggregated supplier scores from unified table
+    aggregated_scores = execute_db_operation(db.get_unified_supplier_scores, criteria_names)
+
+    # Get manager evaluation counts per supplier
+    evaluation_counts = execute_db_operation(db.get_supplier_evaluation_counts)
+
+    # Define which criteria are profile-based (must have data) vs survey-based (can have missing data)
+    PROFILE_CRITERIA = {
+        'Product/Service Type', 'Geographical Network', 'Method of Sourcing',
+        'Investment in Equipment', 'Reciprocal Business', 'B-BBEE Level'
+    }
+
+    # Convert to format expected by PROMETHEE calculation
+    supplier_scores = {}
+    confidence_levels = {}
+    missing_evaluations = []
+
+    for supplier_id, criteria_data in aggregated_scores.items():
+        supplier_scores[supplier_id] = {}
+        confidence_levels[supplier_id] = []
+
+        for criterion_name in criteria_names:
+            if criterion_name in criteria_data:
+                supplier_scores[supplier_id][criterion_name] = criteria_data[criterion_name]['score']
+
+                # Calculate confidence based on data source and count
+                data_source = criteria_data[criterion_name].get('source', 'unknown')
+                count = criteria_data[criterion_name].get('count', 1)
+
+                if data_source == 'profile':
+                    confidence = 1.0  # Profile data is always fully confident
+                elif data_source == 'survey':
+                    confidence = min(1.0, count / 3.0)  # More evaluations = higher confidence, max at 3
+                else:
+                    confidence = 0.5  # Default/unknown sources get medium confidence
+
+                confidence_levels[supplier_id].append(confidence)
+            else:
+                # Only consider it "missing" if it's a profile criterion that should always have data
+                if criterion_name in PROFILE_CRITERIA:
+                    missing_evaluations.append({
+                        'supplier_id': supplier_id,
+                        'criterion_name': criterion_name
+                    })
+                else:
+                    # For survey criteria without data, use default score of 0
+                    supplier_scores[supplier_id][criterion_name] = 0.0
+                    confidence_levels[supplier_id].append(0)  # Zero confidence for missing survey data
+
+    # Check if there are any missing profile evaluations (this should not happen with proper profile integration)
+    if missing_evaluations:
+        # Get supplier names for better error messages
+        suppliers_data = execute_db_operation(db.get_suppliers)
+        supplier_names = {s['id']: s['name'] for s in suppliers_data}
+
+        missing_details = []
+        for missing in missing_evaluations:
+            supplier_name = supplier_names.get(missing['supplier_id'], f"Supplier {missing['supplier_id']}")
+            missing_details.append(f"- {supplier_name}: {missing['criterion_name']}")
+
+        error_message = (
+            f"⚠️ PROMETHEE II calculation cannot proceed with missing profile criteria data.\n\n"
+            f"Missing profile data ({len(missing_evaluations)} total):\n" +
+            "\n".join(missing_details) +
+            f"\n\nProfile criteria should always have data from supplier profiles. Please check the supplier data and profile scoring configuration."
+        )
+
+        raise HTTPException(status_code=400, detail=error_message)
+
+    return supplier_scores, confidence_levels, evaluation_counts
+
 @app.post("/api/promethee/calculate")
 async def calculate_promethee_ranking(request: PROMETHEECalculationRequest, db: SupplierDatabase = Depends(get_db)):
     """Calculate PROMETHEE II ranking for suppliers"""
     try:
-        # Ensure unified scores table is populated before calculation
-        migration_result = execute_db_operation(db.ensure_unified_scores_populated, request.criteria_names)
-        
-        # Get aggregated supplier scores from unified table
-        aggregated_scores = execute_db_operation(db.get_unified_supplier_scores, request.criteria_names)
-        
-        # Get manager evaluation counts per supplier
-        evaluation_counts = execute_db_operation(db.get_supplier_evaluation_counts)
-        
-        # Define which criteria are profile-based (must have data) vs survey-based (can have missing data)
-        PROFILE_CRITERIA = {
-            'Product/Service Type', 'Geographical Network', 'Method of Sourcing',
-            'Investment in Equipment', 'Reciprocal Business', 'B-BBEE Level'
-        }
-        
-        # Convert to format expected by PROMETHEE calculation
-        supplier_scores = {}
-        confidence_levels = {}
-        missing_evaluations = []
-        
-        for supplier_id, criteria_data in aggregated_scores.items():
-            supplier_scores[supplier_id] = {}
-            confidence_levels[supplier_id] = []
-            
-            for criterion_name in request.criteria_names:
-                if criterion_name in criteria_data:
-                    supplier_scores[supplier_id][criterion_name] = criteria_data[criterion_name]['score']
-                    
-                    # Calculate confidence based on data source and count
-                    data_source = criteria_data[criterion_name].get('source', 'unknown')
-                    count = criteria_data[criterion_name].get('count', 1)
-                    
-                    if data_source == 'profile':
-                        confidence = 1.0  # Profile data is always fully confident
-                    elif data_source == 'survey':
-                        confidence = min(1.0, count / 3.0)  # More evaluations = higher confidence, max at 3
-                    else:
-                        confidence = 0.5  # Default/unknown sources get medium confidence
-                    
-                    confidence_levels[supplier_id].append(confidence)
-                else:
-                    # Only consider it "missing" if it's a profile criterion that should always have data
-                    if criterion_name in PROFILE_CRITERIA:
-                        missing_evaluations.append({
-                            'supplier_id': supplier_id,
-                            'criterion_name': criterion_name
-                        })
-                    else:
-                        # For survey criteria without data, use default score of 0
-                        supplier_scores[supplier_id][criterion_name] = 0.0
-                        confidence_levels[supplier_id].append(0)  # Zero confidence for missing survey data
-        
-        # Check if there are any missing profile evaluations (this should not happen with proper profile integration)
-        if missing_evaluations:
-            # Get supplier names for better error messages
-            suppliers_data = execute_db_operation(db.get_suppliers)
-            supplier_names = {s['id']: s['name'] for s in suppliers_data}
-            
-            missing_details = []
-            for missing in missing_evaluations:
-                supplier_name = supplier_names.get(missing['supplier_id'], f"Supplier {missing['supplier_id']}")
-                missing_details.append(f"- {supplier_name}: {missing['criterion_name']}")
-            
-            error_message = (
-                f"⚠️ PROMETHEE II calculation cannot proceed with missing profile criteria data.\n\n"
-                f"Missing profile data ({len(missing_evaluations)} total):\n" +
-                "\n".join(missing_details) +
-                f"\n\nProfile criteria should always have data from supplier profiles. Please check the supplier data and profile scoring configuration."
-            )
-            
-            raise HTTPException(status_code=400, detail=error_message)
-        
+        # Same request on unchanged scores/weights/suppliers: serve the memoized response, skip DB writes
+        cache_parameters = request.model_dump(exclude={'use_cache', 'incremental'})
+        if request.use_cache:
+            data_versions = await run_db_operation(db.get_data_versions)
+            result_cache.observe(data_versions)
+            cached = result_cache.get(result_cache.key(data_versions, cache_parameters))
+            if cached is not None:
+                return dict(cached, cache_hit=True)
+
+        supplier_scores, confidence_levels, evaluation_counts = await run_db_operation(load_promethee_supplier_scores, db, request.criteria_names)
+
         # Convert criteria weights to dict
         criteria_weights = dict(zip(request.criteria_names, request.criteria_weights))
         
@@ -1334,32 +1579,56 @@ async def calculate_promethee_ranking(request: PROMETHEECalculationRequest, db:
         print("=========================================\n")
         
         # Calculate PROMETHEE II ranking
-        promethee_results = calculate_promethee_ii(
-            supplier_scores,
-            criteria_weights,
-            request.preference_functions,
-            request.preference_thresholds,
-            request.indifference_thresholds
+        state_update = None
+        if request.incremental and not request.include_preference_matrix:
+            # Only suppliers whose scores changed since the last call are recomputed (O(n*k) each)
+            state = incremental_states.get(list(criteria_weights), request.preference_functions,
+                                           request.preference_thresholds, request.indifference_thresholds)
+            state_update = state.sync(supplier_scores)
+            promethee_results = state.results(criteria_weights, list(supplier_scores))
+            print(f"PROMETHEE II state {state_update['mode']}: {state_update}")
+        else:
+            promethee_results = calculate_promethee_ii(
+                supplier_scores,
+                criteria_weights,
+                request.preference_functions,
+                request.preference_thresholds,
+                request.indifference_thresholds,
+                include_preference_matrix=request.include_preference_matrix,
+                matrix_dtype=request.preference_matrix_dtype,
+                matrix_encoding=request.preference_matrix_encoding,
+                block_rows=request.block_rows
+            )
+
+        # Seed the weight-space cache so /rerank can re-weight without another pairwise pass
+        criterion_flow_cache.put(
+            criterion_flow_cache.fingerprint(supplier_scores, list(criteria_weights), request.preference_functions,
+                                             request.preference_thresholds, request.indifference_thresholds),
+            CriterionFlows.from_results(promethee_results)
         )
-        
-        # Save results to database
+
+        # Save results to database as one run (header + all supplier rows in one transaction)
         suppliers = promethee_results['suppliers']
-        for i, supplier_id in enumerate(suppliers):
-            avg_confidence = np.mean(confidence_levels[supplier_id])
-            execute_db_operation(
-                db.save_promethee_results,
-                supplier_id,
-                promethee_results['positive_flows'][i],
-                promethee_results['negative_flows'][i],
-                promethee_results['net_flows'][i],
-                promethee_results['ranking'].index(i) + 1,  # Convert to 1-based ranking
-                avg_confidence,
-                json.dumps(criteria_weights)
-            )
+        run_id = await run_db_operation(
+            db.save_promethee_run,
+            suppliers,
+            promethee_results['positive_flows'],
+            promethee_results['negative_flows'],
+            promethee_results['net_flows'],
+            promethee_results['ranking'],
+            [np.mean(confidence_levels[supplier_id]) for supplier_id in suppliers],
+            criteria_weights,
+            {
+                'preference_functions': request.preference_functions,
+                'preference_thresholds': request.preference_thresholds,
+                'indifference_thresholds': request.indifference_thresholds
+            }
+        )
+        promethee_results['run_id'] = run_id
         
         # Add supplier names and confidence levels to results
         supplier_names = []
-        supplier_data = execute_db_operation(db.get_suppliers)
+        supplier_data = await run_db_operation(db.get_suppliers)
         for supplier_id in suppliers:
             supplier_name = next((s['name'] for s in supplier_data if s['id'] == supplier_id), f"Supplier {supplier_id}")
             supplier_names.append(supplier_name)
@@ -1368,28 +1637,232 @@ async def calculate_promethee_ranking(request: PROMETHEECalculationRequest, db:
         promethee_results['confidence_levels'] = confidence_levels
         promethee_results['evaluation_counts'] = evaluation_counts
         
-        return {"results": promethee_results}
-        
+        response = {"results": promethee_results}
+        if state_update is not None:
+            response["state_update"] = state_update
+        if request.use_cache:
+            # Versions after loading: populating the unified scores may itself have written
+            data_versions = await run_db_operation(db.get_data_versions)
+            result_cache.observe(data_versions)
+            result_cache.put(result_cache.key(data_versions, cache_parameters), response)
+        return dict(response, cache_hit=False)
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculating PROMETHEE ranking: {str(e)}")
 
+@app.post("/api/promethee/rerank")
+async def rerank_promethee(request: PROMETHEERerankRequest, db: SupplierDatabase = Depends(get_db)):
+    """Rank suppliers for many weight vectors at once from cached per-criterion flows (nothing is saved)"""
+    try:
+        if not request.weight_vectors:
+            raise HTTPException(status_code=400, detail="weight_vectors must contain at least one weight vector")
+        if request.top_k is not None and request.top_k < 1:
+            raise HTTPException(status_code=400, detail="top_k must be >= 1")
+
+        # While no input table changed the flows are looked up without loading the scores again
+        flow_parameters = request.model_dump(include={'criteria_names', 'preference_functions',
+                                                      'preference_thresholds', 'indifference_thresholds'})
+        data_versions = await run_db_operation(db.get_data_versions)
+        version_key = criterion_flow_cache.version_key(data_versions, flow_parameters)
+        flows = criterion_flow_cache.get(version_key)
+        cache_hit = flows is not None
+        if flows is None:
+            supplier_scores, _, _ = await run_db_operation(load_promethee_supplier_scores, db, request.criteria_names)
+            flows, cache_hit = criterion_flow_cache.get_or_compute(
+                supplier_scores,
+                request.criteria_names,
+                request.preference_functions,
+                request.preference_thresholds,
+                request.indifference_thresholds
+            )
+            # Written meanwhile (possibly by the load itself): the scores may not match data_versions
+            if await run_db_operation(db.get_data_versions) == data_versions:
+                criterion_flow_cache.put(version_key, flows)
+        weighted = flows.weighted_flows(request.weight_vectors)
+
+        rankings = []
+        for i, weights in enumerate(request.weight_vectors):
+            ranking = weighted['ranking'][i][:request.top_k] if request.top_k else weighted['ranking'][i]
+            entry = {"weights": weights, "ranking": ranking.tolist()}
+            if request.include_flows:
+                entry["net_flows"] = weighted['net'][i].tolist()
+            rankings.append(entry)
+
+        return {
+            "suppliers": flows.suppliers,
+            "criteria_names": flows.criteria,
+            "cache_hit": cache_hit,
+            "rankings": rankings
+        }
+
+    except HTTPException:
+        raise
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid rerank request: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error re-ranking PROMETHEE results: {str(e)}")
+
+MAX_SENSITIVITY_SAMPLES = 200000
+
+@app.post("/api/promethee/sensitivity")
+async def promethee_weight_sensitivity(request: PROMETHEESensitivityRequest, db: SupplierDatabase = Depends(get_db)):
+    """Rank stability of every supplier under sampled uncertainty around the BWM weights (nothing is saved)"""
+    try:
+        if not 1 <= request.n_samples <= MAX_SENSITIVITY_SAMPLES:
+            raise HTTPException(status_code=400, detail=f"n_samples must be between 1 and {MAX_SENSITIVITY_SAMPLES}")
+
+        base_weights = request.criteria_weights
+        if base_weights is None:
+            saved = await run_db_operation(db.get_latest_bwm_weights)
+            if not saved:
+                raise HTTPException(status_code=400, detail="No criteria_weights given and no BWM weights saved")
+            missing = [c for c in request.criteria_names if c not in saved['weights']]
+            if missing:
+                raise HTTPException(status_code=400, detail=f"Saved BWM weights have no weight for: {', '.join(missing)}")
+            base_weights = [saved['weights'][c] for c in request.criteria_names]
+
+        supplier_scores, _, _ = await run_db_operation(load_promethee_supplier_scores, db, request.criteria_names)
+        # The pairwise pass (on a cache miss) and the sampling run on a worker thread, not the event loop
+        flows, cache_hit = await asyncio.to_thread(
+            criterion_flow_cache.get_or_compute,
+            supplier_scores,
+            request.criteria_names,
+            request.preference_functions,
+            request.preference_thresholds,
+            request.indifference_thresholds
+        )
+
+        start_time = time.time()
+        result = await asyncio.to_thread(rank_stability, flows, base_weights, n_samples=request.n_samples,
+                                         method=request.method, concentration=request.concentration,
+                                         spread=request.spread, interval=request.interval, seed=request.seed,
+                                         top_k=request.top_k)
+        elapsed = time.time() - start_time
+
+        supplier_data = await run_db_operation(db.get_suppliers)
+        supplier_names = {s['id']: s['name'] for s in supplier_data}
+
+        response = {
+            "criteria_names": result['criteria_names'],
+            "base_weights": result['base_weights'],
+            "sampled_weight_mean": result['sampled_weight_mean'],
+            "sampled_weight_std": result['sampled_weight_std'],
+            "n_samples": result['n_samples'],
+            "method": result['method'],
+            "interval": result['rank_interval']['probability'],
+            "top_k": result['top_k'],
+            "suppliers": stability_table(result, supplier_names),
+            "cache_hit": cache_hit,
+            "computation_time": elapsed
+        }
+        if request.include_distribution:
+            response["supplier_order"] = result['suppliers']
+            response["rank_probabilities"] = result['rank_probabilities'].tolist()
+        return response
+
+    except HTTPException:
+        raise
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid sensitivity request: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error running PROMETHEE sensitivity analysis: {str(e)}")
+
+MAX_PROMETHEE_SCENARIOS = 500
+MAX_PROMETHEE_SCENARIO_WORKERS = 8
+
+@app.post("/api/promethee/scenarios")
+async def evaluate_promethee_scenarios(request: PROMETHEEScenarioRequest, db: SupplierDatabase = Depends(get_db)):
+    """Evaluate many preference-function/threshold configurations at once and compare their rankings (nothing is saved)"""
+    try:
+        if not 1 <= len(request.scenarios) <= MAX_PROMETHEE_SCENARIOS:
+            raise HTTPException(status_code=400, detail=f"Between 1 and {MAX_PROMETHEE_SCENARIOS} scenarios are allowed")
+        if request.workers is not None and not 1 <= request.workers <= MAX_PROMETHEE_SCENARIO_WORKERS:
+            raise HTTPException(status_code=400, detail=f"workers must be between 1 and {MAX_PROMETHEE_SCENARIO_WORKERS}")
+
+        supplier_scores, _, _ = await run_db_operation(load_promethee_supplier_scores, db, request.criteria_names)
+        criteria_weights = dict(zip(request.criteria_names, request.criteria_weights))
+
+        start_time = time.time()
+        # On a worker thread: the in-process path computes, the pooled one waits on the process pool
+        evaluation = await asyncio.to_thread(
+            evaluate_scenarios,
+            supplier_scores,
+            criteria_weights,
+            [scenario.model_dump() for scenario in request.scenarios],
+            baseline=request.baseline_index,
+            top_k=request.top_k,
+            workers=request.workers
+        )
+        elapsed = time.time() - start_time
+
+        suppliers = evaluation['suppliers']
+        scenarios = []
+        for scenario in evaluation['scenarios']:
+            entry = {
+                "name": scenario['name'],
+                "kendall_tau": scenario['kendall_tau'],
+                "top_k_overlap": scenario['top_k_overlap'],
+                "max_rank_shift": scenario['max_rank_shift'],
+                "top_k_suppliers": [suppliers[i] for i in scenario['ranking'][:request.top_k]]
+            }
+            if request.include_rankings:
+                entry["ranking"] = scenario['ranking'].tolist()
+                entry["net_flows"] = scenario['net_flows'].tolist()
+            scenarios.append(entry)
+
+        return {
+            "suppliers": suppliers,
+            "criteria_names": evaluation['criteria_names'],
+            "baseline_index": evaluation['baseline'],
+            "top_k": evaluation['top_k'],
+            "variants_evaluated": evaluation['variants_evaluated'],
+            "scenarios": scenarios,
+            "computation_time": elapsed
+        }
+
+    except HTTPException:
+        raise
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid scenario request: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error evaluating PROMETHEE scenarios: {str(e)}")
+
 @app.get("/api/promethee/results")
-async def get_promethee_results(db: SupplierDatabase = Depends(get_db)):
-    """Get latest PROMETHEE II results"""
+async def get_promethee_results(run_id: Optional[int] = None, db: SupplierDatabase = Depends(get_db)):
+    """Get PROMETHEE II results of the latest run (or of run_id)"""
     try:
-        results = execute_db_operation(db.get_promethee_results)
+        results = await run_db_operation(db.get_promethee_results, run_id)
         return {"results": results}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting PROMETHEE results: {str(e)}")
 
+@app.get("/api/promethee/runs")
+async def get_promethee_runs(limit: int = 20, db: SupplierDatabase = Depends(get_db)):
+    """List the most recent PROMETHEE II runs (weights, preference parameters, params hash)"""
+    try:
+        if not 1 <= limit <= 500:
+            raise HTTPException(status_code=400, detail="limit must be between 1 and 500")
+        runs = await run_db_operation(db.get_promethee_runs, limit)
+        return {"runs": runs}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error getting PROMETHEE runs: {str(e)}")
+
 @app.post("/api/promethee/threshold-recommendations")
 async def get_threshold_recommendations(request: PROMETHEECalculationRequest, db: SupplierDatabase = Depends(get_db)):
     """Get intelligent threshold recommendations based on actual data distributions"""
     try:
         # Ensure unified scores table is populated before generating recommendations
-        migration_result = execute_db_operation(db.ensure_unified_scores_populated, request.criteria_names)
+        migration_result = await run_db_operation(db.ensure_unified_scores_populated, request.criteria_names)
         
-        recommendations = execute_db_operation(db.calculate_threshold_recommendations, request.criteria_names)
+        recommendations = await run_db_operation(db.calculate_threshold_recommendations, request.criteria_names)
         return {"success": True, "recommendations": recommendations}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculating threshold recommendations: {str(e)}")
@@ -1398,7 +1871,7 @@ async def get_threshold_recommendations(request: PROMETHEECalculationRequest, db
 async def get_threshold_alternatives(request: PROMETHEECalculationRequest, db: SupplierDatabase = Depends(get_db)):
     """Get alternative threshold recommendation strategies (conservative, sensitive, etc.)"""
     try:
-        alternatives = execute_db_operation(db.get_threshold_recommendation_alternatives, request.criteria_names)
+        alternatives = await run_db_operation(db.get_threshold_recommendation_alternatives, request.criteria_names)
         return {"success": True, "alternatives": alternatives}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculating threshold alternatives: {str(e)}")
@@ -1408,13 +1881,13 @@ async def update_criteria_configuration(request: CriteriaUpdateRequest, db: Supp
     """Update criteria names and clear all existing evaluations, BWM weights, and unified criteria scores"""
     try:
         # Clear all existing supplier evaluations
-        clear_evaluations_result = execute_db_operation(db.clear_supplier_evaluations)
+        clear_evaluations_result = await run_db_operation(db.clear_supplier_evaluations)
         
         # Clear all existing BWM weights
-        clear_bwm_result = execute_db_operation(db.clear_bwm_weights)
+        clear_bwm_result = await run_db_operation(db.clear_bwm_weights)
         
         # Clear all existing unified criteria scores
-        clear_unified_result = execute_db_operation(db.clear_unified_criteria_scores)
+        clear_unified_result = await run_db_operation(db.clear_unified_criteria_scores)
         
         return {
             "message": f"Criteria configuration updated successfully. {clear_evaluations_result['message']} {clear_bwm_result['message']} {clear_unified_result['message']}",
@@ -1430,7 +1903,7 @@ async def update_criteria_configuration(request: CriteriaUpdateRequest, db: Supp
 async def get_current_criteria(db: SupplierDatabase = Depends(get_db)):
     """Get current criteria from existing evaluations"""
     try:
-        evaluations = execute_db_operation(db.get_supplier_evaluations)
+        evaluations = await run_db_operation(db.get_supplier_evaluations)
         if not evaluations:
             return {"criteria_names": [], "total_evaluations": 0}
         
@@ -1454,11 +1927,16 @@ async def get_current_criteria(db: SupplierDatabase = Depends(get_db)):
 async def migrate_unified_scores(request: PROMETHEECalculationRequest, db: SupplierDatabase = Depends(get_db)):
     """Migrate existing data to unified supplier criteria scores table"""
     try:
-        result = execute_db_operation(db.migrate_to_unified_criteria_scores, request.criteria_names)
+        result = await run_db_operation(db.migrate_to_unified_criteria_scores, request.criteria_names)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error migrating to unified scores: {str(e)}")
 
+@app.get("/api/unified-scores/refresh-status")
+async def get_unified_scores_refresh_status(db: SupplierDatabase = Depends(get_db)):
+    """Queue depth, lag and counters of the background unified-scores refresh worker"""
+    return {"success": True, "refresh_worker": db.refresh_worker.metrics()}
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
@@ -1467,7 +1945,10 @@ async def health_check():
         "timestamp": datetime.now().isoformat(),
         "active_optimizers": len(optimizer_instances),
         "stored_results": len(optimization_results),
-        "database": "connected"
+        "database": "connected",
+        "db_executor": db_executor_stats(),
+        "db_writer": _db_instance.writer.metrics() if _db_instance is not None else None,
+        "process_pool": process_pool_stats()
     }
 
 if __name__ == "__main__":
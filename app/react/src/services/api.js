@@ -45,6 +45,24 @@ export const prometheeAPI = {
   calculatePROMETHEEScores: async (data) => {
     const response = await api.post('/promethee/calculate', data)
     return response.data
+  },
+
+  // Re-rank suppliers for many weight vectors from cached per-criterion flows
+  rerankPROMETHEE: async (data) => {
+    const response = await api.post('/promethee/rerank', data)
+    return response.data
+  },
+
+  // Rank stability of every supplier under sampled weight uncertainty
+  analyzePROMETHEESensitivity: async (data) => {
+    const response = await api.post('/promethee/sensitivity', data)
+    return response.data
+  },
+
+  // Compare rankings across many preference-function/threshold configurations
+  evaluatePROMETHEEScenarios: async (data) => {
+    const response = await api.post('/promethee/scenarios', data)
+    return response.data
   }
 }
 
@@ -91,6 +109,12 @@ export const optimizationAPI = {
   getRankingAnalysis: async (solutionId) => {
     const response = await api.get(`/optimization/ranking/${solutionId}`)
     return response.data
+  },
+
+  // Page through ranked alternatives (filters: solution_id, depot, metric, top_k, offset, limit)
+  queryRankingAlternatives: async (params = {}) => {
+    const response = await api.get('/optimization/ranking', { params })
+    return response.data
   }
 }
 